@@ -1,17 +1,63 @@
 from flask import Flask
+from sqlalchemy.engine import make_url
+
 from .ext import database
 from .ext import logger
+from .ext import passwords
+from .repolayer import archive
+from .repolayer import cache
+from .repolayer import ids
+from .repolayer import rollups
+from .repolayer import snapshot
+from .repolayer import writer
+
+
+# ? Queue pool sizing for file and server databases, merged under any SQLALCHEMY_ENGINE_OPTIONS passed in
+POOL_OPTIONS = {
+    "pool_size": 10,
+    "pool_recycle": 3600,
+    "pool_pre_ping": True,
+}
+
 
+def uses_memory_database(uri: str) -> bool:
+    # ? In-memory SQLite runs on a StaticPool, which rejects pool sizing
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
 
-def create_app():
+
+def create_app(config: dict | None = None):
     app = Flask(__name__)
 
     app.config["SECRET_KEY"] = "secret"
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///db.sqlite"
     app.config["DEBUG"] = True
+    app.config["SQLITE_PROFILE"] = "production"
+
+    if config:
+        app.config.update(config)
+
+    pool_options = (
+        {}
+        if uses_memory_database(app.config["SQLALCHEMY_DATABASE_URI"])
+        else POOL_OPTIONS
+    )
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **pool_options,
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
 
     database.register_extension(app)
     logger.register_extension(app)
+    passwords.register_extension(app)
+    archive.register_extension(app)
+    cache.register_extension(app)
+    ids.register_extension(app)
+    rollups.register_extension(app)
+    snapshot.register_extension(app)
+    writer.register_extension(app)
 
     app.logger.info("App pipeline finished building!")
     return app
@@ -0,0 +1,149 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from app import create_app
+from app.benchmarks.harness import compare
+from app.benchmarks.repositories import run_cases
+from app.benchmarks.seed import seed_database
+from app.datalayer import User, Account, Transaction
+from app.ext.database import DB as db
+
+# ? python -m app.benchmarks --users 10000 --accounts 100000 --transactions 10000000 --database bench.sqlite --output results.json
+# ? Re-run with --reuse to skip seeding and --baseline results.json to fail on regressions.
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark every public repository method against a seeded SQLite file."
+    )
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--accounts", type=int, default=100_000)
+    parser.add_argument("--transactions", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--database", help="SQLite file to seed, defaults to a temporary file."
+    )
+    parser.add_argument(
+        "--reuse",
+        action="store_true",
+        help="Benchmark an already seeded --database instead of seeding it again.",
+    )
+    parser.add_argument("--profile", default="production")
+    parser.add_argument(
+        "--cache", action="store_true", help="Keep the repository cache enabled."
+    )
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument(
+        "--slow-iterations",
+        type=int,
+        default=20,
+        help="Iterations for cases that run bcrypt.",
+    )
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--only", help="Only run cases whose name contains this.")
+    parser.add_argument("--output", help="Write the JSON results to this file.")
+    parser.add_argument("--baseline", help="JSON results of a previous run.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def count_rows(app) -> dict:
+    with app.app_context():
+        return {
+            "users": db.session.scalar(select(func.count(User.id))),
+            "accounts": db.session.scalar(select(func.count(Account.id))),
+            "transactions": db.session.scalar(select(func.count(Transaction.id))),
+        }
+
+
+def run(args) -> dict:
+    database = args.database or os.path.join(
+        tempfile.mkdtemp(prefix="cache-money-bench-"), "bench.sqlite"
+    )
+    if not args.reuse and os.path.exists(database):
+        os.remove(database)
+
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.abspath(database)}",
+            "SQLITE_PROFILE": args.profile,
+            "REPOSITORY_CACHE_ENABLED": args.cache,
+            "BCRYPT_LOG_ROUNDS": args.bcrypt_rounds,
+            "ARCHIVE_DIR": f"{os.path.abspath(database)}.archive",
+            "SNAPSHOT_DIR": f"{os.path.abspath(database)}.snapshot",
+        }
+    )
+
+    if args.reuse:
+        info = count_rows(app)
+    else:
+        info = seed_database(
+            app, args.users, args.accounts, args.transactions, seed=args.seed
+        )
+
+    results = run_cases(
+        app,
+        info,
+        args.iterations,
+        args.slow_iterations,
+        only=args.only,
+        seed=args.seed,
+    )
+    with app.app_context():
+        db.engine.dispose()
+
+    return {
+        "meta": {
+            "created": time.time(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "database": database,
+            "profile": args.profile,
+            "cache": args.cache,
+            "iterations": args.iterations,
+            "slow_iterations": args.slow_iterations,
+            "bcrypt_rounds": args.bcrypt_rounds,
+        },
+        "dataset": info,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    try:
+        report = run(args)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(report["results"], baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app import create_app
+from app.benchmarks.seed import SEED_PASSWORD, seed_database, username
+from app.ext.database import DB as db
+from app.repolayer import (
+    AccountRepository,
+    TransactionRepository,
+    UserRepository,
+    AsyncDatabase,
+    AsyncAccountRepository,
+    AsyncTransactionRepository,
+    AsyncUserRepository,
+)
+
+# ? python -m app.benchmarks.async_repositories --requests 5000 --concurrency 64
+# ? Serves the same request mix with the sync repositories on a thread pool and with the async repositories on one event loop.
+# ? A request reads an account and a page of its history, then posts a deposit; every login_every-th request also logs in.
+
+
+def run_sync(
+    app, requests: int, concurrency: int, accounts: int, login_every: int
+) -> float:
+    def handle(index: int):
+        account_id = index % accounts + 1
+        with app.app_context():
+            if login_every and index % login_every == 0:
+                UserRepository.authenticate_user(username(1), SEED_PASSWORD)
+            AccountRepository.get_account_by_id(account_id)
+            TransactionRepository.get_transactions_page(account_id, page_size=20)
+            AccountRepository.update_account_balance(
+                account_id, 1.0, True, "Bench", "credit"
+            )
+            db.session.remove()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(handle, range(requests)))
+    return time.perf_counter() - started
+
+
+async def run_async(
+    database: AsyncDatabase,
+    requests: int,
+    concurrency: int,
+    accounts: int,
+    login_every: int,
+) -> float:
+    user_repo = AsyncUserRepository(database)
+    account_repo = AsyncAccountRepository(database)
+    transaction_repo = AsyncTransactionRepository(database)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def handle(index: int):
+        account_id = index % accounts + 1
+        async with limit:
+            if login_every and index % login_every == 0:
+                await user_repo.authenticate_user(username(1), SEED_PASSWORD)
+            await account_repo.get_account_by_id(account_id)
+            await transaction_repo.get_transactions_page(account_id, page_size=20)
+            await account_repo.update_account_balance(
+                account_id, 1.0, "Bench", "credit"
+            )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handle(index) for index in range(requests)))
+    return time.perf_counter() - started
+
+
+def run(
+    requests: int,
+    concurrency: int,
+    accounts: int = 100,
+    transactions: int = 10_000,
+    login_every: int = 50,
+) -> dict:
+    directory = tempfile.mkdtemp(prefix="cache-money-async-")
+    results = {}
+    for mode in ("sync", "async"):
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, mode)}.sqlite",
+                "SQLITE_PROFILE": "production",
+                "SQLALCHEMY_ENGINE_OPTIONS": {"pool_size": concurrency + 1},
+                "REPOSITORY_CACHE_ENABLED": False,
+                "BCRYPT_LOG_ROUNDS": 4,
+            }
+        )
+        seed_database(app, 1, accounts, transactions)
+
+        if mode == "sync":
+            elapsed = run_sync(app, requests, concurrency, accounts, login_every)
+        else:
+
+            async def serve():
+                # ? aiosqlite defaults to NullPool, which reconnects and re-runs the pragmas on every session
+                database = AsyncDatabase.from_app(
+                    app, poolclass=AsyncAdaptedQueuePool, pool_size=concurrency + 1
+                )
+                try:
+                    return await run_async(
+                        database, requests, concurrency, accounts, login_every
+                    )
+                finally:
+                    await database.dispose()
+
+            elapsed = asyncio.run(serve())
+        with app.app_context():
+            db.engine.dispose()
+
+        results[mode] = {
+            "requests": requests,
+            "concurrency": concurrency,
+            "requests_per_sec": requests / elapsed if elapsed else 0.0,
+        }
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare the sync repositories on threads with the async repositories on an event loop."
+    )
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=10_000)
+    parser.add_argument("--login-every", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    try:
+        results = run(
+            args.requests,
+            args.concurrency,
+            args.accounts,
+            args.transactions,
+            args.login_every,
+        )
+    finally:
+        logging.disable(logging.NOTSET)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import math
+import time
+from typing import Callable
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    # ? Nearest-rank percentile over sorted samples
+    if not samples:
+        return 0.0
+
+    index = max(math.ceil(fraction * len(samples)) - 1, 0)
+    return samples[index]
+
+
+def summarize(samples: list[float], elapsed: float) -> dict:
+    ordered = sorted(samples)
+    return {
+        "iterations": len(samples),
+        "ops_per_sec": len(samples) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+
+def measure(operation: Callable[[], object], iterations: int, warmup: int = 0) -> dict:
+    for _ in range(warmup):
+        operation()
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - call_started)
+
+    return summarize(samples, time.perf_counter() - started)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    # ? Flags cases whose throughput dropped or p95 grew by more than tolerance (e.g. 0.2 for 20%)
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+
+        if current["ops_per_sec"] < previous["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {previous['ops_per_sec']:.1f} -> {current['ops_per_sec']:.1f} ops/sec"
+            )
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']:.3f} -> {current['p95_ms']:.3f} ms"
+            )
+
+    return regressions
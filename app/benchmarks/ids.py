@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import secrets
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from app.repolayer.ids import acquire_id_generator
+
+# ? python -m app.benchmarks.ids --rows 2000000 --chunk-size 10000
+# ? Inserts into a table shaped like transaction, with a unique index on transaction_id, once per id scheme.
+
+
+def random_hex_ids() -> Callable[[], str]:
+    return lambda: secrets.token_hex(8)
+
+
+def snowflake_ids() -> Callable[[], str]:
+    return acquire_id_generator().next_hex
+
+
+SCHEMES = {"random_hex": random_hex_ids, "snowflake": snowflake_ids}
+
+
+def insert_throughput(
+    database: str, next_id: Callable[[], str], rows: int, chunk_size: int
+) -> dict:
+    connection = sqlite3.connect(database)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(
+        "CREATE TABLE bench_transaction ("
+        "id INTEGER PRIMARY KEY, account_id INTEGER NOT NULL, "
+        "transaction_id VARCHAR(80) NOT NULL UNIQUE, amount FLOAT NOT NULL)"
+    )
+
+    chunk_seconds = []
+    started = time.perf_counter()
+    for start in range(0, rows, chunk_size):
+        count = min(chunk_size, rows - start)
+        chunk_started = time.perf_counter()
+        connection.executemany(
+            "INSERT INTO bench_transaction (account_id, transaction_id, amount) VALUES (?, ?, ?)",
+            [(index % 1000, next_id(), 1.0) for index in range(count)],
+        )
+        connection.commit()
+        chunk_seconds.append(time.perf_counter() - chunk_started)
+    elapsed = time.perf_counter() - started
+    connection.close()
+
+    # ? Random keys slow down as the index outgrows the page cache, so the last chunk matters most
+    return {
+        "rows": rows,
+        "rows_per_sec": rows / elapsed if elapsed else 0.0,
+        "first_chunk_rows_per_sec": (
+            min(chunk_size, rows) / chunk_seconds[0] if chunk_seconds else 0.0
+        ),
+        "last_chunk_rows_per_sec": (
+            (rows - chunk_size * (len(chunk_seconds) - 1)) / chunk_seconds[-1]
+            if chunk_seconds
+            else 0.0
+        ),
+        "file_bytes": os.path.getsize(database),
+    }
+
+
+def run(rows: int, chunk_size: int, directory: str | None = None) -> dict:
+    directory = directory or tempfile.mkdtemp(prefix="cache-money-ids-")
+    results = {}
+    for name, scheme in SCHEMES.items():
+        database = os.path.join(directory, f"{name}.sqlite")
+        if os.path.exists(database):
+            os.remove(database)
+        results[name] = insert_throughput(database, scheme(), rows, chunk_size)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare insert throughput of random hex and snowflake transaction ids."
+    )
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--directory", help="Where to create the benchmark databases.")
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run(args.rows, args.chunk_size, args.directory), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
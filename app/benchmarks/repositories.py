@@ -0,0 +1,394 @@
+import inspect
+import itertools
+import random
+from typing import Callable
+
+from sqlalchemy.orm import selectinload
+
+from app.benchmarks.harness import measure
+from app.benchmarks.seed import (
+    SEED_EPOCH,
+    SEED_PASSWORD,
+    SEED_YEAR,
+    TRANSACTION_TYPES,
+    transaction_id,
+    username,
+)
+from app.datalayer import Account, Transaction
+from app.ext.database import DB as db
+from app.ext.metrics import get_registry
+from app.repolayer import (
+    UserRepository,
+    AccountRepository,
+    TransactionRepository,
+    RollupRepository,
+)
+from app.repolayer.repositories import TRANSACTION_STATUSES
+
+REPOSITORIES = (
+    UserRepository,
+    AccountRepository,
+    TransactionRepository,
+    RollupRepository,
+)
+
+
+def build_cases(info: dict, rng: random.Random) -> dict[str, tuple[Callable, bool]]:
+    # ? name -> (operation, slow: runs bcrypt or a batch job). Names are "Repository.method" with an optional "[variant]" suffix.
+    # ? User 1 is reserved for change_username so every other seeded username stays valid.
+    users, accounts, transactions = (
+        info["users"],
+        info["accounts"],
+        info["transactions"],
+    )
+    # ? --reuse passes row counts only, databases seeded with the default epoch
+    epoch = info.get("epoch", SEED_EPOCH)
+    new_users = itertools.count(users + 1)
+    renames = itertools.count()
+    interest_runs = itertools.count()
+
+    def random_user() -> int:
+        return rng.randint(2, users) if users > 1 else 1
+
+    def random_account() -> int:
+        return rng.randint(1, accounts)
+
+    def random_accounts(count: int) -> list[int]:
+        return [random_account() for _ in range(count)]
+
+    def distinct_accounts() -> tuple[int, int]:
+        if accounts < 2:
+            return 1, 1
+        return tuple(rng.sample(range(1, accounts + 1), 2))
+
+    def random_transaction_id() -> str:
+        return transaction_id(rng.randint(1, transactions))
+
+    def add_user():
+        index = next(new_users)
+        UserRepository.add_user(
+            username(index),
+            SEED_PASSWORD,
+            f"{username(index)}@example.com",
+            "Bench",
+            f"User{index}",
+            f"{index:010d}",
+            f"{index} Bench St",
+        )
+
+    def bulk_rows():
+        return [
+            {
+                "account_id": random_account(),
+                "amount": 1.0,
+                "description": "Bench",
+                "transaction_type": "credit",
+            }
+            for _ in range(100)
+        ]
+
+    def make_cursor():
+        TransactionRepository.make_cursor(sample)
+
+    sample = db.session.get(Transaction, 1)
+
+    return {
+        "UserRepository.add_user": (add_user, True),
+        "UserRepository.authenticate_user": (
+            lambda: UserRepository.authenticate_user(
+                username(random_user()), SEED_PASSWORD
+            ),
+            True,
+        ),
+        "UserRepository.get_user_id_by_username": (
+            lambda: UserRepository.get_user_id_by_username(username(random_user())),
+            False,
+        ),
+        "UserRepository.update_basic_user_info": (
+            lambda: UserRepository.update_basic_user_info(
+                username(random_user()), address=f"{rng.randint(1, 999)} Bench Ave"
+            ),
+            False,
+        ),
+        "UserRepository.change_user_password": (
+            lambda: UserRepository.change_user_password(
+                username(random_user()), SEED_PASSWORD
+            ),
+            True,
+        ),
+        "UserRepository.change_username": (
+            lambda: UserRepository.change_username(f"renamed{next(renames)}", id=1),
+            False,
+        ),
+        "UserRepository.get_user_overview": (
+            lambda: UserRepository.get_user_overview(random_user()),
+            False,
+        ),
+        "UserRepository.disable_user": (
+            lambda: UserRepository.disable_user(username(random_user())),
+            False,
+        ),
+        "UserRepository.enable_user": (
+            lambda: UserRepository.enable_user(username(random_user())),
+            False,
+        ),
+        "AccountRepository.create_bank_account": (
+            lambda: AccountRepository.create_bank_account(
+                random_user(), "checking", 0.5
+            ),
+            False,
+        ),
+        "AccountRepository.get_account_by_id": (
+            lambda: AccountRepository.get_account_by_id(random_account()),
+            False,
+        ),
+        "AccountRepository.get_accounts_by_user_id": (
+            lambda: AccountRepository.get_accounts_by_user_id(random_user()),
+            False,
+        ),
+        "AccountRepository.get_accounts_by_user_id[selectinload]": (
+            lambda: AccountRepository.get_accounts_by_user_id(
+                random_user(), options=[selectinload(Account.transactions)]
+            ),
+            False,
+        ),
+        "AccountRepository.get_accounts_by_user_id[view]": (
+            lambda: AccountRepository.get_accounts_by_user_id(
+                random_user(), as_view=True
+            ),
+            False,
+        ),
+        "AccountRepository.update_account_balance": (
+            lambda: AccountRepository.update_account_balance(random_account(), 1.0),
+            False,
+        ),
+        "AccountRepository.update_account_balance[atomic]": (
+            lambda: AccountRepository.update_account_balance(
+                random_account(),
+                1.0,
+                atomic=True,
+                description="Bench",
+                transaction_type="credit",
+            ),
+            False,
+        ),
+        "AccountRepository.get_balance_at": (
+            lambda: AccountRepository.get_balance_at(
+                random_account(), epoch + rng.uniform(0, SEED_YEAR)
+            ),
+            False,
+        ),
+        "AccountRepository.get_balances_at[100]": (
+            lambda: AccountRepository.get_balances_at(
+                epoch + SEED_YEAR - 30 * 86_400, random_accounts(100)
+            ),
+            False,
+        ),
+        "AccountRepository.get_balances_at[all]": (
+            lambda: AccountRepository.get_balances_at(epoch + SEED_YEAR - 30 * 86_400),
+            True,
+        ),
+        "AccountRepository.checkpoint_balances": (
+            AccountRepository.checkpoint_balances,
+            True,
+        ),
+        "AccountRepository.update_account_interest": (
+            lambda: AccountRepository.update_account_interest(random_account(), 1.5),
+            False,
+        ),
+        # ? A full pass over every account per iteration, so it runs the slow iteration count
+        "AccountRepository.accrue_interest": (
+            lambda: AccountRepository.accrue_interest(f"bench-{next(interest_runs)}"),
+            True,
+        ),
+        "AccountRepository.disable_account": (
+            lambda: AccountRepository.disable_account(random_account()),
+            False,
+        ),
+        "AccountRepository.enable_account": (
+            lambda: AccountRepository.enable_account(random_account()),
+            False,
+        ),
+        "AccountRepository.flag_account": (
+            lambda: AccountRepository.flag_account(random_account()),
+            False,
+        ),
+        "AccountRepository.disable_accounts[100]": (
+            lambda: AccountRepository.disable_accounts(random_accounts(100)),
+            False,
+        ),
+        "AccountRepository.enable_accounts[100]": (
+            lambda: AccountRepository.enable_accounts(random_accounts(100)),
+            False,
+        ),
+        "AccountRepository.flag_accounts[100]": (
+            lambda: AccountRepository.flag_accounts(random_accounts(100)),
+            False,
+        ),
+        "AccountRepository.transfer": (
+            lambda: AccountRepository.transfer(
+                *distinct_accounts(), 1.0, "Bench transfer"
+            ),
+            False,
+        ),
+        "AccountRepository.transfer_batch[100]": (
+            lambda: AccountRepository.transfer_batch(
+                [
+                    dict(
+                        zip(("from_account_id", "to_account_id"), distinct_accounts()),
+                        amount=1.0,
+                        description="Bench payroll",
+                    )
+                    for _ in range(100)
+                ]
+            ),
+            False,
+        ),
+        "TransactionRepository.create_transaction": (
+            lambda: TransactionRepository.create_transaction(
+                random_account(), 1.0, "Bench", "credit"
+            ),
+            False,
+        ),
+        "TransactionRepository.create_transactions_bulk[100]": (
+            lambda: TransactionRepository.create_transactions_bulk(bulk_rows()),
+            False,
+        ),
+        "TransactionRepository.get_transaction_by_id": (
+            lambda: TransactionRepository.get_transaction_by_id(
+                random_transaction_id()
+            ),
+            False,
+        ),
+        "TransactionRepository.get_transactions_by_account_id": (
+            lambda: TransactionRepository.get_transactions_by_account_id(
+                random_account()
+            ),
+            False,
+        ),
+        "TransactionRepository.get_transactions_by_account_id[view]": (
+            lambda: TransactionRepository.get_transactions_by_account_id(
+                random_account(), as_view=True
+            ),
+            False,
+        ),
+        "TransactionRepository.get_transactions_page": (
+            lambda: TransactionRepository.get_transactions_page(
+                random_account(), page_size=50
+            ),
+            False,
+        ),
+        "TransactionRepository.stream_transactions_by_account_id": (
+            lambda: sum(
+                1
+                for _ in TransactionRepository.stream_transactions_by_account_id(
+                    random_account()
+                )
+            ),
+            False,
+        ),
+        "TransactionRepository.make_cursor": (make_cursor, False),
+        "TransactionRepository.update_transaction_status": (
+            lambda: TransactionRepository.update_transaction_status(
+                random_transaction_id(), rng.randint(0, 5)
+            ),
+            False,
+        ),
+        "TransactionRepository.update_transaction_statuses[100]": (
+            lambda: TransactionRepository.update_transaction_statuses(
+                [random_transaction_id() for _ in range(100)],
+                rng.choice(TRANSACTION_STATUSES),
+            ),
+            False,
+        ),
+        "TransactionRepository.get_recent_transactions": (
+            lambda: TransactionRepository.get_recent_transactions(random_account()),
+            False,
+        ),
+        "TransactionRepository.get_transaction_by_type": (
+            lambda: TransactionRepository.get_transaction_by_type(
+                random_account(), rng.choice(TRANSACTION_TYPES)
+            ),
+            False,
+        ),
+        "TransactionRepository.aggregate_transactions[month]": (
+            lambda: TransactionRepository.aggregate_transactions(
+                ("month", "transaction_type"), account_id=random_account()
+            ),
+            False,
+        ),
+        "TransactionRepository.get_transaction_type_summary": (
+            lambda: TransactionRepository.get_transaction_type_summary(
+                random_account()
+            ),
+            False,
+        ),
+        "RollupRepository.rebuild_rollups[100]": (
+            lambda: RollupRepository.rebuild_rollups(random_accounts(100)),
+            False,
+        ),
+        "RollupRepository.get_daily_rollups": (
+            lambda: RollupRepository.get_daily_rollups(random_account()),
+            False,
+        ),
+        "RollupRepository.get_statement_summary": (
+            lambda: RollupRepository.get_statement_summary(random_account()),
+            False,
+        ),
+        # ? Exports every seeded row on its first iteration, later iterations are empty incremental refreshes
+        "TransactionRepository.export_snapshot": (
+            TransactionRepository.export_snapshot,
+            True,
+        ),
+        # ? Archives the oldest seeded month on its first iteration, later iterations only look for eligible rows
+        "TransactionRepository.archive_transactions": (
+            lambda: TransactionRepository.archive_transactions(epoch + 30 * 86_400),
+            True,
+        ),
+    }
+
+
+def public_methods() -> set[str]:
+    return {
+        f"{repository.__name__}.{name}"
+        for repository in REPOSITORIES
+        for name, _ in inspect.getmembers(repository, inspect.isfunction)
+        if not name.startswith("_")
+    }
+
+
+def uncovered_methods(case_names) -> set[str]:
+    return public_methods() - {name.split("[")[0] for name in case_names}
+
+
+def run_cases(
+    app,
+    info: dict,
+    iterations: int,
+    slow_iterations: int,
+    only: str | None = None,
+    seed: int = 0,
+) -> dict:
+    results = {}
+    with app.app_context():
+        cases = build_cases(info, random.Random(seed))
+
+    for name, (operation, slow) in cases.items():
+        if only and only not in name:
+            continue
+
+        count = slow_iterations if slow else iterations
+        warmup = min(10, count // 10)
+        with app.app_context():
+            registry = get_registry()
+            registry.reset()
+            results[name] = measure(operation, count, warmup=warmup)
+            statements = sum(
+                value
+                for metric, value in registry.snapshot()["counters"].items()
+                if metric.startswith("sql.statements")
+            )
+            results[name]["statements_per_call"] = statements / (count + warmup)
+            db.session.remove()
+
+    return results
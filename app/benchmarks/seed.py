@@ -0,0 +1,123 @@
+import random
+import time
+
+from sqlalchemy import bindparam, insert, update
+
+from app.datalayer import User, Account, Transaction
+from app.ext.database import DB as db
+from app.ext.passwords import get_password_hasher
+from app.repolayer import RollupRepository
+
+SEED_PASSWORD = "bench_password"
+# ? 2024-01-01T00:00:00Z, seeded history covers the year after it whatever day the benchmark runs
+SEED_EPOCH = 1_704_067_200.0
+SEED_YEAR = 365 * 24 * 3600
+TRANSACTION_TYPES = ("credit", "debit", "fee", "refund")
+
+
+def username(index: int) -> str:
+    return f"user{index}"
+
+
+def transaction_id(index: int) -> str:
+    return f"{index:016x}"
+
+
+def seed_database(
+    app,
+    users: int,
+    accounts: int,
+    transactions: int,
+    chunk_size: int = 50_000,
+    seed: int = 0,
+    epoch: float = SEED_EPOCH,
+) -> dict:
+    # ? Deterministic synthetic data written with core executemany inserts, ids are 1..N in every table
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    with app.app_context():
+        password_hash = get_password_hasher().generate_password_hash(SEED_PASSWORD)
+        for start in range(0, users, chunk_size):
+            db.session.execute(
+                insert(User.__table__),
+                [
+                    {
+                        "username": username(index),
+                        "password_hash": password_hash,
+                        "email": f"{username(index)}@example.com",
+                        "first_name": "Bench",
+                        "last_name": f"User{index}",
+                        "mobile": f"{index:010d}",
+                        "address": f"{index} Bench St",
+                        "disabled": False,
+                    }
+                    for index in range(start + 1, min(start + chunk_size, users) + 1)
+                ],
+            )
+            db.session.commit()
+
+        for start in range(0, accounts, chunk_size):
+            db.session.execute(
+                insert(Account.__table__),
+                [
+                    {
+                        "user_id": (index - 1) % users + 1,
+                        "account_number": f"{index:032x}",
+                        "balance": 0.0,
+                        "account_type": rng.choice(("checking", "savings")),
+                        "created_date": 0,
+                        "status": "active",
+                        "interest_rate": rng.choice((0.5, 1.5, 2.5)),
+                    }
+                    for index in range(start + 1, min(start + chunk_size, accounts) + 1)
+                ],
+            )
+            db.session.commit()
+
+        # ? Spread the history over the year from epoch with running post_tx_balance values per account
+        balances = [0.0] * (accounts + 1)
+        for start in range(0, transactions, chunk_size):
+            rows = []
+            for index in range(start + 1, min(start + chunk_size, transactions) + 1):
+                account_id = rng.randint(1, accounts)
+                amount = round(rng.uniform(-200.0, 500.0), 2)
+                balances[account_id] += amount
+                rows.append(
+                    {
+                        "account_id": account_id,
+                        "transaction_id": transaction_id(index),
+                        "amount": amount,
+                        "timestamp": epoch + SEED_YEAR * index / transactions,
+                        "description": "Seed",
+                        "status": "processed",
+                        "transaction_type": rng.choice(TRANSACTION_TYPES),
+                        "post_tx_balance": balances[account_id],
+                    }
+                )
+            db.session.execute(insert(Transaction.__table__), rows)
+            db.session.commit()
+
+        for start in range(1, accounts + 1, chunk_size):
+            db.session.execute(
+                update(Account.__table__)
+                .where(Account.__table__.c.id == bindparam("b_id"))
+                .values(balance=bindparam("b_balance")),
+                [
+                    {"b_id": index, "b_balance": balances[index]}
+                    for index in range(start, min(start + chunk_size, accounts + 1))
+                ],
+            )
+            db.session.commit()
+
+        # ? Core inserts bypass the repositories, so the rollups are backfilled from the seeded ledger
+        RollupRepository.rebuild_rollups()
+
+    return {
+        "users": users,
+        "accounts": accounts,
+        "transactions": transactions,
+        "seed": seed,
+        "epoch": epoch,
+        "seconds": time.perf_counter() - started,
+    }
@@ -0,0 +1,141 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import select
+
+from app import create_app
+from app.benchmarks.seed import seed_database
+from app.datalayer import Transaction
+from app.ext.database import DB as db
+from app.repolayer import TransactionRepository
+from app.repolayer.snapshot import get_transaction_snapshot
+
+# ? python -m app.benchmarks.snapshot --accounts 100 --transactions 1000000
+# ? Times a full snapshot export and an incremental refresh, then computes per-type totals and an amount
+# ? histogram once in SQL and once with numpy over the memory-mapped snapshot.
+
+
+def scan_sql() -> tuple[dict, list]:
+    totals = {
+        group["transaction_type"]: group["total"]
+        for group in TransactionRepository.aggregate_transactions()
+    }
+    amounts = np.fromiter(
+        db.session.scalars(select(Transaction.amount)),
+        dtype="<f8",
+    )
+    histogram, _ = np.histogram(amounts, bins=20, range=(-200.0, 500.0))
+    return totals, histogram.tolist()
+
+
+def scan_snapshot() -> tuple[dict, list]:
+    snapshot = get_transaction_snapshot()
+    columns = snapshot.columns()
+    sums = np.bincount(columns["transaction_type"], weights=columns["amount"])
+    totals = {
+        value: float(sums[code])
+        for code, value in enumerate(snapshot.dictionary("transaction_type"))
+        if code < len(sums)
+    }
+    histogram, _ = np.histogram(columns["amount"], bins=20, range=(-200.0, 500.0))
+    return totals, histogram.tolist()
+
+
+def best_of(operation, repeat: int) -> tuple[float, object]:
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = operation()
+        seconds.append(time.perf_counter() - started)
+    return min(seconds), result
+
+
+def run(accounts: int, transactions: int, refresh: int = 1000, repeat: int = 3) -> dict:
+    directory = tempfile.mkdtemp(prefix="cache-money-snapshot-")
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'snapshot.sqlite')}",
+            "SNAPSHOT_DIR": os.path.join(directory, "snapshot"),
+            "REPOSITORY_CACHE_ENABLED": False,
+            "BCRYPT_LOG_ROUNDS": 4,
+        }
+    )
+    seed_database(app, 1, accounts, transactions)
+
+    with app.app_context():
+        started = time.perf_counter()
+        exported = TransactionRepository.export_snapshot()
+        export_seconds = time.perf_counter() - started
+
+        TransactionRepository.create_transactions_bulk(
+            [
+                {
+                    "account_id": index % accounts + 1,
+                    "amount": 1.0,
+                    "description": "Refresh",
+                    "transaction_type": "credit",
+                }
+                for index in range(refresh)
+            ]
+        )
+        started = time.perf_counter()
+        refreshed = TransactionRepository.export_snapshot()
+        refresh_seconds = time.perf_counter() - started
+
+        sql_seconds, sql_result = best_of(scan_sql, repeat)
+        snapshot_seconds, snapshot_result = best_of(scan_snapshot, repeat)
+        db.session.remove()
+
+    with app.app_context():
+        db.engine.dispose()
+
+    rows = exported + refreshed
+    return {
+        "export": {
+            "rows": exported,
+            "rows_per_sec": exported / export_seconds if export_seconds else 0.0,
+        },
+        "refresh": {
+            "rows": refreshed,
+            "rows_per_sec": refreshed / refresh_seconds if refresh_seconds else 0.0,
+        },
+        "sql_scan": {
+            "rows": rows,
+            "rows_per_sec": rows / sql_seconds if sql_seconds else 0.0,
+        },
+        "snapshot_scan": {
+            "rows": rows,
+            "rows_per_sec": rows / snapshot_seconds if snapshot_seconds else 0.0,
+            "matches_sql": snapshot_result[1] == sql_result[1],
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare analytics scans in SQL with scans over the memory-mapped snapshot."
+    )
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--refresh", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    try:
+        results = run(args.accounts, args.transactions, args.refresh, args.repeat)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import argparse
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+from app import create_app
+from app.benchmarks.seed import seed_database
+from app.ext.database import DB as db
+from app.repolayer import AccountRepository, TransactionRepository
+
+# ? python -m app.benchmarks.sqlite_profile --accounts 1000 --transactions 50 --seconds 5
+
+
+def run_workload(app, accounts: int, readers: int, seconds: float) -> dict:
+    counts = {"reads": 0, "writes": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def reader():
+        done = 0
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                account_id = random.randint(1, accounts)
+                AccountRepository.get_account_by_id(account_id)
+                TransactionRepository.get_recent_transactions(account_id)
+                done += 1
+        with lock:
+            counts["reads"] += done
+
+    def writer():
+        done = 0
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                TransactionRepository.create_transaction(
+                    random.randint(1, accounts), 1.0, "Bench", "credit"
+                )
+                done += 1
+        with lock:
+            counts["writes"] += done
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "reads_per_sec": counts["reads"] / seconds,
+        "writes_per_sec": counts["writes"] / seconds,
+    }
+
+
+def benchmark_profile(
+    profile: str, accounts: int, transactions: int, readers: int, seconds: float
+) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'bench.sqlite')}",
+                "SQLITE_PROFILE": profile,
+                "REPOSITORY_CACHE_ENABLED": False,
+            }
+        )
+        seed_database(app, 1, accounts, accounts * transactions)
+        result = run_workload(app, accounts, readers, seconds)
+        with app.app_context():
+            db.engine.dispose()
+
+    return {"profile": profile, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare read/write throughput of the SQLite engine profiles."
+    )
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--transactions", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    results = [
+        benchmark_profile(
+            profile, args.accounts, args.transactions, args.readers, args.seconds
+        )
+        for profile in ("default", "production")
+    ]
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
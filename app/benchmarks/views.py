@@ -0,0 +1,100 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app import create_app
+from app.benchmarks.seed import seed_database
+from app.ext.database import DB as db
+from app.repolayer import TransactionRepository
+
+# ? python -m app.benchmarks.views --accounts 10 --transactions 500000
+# ? Loads every account's history as full entities and as TransactionView rows, reporting rows/sec and memory per row.
+
+
+def load_history(accounts: int, as_view: bool) -> list:
+    rows = []
+    for account_id in range(1, accounts + 1):
+        rows.extend(
+            TransactionRepository.get_transactions_by_account_id(
+                account_id, as_view=as_view
+            )
+            or []
+        )
+    return rows
+
+
+def measure_mode(app, accounts: int, as_view: bool, repeat: int) -> dict:
+    seconds = []
+    for _ in range(repeat):
+        with app.app_context():
+            started = time.perf_counter()
+            rows = load_history(accounts, as_view)
+            seconds.append(time.perf_counter() - started)
+            db.session.remove()
+
+    # ? Memory is measured on a separate pass, tracemalloc slows allocation down considerably
+    with app.app_context():
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        rows = load_history(accounts, as_view)
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        db.session.remove()
+
+    best = min(seconds)
+    return {
+        "rows": len(rows),
+        "rows_per_sec": len(rows) / best if best else 0.0,
+        "bytes_per_row": retained / len(rows) if rows else 0.0,
+    }
+
+
+def run(accounts: int, transactions: int, repeat: int = 3) -> dict:
+    database = os.path.join(
+        tempfile.mkdtemp(prefix="cache-money-views-"), "views.sqlite"
+    )
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{database}",
+            "REPOSITORY_CACHE_ENABLED": False,
+            "BCRYPT_LOG_ROUNDS": 4,
+        }
+    )
+    seed_database(app, 1, accounts, transactions)
+
+    results = {
+        "entities": measure_mode(app, accounts, False, repeat),
+        "views": measure_mode(app, accounts, True, repeat),
+    }
+    with app.app_context():
+        db.engine.dispose()
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare full ORM entities with TransactionView projections."
+    )
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--transactions", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    try:
+        results = run(args.accounts, args.transactions, args.repeat)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
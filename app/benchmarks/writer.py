@@ -0,0 +1,137 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app
+from app.benchmarks.seed import seed_database
+from app.ext.database import DB as db
+from app.repolayer import TransactionRepository
+from app.repolayer.writer import GroupCommitWriter
+
+# ? python -m app.benchmarks.writer --transactions 20000 --threads 8 --synchronous FULL
+# ? Inserts the same workload with one commit per row and through the group commit writer. Both modes go through
+# ? create_transactions_bulk, so each row does the same work (validation, insert, rollups, Account balance) and
+# ? only the number of rows per commit differs.
+
+
+def commit_per_row(app, accounts: int, transactions: int, threads: int) -> float:
+    def insert(index: int):
+        with app.app_context():
+            TransactionRepository.create_transactions_bulk(
+                [
+                    {
+                        "account_id": index % accounts + 1,
+                        "amount": 1.0,
+                        "description": "Bench",
+                        "transaction_type": "credit",
+                    }
+                ],
+                chunk_size=1,
+            )
+            db.session.remove()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(insert, range(transactions)))
+    return time.perf_counter() - started
+
+
+def group_commit(
+    app,
+    accounts: int,
+    transactions: int,
+    threads: int,
+    max_batch: int,
+    max_delay: float,
+) -> tuple[float, dict]:
+    writer = GroupCommitWriter(app, max_batch=max_batch, max_delay=max_delay)
+
+    def insert(index: int):
+        return writer.submit(index % accounts + 1, 1.0, "Bench", "credit").result()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(insert, range(transactions)))
+    elapsed = time.perf_counter() - started
+    writer.close()
+    return elapsed, writer.stats()
+
+
+def run(
+    transactions: int,
+    threads: int,
+    accounts: int = 100,
+    max_batch: int = 500,
+    max_delay: float = 0.005,
+    synchronous: str = "NORMAL",
+) -> dict:
+    directory = tempfile.mkdtemp(prefix="cache-money-writer-")
+    results = {}
+    for mode in ("commit_per_row", "group_commit"):
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, mode)}.sqlite",
+                "SQLITE_PRAGMAS": {"synchronous": synchronous},
+                # ? One connection per producer thread so commit_per_row measures commits, not pool waits
+                "SQLALCHEMY_ENGINE_OPTIONS": {"pool_size": threads + 1},
+                "REPOSITORY_CACHE_ENABLED": False,
+                "BCRYPT_LOG_ROUNDS": 4,
+            }
+        )
+        seed_database(app, 1, accounts, 0)
+
+        if mode == "commit_per_row":
+            elapsed = commit_per_row(app, accounts, transactions, threads)
+            stats = {}
+        else:
+            elapsed, stats = group_commit(
+                app, accounts, transactions, threads, max_batch, max_delay
+            )
+        with app.app_context():
+            db.engine.dispose()
+
+        results[mode] = {
+            "transactions": transactions,
+            "transactions_per_sec": transactions / elapsed if elapsed else 0.0,
+            **stats,
+        }
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare commit-per-row inserts with the group commit writer."
+    )
+    parser.add_argument("--transactions", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--max-batch", type=int, default=500)
+    parser.add_argument("--max-delay", type=float, default=0.005)
+    parser.add_argument("--synchronous", default="NORMAL")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    try:
+        results = run(
+            args.transactions,
+            args.threads,
+            args.accounts,
+            args.max_batch,
+            args.max_delay,
+            args.synchronous,
+        )
+    finally:
+        logging.disable(logging.NOTSET)
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
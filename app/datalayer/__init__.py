@@ -1 +1,9 @@
-from .models import User, Account, Transaction
+from .models import (
+    User,
+    Account,
+    Transaction,
+    InterestRun,
+    DailyRollup,
+    BalanceCheckpoint,
+)
+from .views import UserView, AccountView, TransactionView
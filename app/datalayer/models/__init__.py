@@ -1,3 +1,6 @@
 from .user import User
 from .account import Account
 from .transaction import Transaction
+from .interest_run import InterestRun
+from .daily_rollup import DailyRollup
+from .balance_checkpoint import BalanceCheckpoint
@@ -5,11 +5,15 @@ from app.ext.database import DB as db
 
 class Account(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, index=True
+    )
     account_number = db.Column(db.String(80), unique=True, nullable=False)
     balance = db.Column(db.Float, nullable=False)
     account_type = db.Column(db.String(80), nullable=False)
     created_date = db.Column(db.Integer, nullable=False, default=time.time())
-    status = db.Column(db.String(80), nullable=False, default="active")
+    status = db.Column(db.String(80), nullable=False, default="active", index=True)
     interest_rate = db.Column(db.Float, nullable=False)
+    # ? Interest accrued by AccountRepository.accrue_interest but not yet posted, always less than a cent
+    accrued_interest = db.Column(db.Float, nullable=False, default=0.0)
     transactions = db.relationship("Transaction", backref="accounts", lazy=True)
@@ -0,0 +1,18 @@
+import time
+
+from app.ext.database import DB as db
+
+
+class BalanceCheckpoint(db.Model):
+    # ? Account balance as of timestamp, written periodically so point-in-time lookups don't depend on
+    # ? there being a Transaction in the window (or on the history still being there).
+    __table_args__ = (
+        db.Index(
+            "ix_balance_checkpoint_account_id_timestamp", "account_id", "timestamp"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey("account.id"), nullable=False)
+    timestamp = db.Column(db.Integer, nullable=False, default=time.time)
+    balance = db.Column(db.Float, nullable=False)
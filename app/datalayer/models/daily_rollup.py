@@ -0,0 +1,26 @@
+from app.ext.database import DB as db
+
+
+class DailyRollup(db.Model):
+    # ? Per account, UTC day (days since the epoch) and transaction_type aggregates of the ledger,
+    # ? maintained by the repositories on every write. Declined and refunded Transactions are not counted.
+    __table_args__ = (
+        db.UniqueConstraint(
+            "account_id",
+            "day",
+            "transaction_type",
+            name="uq_daily_rollup_account_id_day_type",
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, db.ForeignKey("account.id"), nullable=False)
+    day = db.Column(db.Integer, nullable=False)
+    transaction_type = db.Column(db.String(80), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    credits = db.Column(db.Float, nullable=False, default=0.0)
+    debits = db.Column(db.Float, nullable=False, default=0.0)
+    # ? post_tx_balance and timestamp of the latest counted Transaction (by timestamp, then transaction_id)
+    closing_balance = db.Column(db.Float, nullable=False)
+    closing_timestamp = db.Column(db.Float, nullable=False, default=0.0)
+    last_transaction_id = db.Column(db.String(80), nullable=False)
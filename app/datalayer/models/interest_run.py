@@ -0,0 +1,16 @@
+import time
+
+from app.ext.database import DB as db
+
+
+class InterestRun(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    run_key = db.Column(db.String(80), unique=True, nullable=False)
+    days = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(80), nullable=False, default="running")
+    # ? Checkpoint, every account with a lower or equal id has been accrued by this run
+    last_account_id = db.Column(db.Integer, nullable=False, default=0)
+    accounts_accrued = db.Column(db.Integer, nullable=False, default=0)
+    total_interest = db.Column(db.Float, nullable=False, default=0.0)
+    started = db.Column(db.Integer, nullable=False, default=time.time)
+    finished = db.Column(db.Integer, nullable=True)
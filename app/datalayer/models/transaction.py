@@ -4,11 +4,24 @@ from app.ext.database import DB as db
 
 
 class Transaction(db.Model):
+    __table_args__ = (
+        db.Index("ix_transaction_account_id_timestamp", "account_id", "timestamp"),
+        db.Index(
+            "ix_transaction_account_id_type_timestamp",
+            "account_id",
+            "transaction_type",
+            "timestamp",
+        ),
+        # ? Ids are never handed out again once the highest row was archived and deleted, archive readers and the
+        # ? snapshot's high-water mark rely on it
+        {"sqlite_autoincrement": True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     account_id = db.Column(db.Integer, db.ForeignKey("account.id"), nullable=False)
     transaction_id = db.Column(db.String(80), unique=True, nullable=False)
     amount = db.Column(db.Float, nullable=False)
-    timestamp = db.Column(db.Integer, nullable=False, default=time.time())
+    timestamp = db.Column(db.Integer, nullable=False, default=time.time)
     description = db.Column(db.String(80), nullable=False)
     status = db.Column(db.String(80), nullable=False, default="processing")
     transaction_type = db.Column(db.String(80), nullable=False)
@@ -9,6 +9,6 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     first_name = db.Column(db.String(80), nullable=False)
     last_name = db.Column(db.String(80), nullable=False)
-    mobile = db.Column(db.String(80), nullable=False)
+    mobile = db.Column(db.String(80), unique=True, nullable=False)
     address = db.Column(db.String(128), nullable=False)
     accounts = db.relationship("Account", backref="user", lazy=True)
@@ -0,0 +1,46 @@
+from typing import NamedTuple
+
+# ? Immutable read-only projections, field names match the model columns they are selected from.
+# ? They skip identity map tracking, change detection and relationship proxies entirely.
+
+
+class UserView(NamedTuple):
+    id: int
+    disabled: bool
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    mobile: str
+    address: str
+
+
+class AccountView(NamedTuple):
+    id: int
+    user_id: int
+    account_number: str
+    balance: float
+    account_type: str
+    created_date: int
+    status: str
+    interest_rate: float
+
+
+class TransactionView(NamedTuple):
+    id: int
+    account_id: int
+    transaction_id: str
+    amount: float
+    timestamp: int
+    description: str
+    status: str
+    transaction_type: str
+    post_tx_balance: float
+
+
+def view_columns(view: type[NamedTuple], model) -> list:
+    return [getattr(model, field) for field in view._fields]
+
+
+def to_view(view: type[NamedTuple], instance):
+    return view._make(getattr(instance, field) for field in view._fields)
@@ -1 +1 @@
-from . import database, logger
+from . import database, logger, metrics, passwords
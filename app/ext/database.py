@@ -1,16 +1,62 @@
 from flask_sqlalchemy import (
     SQLAlchemy,
 )  # ? https://flask-sqlalchemy.palletsprojects.com/en/3.0.x/quickstart/
+from sqlalchemy import event
+
+from . import metrics
 
 DB = _db = SQLAlchemy()
 
+# ? https://www.sqlite.org/pragma.html - WAL lets readers run alongside a writer, synchronous=NORMAL only fsyncs at checkpoints
+SQLITE_PROFILES = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def sqlite_pragmas(app) -> dict:
+    return {
+        **SQLITE_PROFILES[app.config.get("SQLITE_PROFILE", "default")],
+        **app.config.get("SQLITE_PRAGMAS", {}),
+    }
+
+
+def apply_pragmas(engine, pragmas: dict):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    event.listen(engine, "connect", on_connect)
+
 
 def register_extension(app):
     DB.init_app(app)
 
-    from ..datalayer import User, Account, Transaction
+    from ..datalayer import (
+        User,
+        Account,
+        Transaction,
+        InterestRun,
+        DailyRollup,
+        BalanceCheckpoint,
+    )
 
     with app.app_context():
+        pragmas = sqlite_pragmas(app)
+        if DB.engine.dialect.name == "sqlite" and pragmas:
+            apply_pragmas(DB.engine, pragmas)
+
+        metrics.instrument_engine(DB.engine, metrics.register_extension(app))
+
         DB.create_all()
 
     app.logger.info("Database extension registered.")
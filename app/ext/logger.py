@@ -1,5 +1,8 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 
 
 # SRC: https://stackoverflow.com/questions/384076/how-can-i-color-python-logging-output
@@ -20,30 +23,86 @@ class CustomFormatter(logging.Formatter):
         logging.CRITICAL: bold_red + format + reset,  # type: ignore
     }
 
+    def __init__(self):
+        super().__init__()
+        # ? Build one formatter per level up front instead of one per record
+        self.formatters = {
+            level: logging.Formatter(log_fmt, "%Y-%m-%d %H:%M:%S")
+            for level, log_fmt in self.FORMATS.items()
+        }
+        self.default_formatter = logging.Formatter(None, "%Y-%m-%d %H:%M:%S")
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt, "%Y-%m-%d %H:%M:%S")
+        formatter = self.formatters.get(record.levelno, self.default_formatter)
         return formatter.format(record)
 
 
+# ? create_app can run many times in one process (tests, benchmarks), so the pipeline is replaced, not stacked
+_queue_handler: logging.handlers.QueueHandler | None = None
+_listener: logging.handlers.QueueListener | None = None
+
+
+def _file_handler(app, path: str) -> logging.Handler:
+    if app.config.get("LOG_ROTATION", "size") == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            path,
+            when=app.config.get("LOG_ROTATE_WHEN", "midnight"),
+            backupCount=app.config.get("LOG_BACKUP_COUNT", 7),
+        )
+
+    return logging.handlers.RotatingFileHandler(
+        path,
+        maxBytes=app.config.get("LOG_MAX_BYTES", 10 * 1024 * 1024),
+        backupCount=app.config.get("LOG_BACKUP_COUNT", 7),
+    )
+
+
+def stop_pipeline():
+    global _queue_handler, _listener
+    if _listener is None:
+        return
+
+    # ? stop() drains whatever is still queued before the handlers are closed
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logging.getLogger().removeHandler(_queue_handler)
+    _queue_handler = _listener = None
+
+
 def register_extension(app):
-    if not os.path.exists("logs"):
-        os.makedirs("logs")
+    global _queue_handler, _listener
+    log_file = app.config.get("LOG_FILE", "logs/app.log")
+    log_dir = os.path.dirname(log_file)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
 
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(app.config.get("LOG_LEVEL", logging.DEBUG))
+
+    stop_pipeline()
 
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(CustomFormatter())
-    logger.addHandler(console_handler)
 
-    file_handler = logging.FileHandler("logs/app.log")
+    file_handler = _file_handler(app, log_file)
     file_handler.setFormatter(
         logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     )
-    logger.addHandler(file_handler)
+
+    # ? Request threads only enqueue records, a single background thread does the formatting and I/O
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _listener.start()
+    logger.addHandler(_queue_handler)
 
     app.logger = logger
     app.logger.info("Logger extension registered.")
 
     return app
+
+
+atexit.register(stop_pipeline)
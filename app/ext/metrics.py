@@ -0,0 +1,289 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, NamedTuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+# ? Seconds, roughly log-spaced from sub-millisecond point reads up to slow batch statements
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+_current_operation: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_operation", default=None
+)
+_captures: contextvars.ContextVar[tuple[list, ...]] = contextvars.ContextVar(
+    "query_captures", default=()
+)
+
+
+class QueryRecord(NamedTuple):
+    operation: str | None
+    statement: str
+    parameters: Any
+    duration: float
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "min": self.min,
+                "max": self.max,
+                "buckets": {
+                    str(bound): count
+                    for bound, count in zip(self.buckets + (float("inf"),), self.counts)
+                },
+            }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._counters: dict[tuple[str, str | None], Counter] = {}
+        self._histograms: dict[tuple[str, str | None], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, label: str | None = None) -> Counter:
+        key = (name, label)
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def histogram(self, name: str, label: str | None = None) -> Histogram:
+        key = (name, label)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {
+            "counters": {
+                _metric_name(name, label): counter.value
+                for (name, label), counter in list(self._counters.items())
+            },
+            "histograms": {
+                _metric_name(name, label): histogram.snapshot()
+                for (name, label), histogram in list(self._histograms.items())
+            },
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _metric_name(name: str, label: str | None) -> str:
+    return name if label is None else f"{name}{{{label}}}"
+
+
+def get_registry() -> MetricsRegistry | None:
+    if not has_app_context():
+        return None
+
+    return current_app.extensions.get("metrics")
+
+
+def instrument_engine(engine, registry: MetricsRegistry):
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_started", []).append((context, time.perf_counter()))
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_started"].pop()[1]
+        operation = _current_operation.get()
+        registry.counter("sql.statements", operation).inc()
+        registry.histogram("sql.duration", operation).observe(duration)
+
+        captures = _captures.get()
+        if captures:
+            record = QueryRecord(
+                operation,
+                statement,
+                parameters[0] if executemany and parameters else parameters,
+                duration,
+            )
+            for capture in captures:
+                capture.append(record)
+
+    def handle_error(exception_context):
+        # ? A statement that raised never reaches after_cursor_execute, drop its start time. Matched by execution
+        # ? context since errors raised before before_cursor_execute, or after after_cursor_execute, land here too.
+        connection = exception_context.connection
+        context = exception_context.execution_context
+        if connection is None or context is None:
+            return
+
+        started = connection.info.get("query_started", [])
+        for index in range(len(started) - 1, -1, -1):
+            if started[index][0] is context:
+                del started[index]
+                break
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+def _observe_call(operation: str, duration: float):
+    registry = get_registry()
+    if registry is not None:
+        registry.counter("repository.calls", operation).inc()
+        registry.histogram("repository.duration", operation).observe(duration)
+
+
+def instrumented(operation: str):
+    # ? Statements executed while the wrapped call runs are attributed to operation
+    def decorator(fn: Callable):
+        if inspect.isgeneratorfunction(fn):
+
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                # ? Times the work done inside the generator across every step, not the time the caller
+                # ? spends between steps. Observed once, when the generator is exhausted or closed.
+                generator = fn(*args, **kwargs)
+                elapsed = 0.0
+                try:
+                    while True:
+                        token = _current_operation.set(operation)
+                        started = time.perf_counter()
+                        try:
+                            value = next(generator)
+                        except StopIteration:
+                            return
+                        finally:
+                            elapsed += time.perf_counter() - started
+                            _current_operation.reset(token)
+                        yield value
+                finally:
+                    generator.close()
+                    _observe_call(operation, elapsed)
+
+            return generator_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def coroutine_wrapper(*args, **kwargs):
+                token = _current_operation.set(operation)
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    _current_operation.reset(token)
+                    _observe_call(operation, time.perf_counter() - started)
+
+            return coroutine_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = _current_operation.set(operation)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _current_operation.reset(token)
+                _observe_call(operation, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_repository(cls):
+    # ? Wraps public static methods and plain (instance) methods, sync, generator or async alike
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+
+        operation = f"{cls.__name__}.{name}"
+        if isinstance(attribute, staticmethod):
+            setattr(
+                cls, name, staticmethod(instrumented(operation)(attribute.__func__))
+            )
+        elif inspect.isfunction(attribute):
+            setattr(cls, name, instrumented(operation)(attribute))
+
+    return cls
+
+
+@contextmanager
+def capture_queries() -> Iterator[list[QueryRecord]]:
+    queries: list[QueryRecord] = []
+    token = _captures.set(_captures.get() + (queries,))
+    try:
+        yield queries
+    finally:
+        _captures.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[list[QueryRecord]]:
+    with capture_queries() as queries:
+        yield queries
+
+    if len(queries) > limit:
+        statements = "\n".join(query.statement for query in queries)
+        raise AssertionError(
+            f"Expected at most {limit} queries, {len(queries)} were issued:\n{statements}"
+        )
+
+
+def register_extension(app):
+    registry = MetricsRegistry()
+    app.extensions["metrics"] = registry
+
+    app.logger.info("Metrics extension registered.")
+
+    return registry
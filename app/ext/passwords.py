@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable
+
+from flask import current_app
+from flask_bcrypt import Bcrypt  # ? https://flask-bcrypt.readthedocs.io/en/latest/
+
+
+class PasswordHasherBusy(RuntimeError):
+    pass
+
+
+class PasswordHasherTimeout(PasswordHasherBusy):
+    pass
+
+
+class PasswordHasher:
+    # ? bcrypt releases the GIL while hashing, so a thread pool scales with cores without process overhead
+    def __init__(
+        self,
+        rounds: int = 12,
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+        timeout: float | None = 5.0,
+    ):
+        self.rounds = rounds
+        self.timeout = timeout
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 8
+
+        self._bcrypt = Bcrypt()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="password-hasher"
+        )
+        # ? Counts queued and running calls, callers beyond max_pending are turned away instead of piling up
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def generate_password_hash(self, password: str, timeout: float | None = None):
+        return self._result(self.submit_generate_password_hash(password), timeout)
+
+    def check_password_hash(
+        self, pw_hash: str, password: str, timeout: float | None = None
+    ) -> bool:
+        return self._result(self.submit_check_password_hash(pw_hash, password), timeout)
+
+    def submit_generate_password_hash(self, password: str) -> Future:
+        # ? Future based variants, asyncio callers await them with asyncio.wrap_future
+        return self.submit(self._generate_password_hash, password)
+
+    def submit_check_password_hash(self, pw_hash: str, password: str) -> Future:
+        return self.submit(self._bcrypt.check_password_hash, pw_hash, password)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy(
+                f"Password hasher is busy with {self.max_pending} pending calls!"
+            )
+
+        with self._lock:
+            self.queued += 1
+
+        future = self._executor.submit(self._run, fn, time.perf_counter(), *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "avg_wait": self.total_wait / self.completed if self.completed else 0.0,
+                "avg_latency": (
+                    self.total_latency / self.completed if self.completed else 0.0
+                ),
+                "max_latency": self.max_latency,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _generate_password_hash(self, password: str) -> str:
+        return self._bcrypt.generate_password_hash(password, self.rounds).decode(
+            "utf-8"
+        )
+
+    def _run(self, fn: Callable[..., Any], submitted: float, *args: Any):
+        started = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.total_wait += started - submitted
+                self.total_latency += finished - submitted
+                self.max_latency = max(self.max_latency, finished - submitted)
+
+    def _release(self, future: Future):
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+        self._slots.release()
+
+    def _result(self, future: Future, timeout: float | None):
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise PasswordHasherTimeout(
+                f"Password hasher did not answer within {timeout} seconds!"
+            )
+
+
+def get_password_hasher() -> PasswordHasher:
+    return current_app.extensions["password_hasher"]
+
+
+def register_extension(app):
+    hasher = PasswordHasher(
+        rounds=app.config.get("BCRYPT_LOG_ROUNDS", 12),
+        max_workers=app.config.get("PASSWORD_HASH_WORKERS"),
+        max_pending=app.config.get("PASSWORD_HASH_MAX_PENDING"),
+        timeout=app.config.get("PASSWORD_HASH_TIMEOUT", 5.0),
+    )
+    app.extensions["password_hasher"] = hasher
+
+    app.logger.info(
+        "Password hasher extension registered with %s workers.", hasher.max_workers
+    )
+
+    return hasher
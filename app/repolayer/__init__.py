@@ -1 +1,13 @@
-from .repositories import UserRepository, TransactionRepository, AccountRepository
+from .repositories import (
+    UserRepository,
+    TransactionRepository,
+    AccountRepository,
+    RollupRepository,
+)
+from .cache import LRUCache, NullCache
+from .async_repositories import (
+    AsyncDatabase,
+    AsyncUserRepository,
+    AsyncAccountRepository,
+    AsyncTransactionRepository,
+)
@@ -0,0 +1,451 @@
+import datetime
+import itertools
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Mapping
+
+import click
+import numpy as np
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # ? Windows
+    fcntl = None
+
+# ? Segment file layout: MAGIC, little endian uint32 header length, JSON header, then one zlib blob per column.
+# ? Numeric columns are raw little endian arrays, low cardinality strings are dictionary encoded codes and the
+# ? rest are JSON lists. Rows are sorted by (account_id, timestamp, id) so an account is one contiguous slice.
+SEGMENT_MAGIC = b"CMSEG1\n"
+SEGMENT_COLUMNS = (
+    "id",
+    "account_id",
+    "transaction_id",
+    "amount",
+    "timestamp",
+    "description",
+    "status",
+    "transaction_type",
+    "post_tx_balance",
+)
+_NUMERIC_COLUMNS = {
+    "id": "<i8",
+    "account_id": "<i8",
+    "amount": "<f8",
+    "timestamp": "<f8",
+    "post_tx_balance": "<f8",
+}
+_DICTIONARY_MAX_VALUES = 65_535
+
+# ? Settled statuses, Transactions in them are never written again once past the retention window
+ARCHIVED_STATUSES = ("processed", "refunded")
+
+
+class ArchiveCorrupted(RuntimeError):
+    pass
+
+
+def month_bounds(timestamp: float) -> tuple[str, float, float]:
+    # ? ("YYYY-MM", first second of the month, first second of the next month), UTC
+    moment = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+    start = moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    return start.strftime("%Y-%m"), start.timestamp(), end.timestamp()
+
+
+def encode_segment(rows: Iterable[Mapping[str, Any]]) -> bytes:
+    rows = list(rows)
+    columns = []
+    blobs = []
+    for name in SEGMENT_COLUMNS:
+        values = [row[name] for row in rows]
+        column: dict[str, Any] = {"name": name}
+        if name in _NUMERIC_COLUMNS:
+            column["encoding"] = "numpy"
+            column["dtype"] = _NUMERIC_COLUMNS[name]
+            raw = np.asarray(values, dtype=_NUMERIC_COLUMNS[name]).tobytes()
+        else:
+            unique = list(dict.fromkeys(values))
+            if len(unique) <= _DICTIONARY_MAX_VALUES and len(unique) * 2 <= len(rows):
+                codes = {value: code for code, value in enumerate(unique)}
+                column["encoding"] = "dictionary"
+                column["values"] = unique
+                raw = np.asarray([codes[value] for value in values], "<u2").tobytes()
+            else:
+                column["encoding"] = "json"
+                raw = json.dumps(values).encode()
+
+        blob = zlib.compress(raw, 6)
+        column["length"] = len(blob)
+        column["crc32"] = zlib.crc32(blob)
+        columns.append(column)
+        blobs.append(blob)
+
+    header = json.dumps({"version": 1, "rows": len(rows), "columns": columns}).encode()
+    return SEGMENT_MAGIC + struct.pack("<I", len(header)) + header + b"".join(blobs)
+
+
+def decode_segment(data: bytes) -> dict[str, Any]:
+    if not data.startswith(SEGMENT_MAGIC):
+        raise ArchiveCorrupted("Not a transaction segment!")
+
+    offset = len(SEGMENT_MAGIC)
+    (header_length,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    header = json.loads(data[offset : offset + header_length])
+    offset += header_length
+
+    columns: dict[str, Any] = {}
+    for column in header["columns"]:
+        blob = data[offset : offset + column["length"]]
+        offset += column["length"]
+        if zlib.crc32(blob) != column["crc32"]:
+            raise ArchiveCorrupted(f"Column {column['name']} failed its checksum!")
+
+        raw = zlib.decompress(blob)
+        if column["encoding"] == "numpy":
+            columns[column["name"]] = np.frombuffer(raw, dtype=column["dtype"])
+        elif column["encoding"] == "dictionary":
+            codes = np.frombuffer(raw, dtype="<u2")
+            columns[column["name"]] = [column["values"][code] for code in codes]
+        else:
+            columns[column["name"]] = json.loads(raw)
+
+    return columns
+
+
+class TransactionArchive:
+    # ? Immutable segment files, one per account range and month, listed in manifest.json. The manifest is
+    # ? replaced atomically and re-read whenever it changes on disk, so every process sees new segments.
+    def __init__(
+        self, directory: str, account_range: int = 1000, cache_segments: int = 16
+    ):
+        self.directory = directory
+        self.account_range = account_range
+        self.cache_segments = cache_segments
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.lock_path = os.path.join(directory, "manifest.lock")
+
+        self._lock = threading.Lock()
+        self._stamp: tuple[int, int] | None = None
+        self._segments: list[dict[str, Any]] = []
+        self._cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def segments(self) -> list[dict[str, Any]]:
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return []
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                with open(self.manifest_path, encoding="utf-8") as manifest:
+                    self._segments = json.load(manifest)["segments"]
+                self._stamp = stamp
+            return self._segments
+
+    def account_bounds(self, account_id: int) -> tuple[int, int]:
+        start = (account_id - 1) // self.account_range * self.account_range + 1
+        return start, start + self.account_range - 1
+
+    def write_segment(
+        self, month: str, account_min: int, account_max: int, rows: list[Mapping]
+    ) -> dict[str, Any]:
+        # ? Written and fsynced under a fresh name, the segment only becomes visible once published
+        rows = sorted(
+            rows, key=lambda row: (row["account_id"], row["timestamp"], row["id"])
+        )
+        data = encode_segment(rows)
+        os.makedirs(os.path.join(self.directory, month), exist_ok=True)
+
+        sequence = sum(
+            1
+            for entry in self.segments()
+            if entry["month"] == month and entry["account_min"] == account_min
+        )
+        while True:
+            name = os.path.join(
+                month, f"accounts-{account_min:010d}-{account_max:010d}-{sequence}.seg"
+            )
+            try:
+                with open(os.path.join(self.directory, name), "xb") as segment:
+                    segment.write(data)
+                    segment.flush()
+                    os.fsync(segment.fileno())
+                break
+            except FileExistsError:
+                sequence += 1
+
+        transaction_ids = [row["transaction_id"] for row in rows]
+        return {
+            "file": name,
+            "month": month,
+            "account_min": account_min,
+            "account_max": account_max,
+            "transaction_id_min": min(transaction_ids),
+            "transaction_id_max": max(transaction_ids),
+            "timestamp_min": min(row["timestamp"] for row in rows),
+            "timestamp_max": max(row["timestamp"] for row in rows),
+            "rows": len(rows),
+            "bytes": len(data),
+            "created": time.time(),
+        }
+
+    @contextmanager
+    def _manifest_lock(self) -> Iterator[None]:
+        # ? Exclusive across threads and processes, flock locks belong to the open file, not the process
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def publish(self, entries: Iterable[dict[str, Any]]):
+        # ? Read, extend and replace under the manifest lock so concurrent publishers never drop each other's
+        # ? segments. The manifest is read from disk, the cached copy may be older than the last publish.
+        entries = list(entries)
+        with self._manifest_lock():
+            try:
+                with open(self.manifest_path, encoding="utf-8") as manifest:
+                    segments = json.load(manifest)["segments"]
+            except FileNotFoundError:
+                segments = []
+
+            temporary = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as manifest:
+                json.dump({"version": 1, "segments": segments + entries}, manifest)
+                manifest.flush()
+                os.fsync(manifest.fileno())
+            os.replace(temporary, self.manifest_path)
+
+    def read_segment(self, entry: Mapping[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            columns = self._cache.get(entry["file"])
+            if columns is not None:
+                self._cache.move_to_end(entry["file"])
+                return columns
+
+        with open(os.path.join(self.directory, entry["file"]), "rb") as segment:
+            columns = decode_segment(segment.read())
+
+        with self._lock:
+            self._cache[entry["file"]] = columns
+            while len(self._cache) > self.cache_segments:
+                self._cache.popitem(last=False)
+        return columns
+
+    def rows(
+        self,
+        account_id: int | None = None,
+        transaction_id: str | None = None,
+        transaction_type: str | None = None,
+        after: tuple[float, int] | None = None,
+        before: tuple[float, int] | None = None,
+        descending: bool = False,
+        limit: int | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        # ? Archived rows as column dicts in (timestamp, id) order, newest first when descending, filtered by account,
+        # ? transaction_id and / or type, and strictly between the after and before (timestamp, id) keys. Lazy:
+        # ? segments are read one month at a time and reading stops once limit rows were yielded.
+        return itertools.islice(
+            self._ordered_rows(
+                account_id, transaction_id, transaction_type, after, before, descending
+            ),
+            limit,
+        )
+
+    def _ordered_rows(
+        self,
+        account_id: int | None,
+        transaction_id: str | None,
+        transaction_type: str | None,
+        after: tuple[float, int] | None,
+        before: tuple[float, int] | None,
+        descending: bool,
+    ) -> Iterator[dict[str, Any]]:
+        months: dict[str, list[dict[str, Any]]] = {}
+        for entry in self.segments():
+            if account_id is not None and not (
+                entry["account_min"] <= account_id <= entry["account_max"]
+            ):
+                continue
+            if transaction_id is not None and not (
+                entry["transaction_id_min"]
+                <= transaction_id
+                <= entry["transaction_id_max"]
+            ):
+                continue
+            if after is not None and entry["timestamp_max"] < after[0]:
+                continue
+            if before is not None and entry["timestamp_min"] > before[0]:
+                continue
+            months.setdefault(entry["month"], []).append(entry)
+
+        # ? Months never overlap in time, only the segments of one month have to be merged
+        for month in sorted(months, reverse=descending):
+            rows: dict[str, dict[str, Any]] = {}
+            for entry in months[month]:
+                for row in self._segment_rows(
+                    entry, account_id, transaction_id, transaction_type, after, before
+                ):
+                    # ? An interrupted archival run can leave the same row in two segments
+                    rows[row["transaction_id"]] = row
+            yield from sorted(
+                rows.values(),
+                key=lambda row: (row["timestamp"], row["id"]),
+                reverse=descending,
+            )
+
+    def select_columns(
+        self,
+        account_id: int | None = None,
+        start: float | None = None,
+        end: float | None = None,
+    ) -> Iterator[dict[str, np.ndarray]]:
+        # ? One dict of numpy arrays per segment, the rows of the account with start <= timestamp < end, for column
+        # ? wise analytics. Rows an interrupted archival run left in two segments show up in both.
+        for entry in self.segments():
+            if account_id is not None and not (
+                entry["account_min"] <= account_id <= entry["account_max"]
+            ):
+                continue
+            if start is not None and entry["timestamp_max"] < start:
+                continue
+            if end is not None and entry["timestamp_min"] >= end:
+                continue
+
+            columns = self.read_segment(entry)
+            if account_id is not None:
+                accounts = columns["account_id"]
+                first = int(np.searchsorted(accounts, account_id, side="left"))
+                last = int(np.searchsorted(accounts, account_id, side="right"))
+            else:
+                first, last = 0, len(columns["id"])
+
+            timestamps = columns["timestamp"][first:last]
+            mask = np.ones(len(timestamps), dtype=bool)
+            if start is not None:
+                mask &= timestamps >= start
+            if end is not None:
+                mask &= timestamps < end
+            if not mask.any():
+                continue
+
+            yield {
+                name: np.asarray(columns[name][first:last])[mask]
+                for name in SEGMENT_COLUMNS
+            }
+
+    def _segment_rows(
+        self,
+        entry: Mapping[str, Any],
+        account_id: int | None,
+        transaction_id: str | None,
+        transaction_type: str | None,
+        after: tuple[float, int] | None,
+        before: tuple[float, int] | None,
+    ) -> list[dict[str, Any]]:
+        columns = self.read_segment(entry)
+        if transaction_id is not None:
+            try:
+                first = columns["transaction_id"].index(transaction_id)
+            except ValueError:
+                return []
+            last = first + 1
+        elif account_id is not None:
+            # ? An account is one slice sorted by (timestamp, id), the keys narrow it with two more binary searches
+            accounts = columns["account_id"]
+            first = int(np.searchsorted(accounts, account_id, side="left"))
+            last = int(np.searchsorted(accounts, account_id, side="right"))
+            if after is not None:
+                first = _seek(columns, first, last, after, "right")
+            if before is not None:
+                last = _seek(columns, first, last, before, "left")
+        else:
+            first, last = 0, len(columns["id"])
+
+        sliced = {
+            name: (
+                columns[name][first:last].tolist()
+                if name in _NUMERIC_COLUMNS
+                else columns[name][first:last]
+            )
+            for name in SEGMENT_COLUMNS
+        }
+        rows = []
+        for offset in range(max(last - first, 0)):
+            if account_id is not None and sliced["account_id"][offset] != account_id:
+                continue
+            if (
+                transaction_type is not None
+                and sliced["transaction_type"][offset] != transaction_type
+            ):
+                continue
+            key = (sliced["timestamp"][offset], sliced["id"][offset])
+            if (after is not None and key <= after) or (
+                before is not None and key >= before
+            ):
+                continue
+            rows.append({name: sliced[name][offset] for name in SEGMENT_COLUMNS})
+
+        return rows
+
+
+def _seek(
+    columns: Mapping[str, Any], first: int, last: int, key: tuple[float, int], side: str
+) -> int:
+    # ? Position in columns[first:last], sorted by (timestamp, id), before ("left") or after ("right") key
+    timestamps = columns["timestamp"][first:last]
+    low = first + int(np.searchsorted(timestamps, key[0], side="left"))
+    high = first + int(np.searchsorted(timestamps, key[0], side="right"))
+    return low + int(np.searchsorted(columns["id"][low:high], key[1], side=side))
+
+
+def get_transaction_archive() -> TransactionArchive | None:
+    return current_app.extensions.get("transaction_archive")
+
+
+def register_extension(app):
+    archive = TransactionArchive(
+        app.config.get("ARCHIVE_DIR") or os.path.join(app.instance_path, "archive"),
+        account_range=app.config.get("ARCHIVE_ACCOUNT_RANGE", 1000),
+        cache_segments=app.config.get("ARCHIVE_CACHE_SEGMENTS", 16),
+    )
+    app.extensions["transaction_archive"] = archive
+
+    # ? flask --app "app:create_app()" archive-transactions [--before EPOCH_SECONDS]
+    @app.cli.command("archive-transactions")
+    @click.option(
+        "--before",
+        type=float,
+        default=None,
+        help="Archive settled Transactions older than this, ARCHIVE_RETENTION_DAYS ago by default.",
+    )
+    def archive_transactions_command(before: float | None):
+        from app.repolayer.repositories import TransactionRepository
+
+        archived = TransactionRepository.archive_transactions(before)
+        if archived is False:
+            raise click.ClickException(
+                "Transaction archival failed, see the log for details."
+            )
+        click.echo(
+            f"Archived {archived['rows']} transactions into {archived['segments']} segments."
+        )
+
+    app.logger.info(
+        "Transaction archive extension registered at %s.", archive.directory
+    )
+
+    return archive
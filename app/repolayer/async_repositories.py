@@ -0,0 +1,905 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+from flask import has_app_context
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.datalayer import User, Account, Transaction
+from app.ext.database import DB as db, apply_pragmas, sqlite_pragmas
+from app.ext.metrics import MetricsRegistry, instrument_engine, instrument_repository
+from app.ext.passwords import PasswordHasher, PasswordHasherTimeout
+from app.repolayer.archive import TransactionArchive, get_transaction_archive
+from app.repolayer.cache import NullCache, detach
+from app.repolayer.ids import (
+    SnowflakeGenerator,
+    acquire_id_generator,
+    get_id_generator,
+)
+from app.repolayer.rollups import (
+    closing_transaction_id,
+    is_counted,
+    latest_counted,
+    reclose,
+    rollup_deltas,
+    rollup_key,
+    rollup_upsert,
+)
+from app.repolayer.repositories import (
+    _ID_INSERT_ATTEMPTS,
+    TransactionRepository,
+    _merge_archived,
+    _transaction_status,
+    _unique_violation,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _upsert_rollups(session, transactions, sign: int = 1):
+    transactions = list(transactions)
+    deltas = rollup_deltas(transactions, sign)
+    if deltas:
+        await session.execute(rollup_upsert(session.bind.dialect.name), deltas)
+    if sign > 0:
+        return
+
+    # ? See the sync _reclose_rollups
+    removed_ids = {row["transaction_id"] for row in transactions}
+    for key in {rollup_key(row) for row in transactions}:
+        if await session.scalar(closing_transaction_id(key)) not in removed_ids:
+            continue
+
+        closing = (
+            (await session.execute(latest_counted(key, removed_ids))).mappings().first()
+        )
+        if closing is not None:
+            await session.execute(reclose(key, closing))
+
+
+async def _with_fresh_ids(session, write, columns):
+    # ? The async _with_fresh_ids of app.repolayer.repositories, write draws its generated ids itself
+    columns = tuple(columns)
+    for attempt in range(1, _ID_INSERT_ATTEMPTS + 1):
+        try:
+            return await write()
+        except IntegrityError as e:
+            column = _unique_violation(e, columns)
+            if column is None or attempt == _ID_INSERT_ATTEMPTS:
+                raise
+            await session.rollback()
+            logger.warning(
+                "Generated %s collided on attempt %s, retrying with a fresh one: %s",
+                column,
+                attempt,
+                e,
+            )
+
+
+class AsyncDatabase:
+    # ? Everything the async repositories need without a Flask app context: an AsyncEngine on the shared models,
+    # ? the bcrypt pool, an id generator and optionally the repository cache, metrics and transaction archive of a
+    # ? Flask app.
+    def __init__(
+        self,
+        url: str,
+        pragmas: dict | None = None,
+        hasher: PasswordHasher | None = None,
+        id_generator: SnowflakeGenerator | None = None,
+        cache=None,
+        metrics: MetricsRegistry | None = None,
+        archive: TransactionArchive | None = None,
+        **engine_options: Any,
+    ):
+        self.engine = create_async_engine(url, **engine_options)
+        if pragmas and self.engine.dialect.name == "sqlite":
+            apply_pragmas(self.engine.sync_engine, pragmas)
+        self.metrics = metrics
+        if metrics is not None:
+            instrument_engine(self.engine.sync_engine, metrics)
+
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.hasher = hasher if hasher is not None else PasswordHasher()
+        self._owns_hasher = hasher is None
+        # ? Explicit None checks: an empty LRUCache is falsy, and a second generator would repeat the app's ids
+        if id_generator is None:
+            id_generator = (
+                get_id_generator() if has_app_context() else acquire_id_generator()
+            )
+        self.ids = id_generator
+        self.cache = cache if cache is not None else NullCache()
+        if archive is None and has_app_context():
+            archive = get_transaction_archive()
+        self.archive = archive
+
+    @classmethod
+    def from_app(cls, app, **engine_options: Any) -> "AsyncDatabase":
+        # ? Same file, pragmas, bcrypt pool, id generator, cache, metrics and archive as the Flask app
+        with app.app_context():
+            url = db.engine.url.render_as_string(hide_password=False)
+
+        return cls(
+            async_database_url(url),
+            pragmas=sqlite_pragmas(app),
+            hasher=app.extensions["password_hasher"],
+            id_generator=app.extensions["id_generator"],
+            cache=app.extensions.get("repository_cache"),
+            metrics=app.extensions.get("metrics"),
+            archive=app.extensions.get("transaction_archive"),
+            **engine_options,
+        )
+
+    def session(self):
+        return self.sessionmaker()
+
+    async def archived_transactions(self, **filters) -> list[Transaction]:
+        # ? Archived rows (see TransactionArchive.rows) as transient Transactions. Segments are read on a worker
+        # ? thread so the event loop never waits on the archive files.
+        if self.archive is None:
+            return []
+
+        return await asyncio.to_thread(
+            lambda: [Transaction(**row) for row in self.archive.rows(**filters)]
+        )
+
+    async def create_all(self):
+        async with self.engine.begin() as connection:
+            await connection.run_sync(db.metadata.create_all)
+
+    async def dispose(self):
+        await self.engine.dispose()
+        if self._owns_hasher:
+            self.hasher.shutdown()
+
+    async def generate_password_hash(self, password: str) -> str:
+        return await self._await_hasher(
+            self.hasher.submit_generate_password_hash(password)
+        )
+
+    async def check_password_hash(self, pw_hash: str, password: str) -> bool:
+        return await self._await_hasher(
+            self.hasher.submit_check_password_hash(pw_hash, password)
+        )
+
+    async def _await_hasher(self, future):
+        # ? bcrypt runs on the hasher's thread pool, the event loop only waits on the future
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), self.hasher.timeout
+            )
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise PasswordHasherTimeout(
+                f"Password hasher did not answer within {self.hasher.timeout} seconds!"
+            )
+
+
+def async_database_url(url: str) -> str:
+    # ? sqlite:///file.sqlite -> sqlite+aiosqlite:///file.sqlite
+    parsed = make_url(url)
+    if parsed.drivername in ("sqlite", "sqlite+pysqlite"):
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+@instrument_repository
+class AsyncUserRepository:
+    def __init__(self, database: AsyncDatabase):
+        self.database = database
+
+    async def add_user(
+        self,
+        username: str,
+        password: str,
+        email: str,
+        first_name: str,
+        last_name: str,
+        mobile: str,
+        address: str,
+    ) -> bool:
+        unique_args = {"username": username, "email": email, "mobile": mobile}
+        password_hash = await self.database.generate_password_hash(password)
+
+        async with self.database.session() as session:
+            # ? Known issue with db.Model and pylint - https://github.com/pallets-eco/flask-sqlalchemy/issues/1312#issue-2127942077
+            new_user = User(username=username, password_hash=password_hash, email=email, first_name=first_name, last_name=last_name, mobile=mobile, address=address)  # type: ignore
+            try:
+                session.add(new_user)
+                await session.commit()
+                logger.info(
+                    "User %s created successfully with ID: %s!", username, new_user.id
+                )
+            except IntegrityError as e:
+                await session.rollback()
+                key = _unique_violation(e, unique_args)
+                if key is None:
+                    logger.error("Error creating User: %s with error: %s", username, e)
+                else:
+                    logger.error(
+                        "User attempted to be created with %s: %s, however User already exists!",
+                        key,
+                        unique_args[key],
+                    )
+                return False
+            except SQLAlchemyError as e:
+                logger.error("Error creating User: %s with error: %s", username, e)
+                await session.rollback()
+                return False
+
+        return True
+
+    async def authenticate_user(self, username: str, password: str):
+        async with self.database.session() as session:
+            pw_hash = await session.scalar(
+                select(User.password_hash).filter_by(username=username)
+            )
+        if not pw_hash:
+            logger.info(
+                "User: %s attempted to authenticate, but does not exist!", username
+            )
+            return False
+
+        if not await self.database.check_password_hash(pw_hash, password):
+            logger.info(
+                "User: %s attempted to authenticate, but password was incorrect!",
+                username,
+            )
+            return False
+
+        logger.info("User: %s authenticated successfully!", username)
+        return True
+
+    async def get_user_id_by_username(self, username: str):
+        cache = self.database.cache
+        user_id = cache.get(("user_id_by_username", username))
+        if user_id is not None:
+            return user_id
+
+        async with self.database.session() as session:
+            user_id = await session.scalar(select(User.id).filter_by(username=username))
+        if user_id is None:
+            logger.error(
+                "User: %s was attempted to be retrieved but does not exist!", username
+            )
+            return None
+
+        cache.set(("user_id_by_username", username), user_id)
+        return user_id
+
+    async def update_basic_user_info(
+        self, username: str, address=None, email=None, mobile=None
+    ):
+        update_args = {
+            key: value
+            for key, value in {
+                "address": address,
+                "email": email,
+                "mobile": mobile,
+            }.items()
+            if value
+        }
+        if not update_args:
+            return False
+
+        async with self.database.session() as session:
+            try:
+                result = await session.execute(
+                    update(User).filter_by(username=username).values(**update_args)
+                )
+                if not result.rowcount:
+                    await session.rollback()
+                    logger.error(
+                        "User: %s was attempted to be updated but does not exist!",
+                        username,
+                    )
+                    return False
+                await session.commit()
+            except SQLAlchemyError as e:
+                logger.error("Error updating User: %s with error: %s", username, e)
+                await session.rollback()
+                return False
+
+        logger.info("User: %s updated successfully!", username)
+
+        return True
+
+    async def change_user_password(self, username: str, new_password: str):
+        password_hash = await self.database.generate_password_hash(new_password)
+        async with self.database.session() as session:
+            try:
+                result = await session.execute(
+                    update(User)
+                    .filter_by(username=username)
+                    .values(password_hash=password_hash)
+                )
+                if not result.rowcount:
+                    await session.rollback()
+                    logger.error(
+                        "User: %s was attempted to be updated but does not exist!",
+                        username,
+                    )
+                    return False
+                await session.commit()
+            except SQLAlchemyError as e:
+                logger.error("Error updating User: %s with error: %s", username, e)
+                await session.rollback()
+                return False
+
+        logger.info("User: %s updated successfully!", username)
+
+        return True
+
+    async def change_username(
+        self,
+        new_username: str,
+        old_username: str | None = None,
+        id: int | None = None,
+    ):
+        if old_username is None and id is None:
+            logger.error(
+                "Username Change Failed: User %s attempted to change username to %s but no ID or Username was provided!",
+                id,
+                new_username,
+            )
+            return False
+
+        async with self.database.session() as session:
+            if old_username is None:
+                user = await session.get(User, id)
+            else:
+                user = await session.scalar(
+                    select(User).filter_by(username=old_username)
+                )
+
+            if not user:
+                logger.error("Username Change Failed: User %s does not exist!", id)
+                return False
+
+            if user.username == new_username:
+                logger.error(
+                    "Username Change Failed: User %s attempted to change username to %s but it already exists!",
+                    id,
+                    new_username,
+                )
+                return False
+
+            previous_username = user.username
+            user.username = new_username
+            try:
+                await session.commit()
+                logger.info("User: %s updated successfully!", id)
+            except IntegrityError:
+                logger.error(
+                    "Username Change Failed: User %s attempted to change username to %s but it already exists!",
+                    id,
+                    new_username,
+                )
+                await session.rollback()
+                return False
+            except SQLAlchemyError as e:
+                logger.error("Error updating User: %s with error: %s", id, e)
+                await session.rollback()
+                return False
+
+        self.database.cache.invalidate(("user_id_by_username", previous_username))
+
+        return True
+
+    async def disable_user(self, username: str | None = None, id: int | None = None):
+        return await self._set_disabled(True, username, id)
+
+    async def enable_user(self, username: str | None = None, id: int | None = None):
+        return await self._set_disabled(False, username, id)
+
+    async def _set_disabled(self, disabled: bool, username: str | None, id: int | None):
+        action = "disabled" if disabled else "enabled"
+        if username is None and id is None:
+            logger.error(
+                "User: %s was attempted to be %s but no ID or Username was provided!",
+                id,
+                action,
+            )
+            return False
+
+        criteria = {"username": username} if username else {"id": id}
+        async with self.database.session() as session:
+            try:
+                result = await session.execute(
+                    update(User).filter_by(**criteria).values(disabled=disabled)
+                )
+                if not result.rowcount:
+                    await session.rollback()
+                    logger.error(
+                        "User: %s was attempted to be %s but does not exist!",
+                        username or id,
+                        action,
+                    )
+                    return False
+                await session.commit()
+            except SQLAlchemyError as e:
+                logger.error(
+                    "Error setting User: %s %s with error: %s",
+                    username or id,
+                    action,
+                    e,
+                )
+                await session.rollback()
+                return False
+
+        return True
+
+
+@instrument_repository
+class AsyncAccountRepository:
+    def __init__(self, database: AsyncDatabase):
+        self.database = database
+
+    async def create_bank_account(
+        self, user_id: int, account_type: str, interest_rate: float
+    ):
+        async with self.database.session() as session:
+            if not await session.get(User, user_id):
+                logger.error(
+                    "Account attempted to be created with user ID: %s, however User does not exist!",
+                    user_id,
+                )
+                return False
+
+            async def write():
+                # ? Known issue with db.Model and pylint - https://github.com/pallets-eco/flask-sqlalchemy/issues/1312#issue-2127942077
+                new_account = Account(
+                    user_id=user_id,
+                    account_number=self.database.ids.next_hex(),
+                    balance=0,
+                    account_type=account_type,
+                    created_date=time.time(),
+                    interest_rate=interest_rate,
+                )  # type:ignore
+                session.add(new_account)
+                await session.commit()
+                return new_account
+
+            try:
+                new_account = await _with_fresh_ids(session, write, ("account_number",))
+                logger.info(
+                    "Account %s created successfully with ID: %s!",
+                    new_account.account_number,
+                    new_account.id,
+                )
+            except SQLAlchemyError as e:
+                logger.error(
+                    "Error creating Account for User: %s with error: %s", user_id, e
+                )
+                await session.rollback()
+                return False
+
+        self.database.cache.invalidate(("account_ids_by_user", user_id))
+
+        return True
+
+    async def get_account_by_id(self, account_id: int):
+        # ? Returned accounts are detached, expire_on_commit is off so their columns stay readable
+        cache = self.database.cache
+        cached = cache.get(("account", account_id))
+        if cached is not None:
+            return cached
+
+        async with self.database.session() as session:
+            account = await session.get(Account, account_id)
+        if not account:
+            logger.error(
+                "Account: %s was attempted to be retrieved but does not exist!",
+                account_id,
+            )
+            return False
+
+        cache.set(("account", account_id), detach(account))
+        return account
+
+    async def get_accounts_by_user_id(self, user_id: int):
+        cache = self.database.cache
+        account_ids = cache.get(("account_ids_by_user", user_id))
+        if account_ids is not None:
+            cached = [cache.get(("account", account_id)) for account_id in account_ids]
+            if all(account is not None for account in cached):
+                return cached
+
+        async with self.database.session() as session:
+            accounts = list(
+                await session.scalars(select(Account).filter_by(user_id=user_id))
+            )
+        if not accounts:
+            logger.error("User: %s does not have any accounts!", user_id)
+            return False
+
+        cache.set(
+            ("account_ids_by_user", user_id), [account.id for account in accounts]
+        )
+        for account in accounts:
+            cache.set(("account", account.id), detach(account))
+        return accounts
+
+    async def update_account_balance(
+        self,
+        account_id: int,
+        amount: float,
+        description: str | None = None,
+        transaction_type: str | None = None,
+    ):
+        # ? Always the atomic UPDATE ... RETURNING path of AccountRepository.update_account_balance,
+        # ? returns the new balance, or None on failure (a drained account's 0.0 is falsy, test with `is None`).
+        if (description is None) != (transaction_type is None):
+            logger.error(
+                "Account: %s balance update needs both a description and transaction type to record a Transaction!",
+                account_id,
+            )
+            return None
+
+        async with self.database.session() as session:
+
+            async def write():
+                new_balance = (
+                    await session.execute(
+                        update(Account)
+                        .where(Account.id == account_id)
+                        .values(balance=Account.balance + amount)
+                        .returning(Account.balance)
+                    )
+                ).scalar_one_or_none()
+                if new_balance is None:
+                    await session.rollback()
+                    logger.error(
+                        "Account: %s was attempted to be updated but does not exist!",
+                        account_id,
+                    )
+                    return None
+
+                if transaction_type is not None:
+                    ledger = [
+                        {
+                            "account_id": account_id,
+                            "transaction_id": self.database.ids.next_hex(),
+                            "amount": amount,
+                            "timestamp": time.time(),
+                            "description": description,
+                            "transaction_type": transaction_type,
+                            "post_tx_balance": new_balance,
+                        }
+                    ]
+                    await session.execute(insert(Transaction), ledger)
+                    await _upsert_rollups(session, ledger)
+
+                await session.commit()
+                return new_balance
+
+            try:
+                new_balance = await _with_fresh_ids(session, write, ("transaction_id",))
+                if new_balance is None:
+                    return None
+
+                logger.info(
+                    "Account: %s balance updated by %s to %s!",
+                    account_id,
+                    amount,
+                    new_balance,
+                )
+            except SQLAlchemyError as e:
+                logger.error("Error updating Account: %s with error: %s", account_id, e)
+                await session.rollback()
+                return None
+
+        self.database.cache.invalidate(("account", account_id))
+
+        return new_balance
+
+    async def update_account_interest(self, account_id: int, new_interest_rate: float):
+        return await self._update_account(
+            account_id, "interest rate updated", interest_rate=new_interest_rate
+        )
+
+    async def disable_account(self, account_id: int):
+        return await self._update_account(account_id, "disabled", status="disabled")
+
+    async def enable_account(self, account_id: int):
+        return await self._update_account(account_id, "enabled", status="active")
+
+    async def flag_account(self, account_id: int):
+        return await self._update_account(account_id, "flagged", status="flagged")
+
+    async def _update_account(self, account_id: int, action: str, **values: Any):
+        async with self.database.session() as session:
+            try:
+                result = await session.execute(
+                    update(Account).where(Account.id == account_id).values(**values)
+                )
+                if not result.rowcount:
+                    await session.rollback()
+                    logger.error(
+                        "Account: %s was attempted to be %s but does not exist!",
+                        account_id,
+                        action,
+                    )
+                    return False
+                await session.commit()
+                logger.info("Account: %s %s successfully!", account_id, action)
+            except SQLAlchemyError as e:
+                logger.error("Error updating Account: %s with error: %s", account_id, e)
+                await session.rollback()
+                return False
+
+        self.database.cache.invalidate(("account", account_id))
+
+        return True
+
+
+@instrument_repository
+class AsyncTransactionRepository:
+    def __init__(self, database: AsyncDatabase):
+        self.database = database
+
+    async def create_transaction(
+        self,
+        account_id: int,
+        amount: float,
+        description: str,
+        transaction_type: str,
+    ):
+        async with self.database.session() as session:
+            balance = await session.scalar(
+                select(Account.balance).where(Account.id == account_id)
+            )
+            if balance is None:
+                logger.error(
+                    "Transaction attempted to be created with account ID: %s, however Account does not exist!",
+                    account_id,
+                )
+                return False
+
+            async def write():
+                ledger = [
+                    {
+                        "account_id": account_id,
+                        "transaction_id": self.database.ids.next_hex(),
+                        "amount": amount,
+                        "timestamp": time.time(),
+                        "description": description,
+                        "transaction_type": transaction_type,
+                        "post_tx_balance": float(balance + amount),
+                    }
+                ]
+                await session.execute(insert(Transaction), ledger)
+                await _upsert_rollups(session, ledger)
+                await session.commit()
+                return ledger[0]["transaction_id"]
+
+            try:
+                transaction_id = await _with_fresh_ids(
+                    session, write, ("transaction_id",)
+                )
+                logger.info(
+                    "%s Transaction created successfully with ID: %s!",
+                    transaction_type,
+                    transaction_id,
+                )
+            except SQLAlchemyError as e:
+                logger.error("Error creating Transaction: %s", e)
+                await session.rollback()
+                return False
+
+        return True
+
+    async def get_transaction_by_id(self, transaction_id: str):
+        async with self.database.session() as session:
+            transaction = await session.scalar(
+                select(Transaction).filter_by(transaction_id=transaction_id)
+            )
+        if not transaction:
+            archived = await self.database.archived_transactions(
+                transaction_id=transaction_id
+            )
+            transaction = archived[0] if archived else None
+        if not transaction:
+            logger.error(
+                "Transaction: %s was attempted to be retrieved but does not exist!",
+                transaction_id,
+            )
+            return False
+
+        return transaction
+
+    async def get_transactions_by_account_id(self, account_id: int):
+        async with self.database.session() as session:
+            transactions = list(
+                await session.scalars(
+                    select(Transaction).filter_by(account_id=account_id)
+                )
+            )
+        transactions = _merge_archived(
+            await self.database.archived_transactions(account_id=account_id),
+            transactions,
+        )
+        if not transactions:
+            logger.error("Account: %s does not have any transactions!", account_id)
+            return False
+
+        return transactions
+
+    async def get_transactions_page(
+        self,
+        account_id: int,
+        cursor: str | None = None,
+        page_size: int = 100,
+        transaction_type: str | None = None,
+    ):
+        # ? Same keyset pagination and cursors as TransactionRepository.get_transactions_page
+        if page_size < 1:
+            logger.error(
+                "Account: %s transactions requested with invalid page size: %s!",
+                account_id,
+                page_size,
+            )
+            return False
+
+        query = select(Transaction).filter_by(account_id=account_id)
+        if transaction_type is not None:
+            query = query.filter_by(transaction_type=transaction_type)
+
+        position = None
+        if cursor is not None:
+            position = TransactionRepository._decode_cursor(cursor)
+            if position is None:
+                logger.error(
+                    "Account: %s transactions requested with invalid cursor: %s!",
+                    account_id,
+                    cursor,
+                )
+                return False
+            query = query.where(
+                tuple_(Transaction.timestamp, Transaction.id) > position
+            )
+
+        async with self.database.session() as session:
+            transactions = list(
+                await session.scalars(
+                    query.order_by(Transaction.timestamp, Transaction.id).limit(
+                        page_size + 1
+                    )
+                )
+            )
+        archived = await self.database.archived_transactions(
+            account_id=account_id,
+            transaction_type=transaction_type,
+            after=position,
+            limit=page_size + 1,
+        )
+        transactions = _merge_archived(archived, transactions)
+        if len(transactions) <= page_size:
+            return transactions, None
+
+        transactions = transactions[:page_size]
+        return transactions, TransactionRepository.make_cursor(transactions[-1])
+
+    async def update_transaction_status(self, transaction_id: str, status: int | str):
+        new_status = _transaction_status(status)
+        if new_status is None:
+            logger.error(
+                "Transaction: %s was attempted to be updated with invalid status: %s!",
+                transaction_id,
+                status,
+            )
+            return False
+
+        async with self.database.session() as session:
+            transaction = await session.scalar(
+                select(Transaction).filter_by(transaction_id=transaction_id)
+            )
+            if not transaction:
+                logger.error(
+                    "Transaction: %s was attempted to be updated but does not exist!",
+                    transaction_id,
+                )
+                return False
+
+            counted = is_counted(new_status)
+            try:
+                if is_counted(transaction.status) != counted:
+                    await _upsert_rollups(
+                        session,
+                        [
+                            {
+                                "account_id": transaction.account_id,
+                                "transaction_id": transaction.transaction_id,
+                                "amount": transaction.amount,
+                                "timestamp": transaction.timestamp,
+                                "transaction_type": transaction.transaction_type,
+                                "post_tx_balance": transaction.post_tx_balance,
+                            }
+                        ],
+                        1 if counted else -1,
+                    )
+                transaction.status = new_status
+                await session.commit()
+                logger.info(
+                    "Transaction: %s status updated to %s!", transaction_id, new_status
+                )
+            except SQLAlchemyError as e:
+                logger.error(
+                    "Error updating Transaction: %s with error: %s", transaction_id, e
+                )
+                await session.rollback()
+                return False
+
+        return True
+
+    async def get_recent_transactions(
+        self, account_id: int, limit: int = 10, before: str | None = None
+    ):
+        if limit < 1:
+            logger.error(
+                "Account: %s recent transactions requested with invalid limit: %s!",
+                account_id,
+                limit,
+            )
+            return False
+
+        query = select(Transaction).filter_by(account_id=account_id)
+        position = None
+        if before is not None:
+            position = TransactionRepository._decode_cursor(before)
+            if position is None:
+                logger.error(
+                    "Account: %s recent transactions requested with invalid cursor: %s!",
+                    account_id,
+                    before,
+                )
+                return False
+            query = query.where(
+                tuple_(Transaction.timestamp, Transaction.id) < position
+            )
+
+        async with self.database.session() as session:
+            transactions = list(
+                await session.scalars(
+                    query.order_by(
+                        Transaction.timestamp.desc(), Transaction.id.desc()
+                    ).limit(limit)
+                )
+            )
+        archived = await self.database.archived_transactions(
+            account_id=account_id, before=position, descending=True, limit=limit
+        )
+        transactions = _merge_archived(archived, transactions, reverse=True)[:limit]
+        if not transactions:
+            logger.error("Account: %s does not have any transactions!", account_id)
+            return False
+
+        return transactions
+
+    async def get_transaction_by_type(self, account_id: int, transaction_type: str):
+        async with self.database.session() as session:
+            transactions = list(
+                await session.scalars(
+                    select(Transaction).filter_by(
+                        account_id=account_id, transaction_type=transaction_type
+                    )
+                )
+            )
+        transactions = _merge_archived(
+            await self.database.archived_transactions(
+                account_id=account_id, transaction_type=transaction_type
+            ),
+            transactions,
+        )
+        if not transactions:
+            logger.error(
+                "Account: %s does not have any transactions of type %s!",
+                account_id,
+                transaction_type,
+            )
+            return False
+
+        return transactions
@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from flask import current_app
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.ext.database import DB as db
+
+
+def _default_sizeof(value: Any) -> int:
+    if isinstance(value, (list, tuple)):
+        return max(len(value), 1)
+
+    return 1
+
+
+class LRUCache:
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl: float | None = 30.0,
+        max_size: int | None = None,
+        sizeof: Callable[[Any], int] = _default_sizeof,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_size = max_size
+        self.sizeof = sizeof
+
+        self._entries: OrderedDict[Hashable, tuple[Any, float | None, int]] = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        size = self.sizeof(value)
+        if self.max_size is not None and size > self.max_size:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, expires_at, size)
+            self._size += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_size is not None and self._size > self.max_size
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, *keys: Hashable):
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+
+class NullCache:
+    def get(self, key: Hashable, default: Any = None):
+        return default
+
+    def set(self, key: Hashable, value: Any):
+        pass
+
+    def invalidate(self, *keys: Hashable):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+
+_NULL_CACHE = NullCache()
+
+
+def get_cache():
+    return current_app.extensions.get("repository_cache", _NULL_CACHE)
+
+
+def detach(instance):
+    # ? Cache a detached copy so the session that loaded the entity can't expire or mutate it
+    mapper = inspect(instance).mapper
+    copy = mapper.class_(
+        **{attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs}
+    )
+    make_transient_to_detached(copy)
+    return copy
+
+
+def attach(instance):
+    # ? merge(load=False) re-attaches the cached copy to the current session without emitting SQL
+    return db.session.merge(instance, load=False)
+
+
+def register_extension(app, backend=None):
+    if backend is None:
+        if app.config.get("REPOSITORY_CACHE_ENABLED", True):
+            backend = LRUCache(
+                max_entries=app.config.get("REPOSITORY_CACHE_MAX_ENTRIES", 4096),
+                ttl=app.config.get("REPOSITORY_CACHE_TTL", 30.0),
+                max_size=app.config.get("REPOSITORY_CACHE_MAX_SIZE"),
+            )
+        else:
+            backend = _NULL_CACHE
+
+    app.extensions["repository_cache"] = backend
+    app.logger.info(
+        "Repository cache extension registered with %s.", type(backend).__name__
+    )
+
+    return backend
@@ -0,0 +1,227 @@
+import os
+import tempfile
+import threading
+import time
+import weakref
+from typing import Callable
+
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # ? Windows
+    fcntl = None
+
+# ? Snowflake layout: 41 bits of milliseconds since ID_EPOCH_MS, 10 bits of node, 12 bits of sequence
+ID_EPOCH_MS = 1704067200000  # ? 2024-01-01T00:00:00Z
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+ID_HEX_WIDTH = 16
+
+# ? Shared by every process on the host unless ID_LEASE_DIR points somewhere else
+DEFAULT_LEASE_DIR = os.path.join(tempfile.gettempdir(), "cache-money-id-nodes")
+
+_generators: "weakref.WeakSet[SnowflakeGenerator]" = weakref.WeakSet()
+
+
+class SnowflakeGenerator:
+    # ? Two generators on the same node repeat each other's ids, get them from acquire_id_generator
+    # ? (get_id_generator in a request) so a process never holds more than one per node
+    def __init__(
+        self,
+        node: int,
+        epoch_ms: int = ID_EPOCH_MS,
+        clock: Callable[[], float] = time.time,
+        lease_dir: str | None = None,
+        pinned: bool = False,
+    ):
+        if not 0 <= node <= MAX_NODE:
+            raise ValueError(f"node must be between 0 and {MAX_NODE}")
+
+        self.node = node
+        self.lease_dir = lease_dir
+        self.pinned = pinned
+        self.epoch_ms = epoch_ms
+        self.clock = clock
+
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+        # ? Set in a forked child that could not take a node of its own, see _after_fork
+        self._unavailable: str | None = None
+        _generators.add(self)
+
+    def next_id(self) -> int:
+        if self._unavailable is not None:
+            raise NodeUnavailable(self._unavailable)
+
+        with self._lock:
+            now_ms = int(self.clock() * 1000) - self.epoch_ms
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # ? Clock went backwards or the millisecond is still current, keep counting from the last one
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    # ? Sequence exhausted, borrow the next millisecond instead of sleeping
+                    self._last_ms += 1
+                    self._sequence = 0
+
+            return (
+                (self._last_ms << (NODE_BITS + SEQUENCE_BITS))
+                | (self.node << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+    def next_hex(self) -> str:
+        # ? Zero padded so lexical order of the strings matches numeric order of the ids
+        return format(self.next_id(), f"0{ID_HEX_WIDTH}x")
+
+    def _after_fork(self):
+        # ? The parent keeps its node. A leased generator moves the child onto a free one, a pinned one only
+        # ? carries on if it can lease its node again (the parent is gone); one without a lease never can.
+        self._lock = threading.Lock()
+        if self.lease_dir is None:
+            self._unavailable = (
+                f"ID node {self.node} belongs to the parent process, "
+                "give each forked worker its own ID_NODE or leave it unset"
+            )
+            return
+
+        try:
+            self.node = _lease_node(self.lease_dir, self.node if self.pinned else None)
+        except NodeUnavailable as e:
+            self._unavailable = (
+                f"{e}, give each forked worker its own ID_NODE or leave it unset"
+            )
+
+
+class NodeUnavailable(RuntimeError):
+    pass
+
+
+# ? Per process: node -> generator, lock file -> lease descriptor and the node leased for generators without ID_NODE
+_process_lock = threading.Lock()
+_process_generators: dict[int, SnowflakeGenerator] = {}
+_leases: dict[str, int] = {}
+_leased_node: int | None = None
+
+
+def _try_lease(lease_dir: str, node: int) -> bool:
+    # ? An exclusive flock on lease_dir/node-NNNN.lock, held for the life of the process and released by the
+    # ? kernel when it exits, so no stale leases survive a crash
+    path = os.path.join(lease_dir, f"node-{node:04d}.lock")
+    if path in _leases:
+        return True
+
+    descriptor = os.open(path, os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(descriptor)
+        return False
+
+    _leases[path] = descriptor
+    return True
+
+
+def _lease_node(lease_dir: str, node: int | None = None) -> int:
+    # ? node=None takes the first free node starting from the pid. Without flock (Windows) every process has to
+    # ? be given its own ID_NODE, the pid is only a best guess.
+    if fcntl is None:
+        return node if node is not None else os.getpid() & MAX_NODE
+
+    os.makedirs(lease_dir, exist_ok=True)
+    if node is not None:
+        if not _try_lease(lease_dir, node):
+            raise NodeUnavailable(f"ID node {node} is held by another process")
+        return node
+
+    start = os.getpid() & MAX_NODE
+    for offset in range(MAX_NODE + 1):
+        candidate = (start + offset) & MAX_NODE
+        if _try_lease(lease_dir, candidate):
+            return candidate
+
+    raise NodeUnavailable(f"All {MAX_NODE + 1} ID nodes are held")
+
+
+def acquire_id_generator(
+    node: int | None = None, lease_dir: str | None = None
+) -> SnowflakeGenerator:
+    # ? The process's generator for node. An explicit node must be unique across every process writing to the
+    # ? database; with lease_dir it is also locked there, so a second process on the same host fails fast.
+    # ? Without a node one is leased from lease_dir (DEFAULT_LEASE_DIR), which processes on one host must share.
+    global _leased_node
+    with _process_lock:
+        if node is None:
+            lease_dir = lease_dir or DEFAULT_LEASE_DIR
+            if _leased_node is None:
+                _leased_node = _lease_node(lease_dir)
+            node = _leased_node
+            generator = _process_generators.get(node)
+            if generator is None:
+                generator = SnowflakeGenerator(node, lease_dir=lease_dir)
+        else:
+            generator = _process_generators.get(node)
+            if generator is None:
+                if lease_dir is not None:
+                    _lease_node(lease_dir, node)
+                generator = SnowflakeGenerator(node, lease_dir=lease_dir, pinned=True)
+
+        _process_generators[node] = generator
+        return generator
+
+
+def _reset_generators_after_fork():
+    global _leased_node
+    # ? flock leases are shared with the parent through the inherited descriptors, the child needs its own
+    for descriptor in _leases.values():
+        os.close(descriptor)
+    _leases.clear()
+    _leased_node = None
+
+    registered = list(_process_generators.values())
+    _process_generators.clear()
+    for generator in list(_generators):
+        generator._after_fork()
+    for generator in registered:
+        if generator.lease_dir is not None and not generator.pinned:
+            _leased_node = generator.node
+        _process_generators[generator.node] = generator
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_generators_after_fork)
+
+
+def parse_id(value: int | str) -> dict[str, int]:
+    if isinstance(value, str):
+        value = int(value, 16)
+
+    return {
+        "timestamp_ms": (value >> (NODE_BITS + SEQUENCE_BITS)) + ID_EPOCH_MS,
+        "node": (value >> SEQUENCE_BITS) & MAX_NODE,
+        "sequence": value & MAX_SEQUENCE,
+    }
+
+
+def get_id_generator() -> SnowflakeGenerator:
+    return current_app.extensions["id_generator"]
+
+
+def register_extension(app):
+    # ? ID_NODE pins the node, required when processes on different hosts share the database.
+    # ? Otherwise each process leases a free node from ID_LEASE_DIR.
+    generator = acquire_id_generator(
+        app.config.get("ID_NODE"),
+        app.config.get("ID_LEASE_DIR") or DEFAULT_LEASE_DIR,
+    )
+    app.extensions["id_generator"] = generator
+
+    app.logger.info("ID generator extension registered with node %s.", generator.node)
+
+    return generator
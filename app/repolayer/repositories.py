@@ -1,15 +1,445 @@
-from secrets import token_hex
-
+import base64
+import binascii
+import datetime
+import heapq
+import itertools
+import json
+import math
+import time
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+import numpy as np
+from sqlalchemy import (
+    Integer,
+    bindparam,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+    update,
+)
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import aliased, selectinload
 from flask import (
     current_app as app,
 )  # ? https://flask.palletsprojects.com/en/2.3.x/appcontext/
-from flask_bcrypt import Bcrypt  # ? https://flask-bcrypt.readthedocs.io/en/latest/
 
 from app.ext.database import DB as db
-from app.datalayer import User, Account, Transaction
+from app.ext.passwords import get_password_hasher
+from app.datalayer import (
+    User,
+    Account,
+    Transaction,
+    InterestRun,
+    DailyRollup,
+    BalanceCheckpoint,
+)
+from app.datalayer.views import (
+    UserView,
+    AccountView,
+    TransactionView,
+    to_view,
+    view_columns,
+)
+from app.ext.metrics import instrument_repository
+from app.repolayer.archive import (
+    ARCHIVED_STATUSES,
+    SEGMENT_COLUMNS,
+    get_transaction_archive,
+    month_bounds,
+)
+from app.repolayer.cache import attach, detach, get_cache
+from app.repolayer.ids import get_id_generator
+from app.repolayer.snapshot import SnapshotError, get_transaction_snapshot
+from app.repolayer.rollups import (
+    ROLLUP_EXCLUDED_STATUSES,
+    SECONDS_PER_DAY,
+    closing_transaction_id,
+    date_to_day,
+    day_to_date,
+    is_counted,
+    latest_counted,
+    reclose,
+    rollup_day,
+    rollup_deltas,
+    rollup_key,
+    rollup_upsert,
+)
+
+# ? Stay well below SQLite's bound parameter limit when expanding IN (...) lists
+_IN_CLAUSE_CHUNK_SIZE = 500
+
+# ? Attempts per write when a generated account_number / transaction_id is already taken
+_ID_INSERT_ATTEMPTS = 3
+
+# ? Transaction statuses, update_transaction_status(es) accept either the name or its index
+TRANSACTION_STATUSES = (
+    "processing",
+    "processed",
+    "declined",
+    "disputed",
+    "refunded",
+    "flagged",
+)
+
+
+# ? Groups accepted by TransactionRepository.aggregate_transactions, besides the time buckets below
+_AGGREGATE_COLUMNS = {
+    "transaction_type": Transaction.transaction_type,
+    "status": Transaction.status,
+    "account_id": Transaction.account_id,
+}
+
+# ? UTC bucket labels, e.g. "2024-03-18T13", "2024-03-18" and "2024-03"
+_TIME_BUCKETS = {
+    "hour": ("%Y-%m-%dT%H", 'YYYY-MM-DD"T"HH24'),
+    "day": ("%Y-%m-%d", "YYYY-MM-DD"),
+    "month": ("%Y-%m", "YYYY-MM"),
+}
+
+
+def _time_bucket(bucket: str, dialect_name: str):
+    sqlite_format, postgresql_format = _TIME_BUCKETS[bucket]
+    if dialect_name == "postgresql":
+        return func.to_char(
+            func.timezone("UTC", func.to_timestamp(Transaction.timestamp)),
+            postgresql_format,
+        )
+
+    return func.strftime(sqlite_format, Transaction.timestamp, "unixepoch")
+
+
+def _load_balances(account_ids: Iterable[int]) -> dict[int, float]:
+    ids = [account_id for account_id in set(account_ids) if account_id is not None]
+    balances: dict[int, float] = {}
+    for start in range(0, len(ids), _IN_CLAUSE_CHUNK_SIZE):
+        rows = db.session.execute(
+            select(Account.id, Account.balance).where(
+                Account.id.in_(ids[start : start + _IN_CLAUSE_CHUNK_SIZE])
+            )
+        )
+        balances.update({account_id: balance for account_id, balance in rows})
+
+    return balances
+
+
+def _lock_accounts(account_ids: Iterable[int]) -> dict[int, tuple[float, str]]:
+    # ? Balance and status per Account, read in ascending id order with FOR UPDATE (a no-op on SQLite,
+    # ? where the transaction's first write takes the database lock instead) so batches lock deterministically
+    ids = sorted(
+        {account_id for account_id in account_ids if isinstance(account_id, int)}
+    )
+    accounts: dict[int, tuple[float, str]] = {}
+    for start in range(0, len(ids), _IN_CLAUSE_CHUNK_SIZE):
+        rows = db.session.execute(
+            select(Account.id, Account.balance, Account.status)
+            .where(Account.id.in_(ids[start : start + _IN_CLAUSE_CHUNK_SIZE]))
+            .order_by(Account.id)
+            .with_for_update()
+        )
+        accounts.update(
+            {account_id: (balance, status) for account_id, balance, status in rows}
+        )
+
+    return accounts
+
+
+def _unique_violation(error: IntegrityError, columns: Iterable[str]) -> str | None:
+    # ? SQLite reports "UNIQUE constraint failed: user.email", PostgreSQL "Key (email)=(...) already exists"
+    message = str(error.orig)
+    for column in columns:
+        if f".{column}" in message or f"({column})" in message:
+            return column
+
+    return None
+
+
+def _with_fresh_ids(write: Callable[[], Any], columns: Iterable[str]):
+    # ? Runs write, which draws its generated ids itself, again after a unique violation on one of columns.
+    # ? Generated ids only collide when two processes share an ID node (see app.repolayer.ids), so this is a
+    # ? safety net: the failed attempt is rolled back and retried at most _ID_INSERT_ATTEMPTS times in total.
+    columns = tuple(columns)
+    for attempt in range(1, _ID_INSERT_ATTEMPTS + 1):
+        try:
+            return write()
+        except IntegrityError as e:
+            column = _unique_violation(e, columns)
+            if column is None or attempt == _ID_INSERT_ATTEMPTS:
+                raise
+            db.session.rollback()
+            app.logger.warning(
+                "Generated %s collided on attempt %s, retrying with a fresh one: %s",
+                column,
+                attempt,
+                e,
+            )
+
+
+def _transaction_status(status: int | str) -> str | None:
+    if isinstance(status, str):
+        return status if status in TRANSACTION_STATUSES else None
+
+    if isinstance(status, int) and 0 <= status < len(TRANSACTION_STATUSES):
+        return TRANSACTION_STATUSES[status]
+
+    return None
+
+
+def _update_status_in_chunks(
+    column,
+    ids: Iterable[Any],
+    status: str,
+    chunk_size: int,
+    before_update: Callable[[list[Any]], None] | None = None,
+) -> Iterator[tuple[list[Any], int]]:
+    # ? One UPDATE ... WHERE column IN (...) and one commit per chunk, yields each committed chunk and its rowcount.
+    # ? before_update runs inside the chunk's transaction, while the rows still have their old status.
+    table = column.table
+    unique_ids = list(dict.fromkeys(value for value in ids if value is not None))
+    for start in range(0, len(unique_ids), chunk_size):
+        chunk = unique_ids[start : start + chunk_size]
+        if before_update is not None:
+            before_update(chunk)
+        result = db.session.execute(
+            update(table).where(column.in_(chunk)).values(status=status)
+        )
+        db.session.commit()
+        yield chunk, result.rowcount
+
+
+def _select_views(query, view, model) -> list:
+    # ? Selects only the view's columns, rows never enter the identity map
+    return [view._make(row) for row in query.with_entities(*view_columns(view, model))]
+
+
+def _iter_archived_rows(**filters) -> Iterator[dict[str, Any]]:
+    # ? Archived rows matching the filters (see TransactionArchive.rows) in (timestamp, id) order. Segments are
+    # ? only read as the iterator advances.
+    archive = get_transaction_archive()
+    if archive is None:
+        return iter(())
+
+    return archive.rows(**filters)
+
+
+def _iter_archived(as_view: bool = False, **filters) -> Iterator:
+    # ? The same rows as transient Transactions outside the session, or TransactionViews
+    entity = TransactionView if as_view else Transaction
+    return (entity(**row) for row in _iter_archived_rows(**filters))
+
+
+def _archived_transactions(as_view: bool = False, **filters) -> list:
+    return list(_iter_archived(as_view, **filters))
+
+
+def _aggregate_archived(
+    group_by: tuple[str, ...],
+    account_id: int | None,
+    start: float | None,
+    end: float | None,
+    transaction_type: str | None,
+    status: str | None,
+) -> dict[tuple, tuple[int, float, float, float]]:
+    # ? (count, total, min, max) per group key over the archived rows, computed with numpy on the segment columns.
+    # ? Rows still in the table after an interrupted archival run are left to the SQL side.
+    archive = get_transaction_archive()
+    if archive is None or (status is not None and status not in ARCHIVED_STATUSES):
+        return {}
+
+    names = ("transaction_id", "amount", "timestamp", *_AGGREGATE_COLUMNS)
+    parts = []
+    for columns in archive.select_columns(account_id, start, end):
+        mask = np.ones(len(columns["id"]), dtype=bool)
+        if transaction_type is not None:
+            mask &= columns["transaction_type"] == transaction_type
+        if status is not None:
+            mask &= columns["status"] == status
+        if mask.any():
+            parts.append({name: columns[name][mask] for name in names})
+    if not parts:
+        return {}
+
+    merged = {name: np.concatenate([part[name] for part in parts]) for name in names}
+    _, keep = np.unique(merged["transaction_id"], return_index=True)
+    transaction_ids = merged["transaction_id"][keep].tolist()
+    hot: set[str] = set()
+    for offset in range(0, len(transaction_ids), _IN_CLAUSE_CHUNK_SIZE):
+        hot.update(
+            db.session.scalars(
+                select(Transaction.transaction_id).where(
+                    Transaction.transaction_id.in_(
+                        transaction_ids[offset : offset + _IN_CLAUSE_CHUNK_SIZE]
+                    )
+                )
+            )
+        )
+    if hot:
+        keep = keep[[value not in hot for value in transaction_ids]]
+    if not len(keep):
+        return {}
+
+    labels = []
+    for key in group_by:
+        if key in _TIME_BUCKETS:
+            labels.append(
+                [
+                    time.strftime(_TIME_BUCKETS[key][0], time.gmtime(timestamp))
+                    for timestamp in merged["timestamp"][keep].tolist()
+                ]
+            )
+        else:
+            labels.append(merged[key][keep].tolist())
+    codes: dict[tuple, int] = {}
+    index = np.fromiter(
+        (
+            (codes.setdefault(label, len(codes)) for label in zip(*labels))
+            if labels
+            else (codes.setdefault((), 0) for _ in keep)
+        ),
+        dtype=np.intp,
+        count=len(keep),
+    )
+
+    amounts = merged["amount"][keep]
+    counts = np.bincount(index, minlength=len(codes))
+    totals = np.bincount(index, weights=amounts, minlength=len(codes))
+    minimums = np.full(len(codes), np.inf)
+    np.minimum.at(minimums, index, amounts)
+    maximums = np.full(len(codes), -np.inf)
+    np.maximum.at(maximums, index, amounts)
+    return {
+        label: (
+            int(counts[code]),
+            float(totals[code]),
+            float(minimums[code]),
+            float(maximums[code]),
+        )
+        for label, code in codes.items()
+    }
+
 
+def _merge_archived(archived: list, transactions: list, reverse: bool = False) -> list:
+    # ? A row still in the table after an interrupted archival run wins over its archived copy
+    if not archived:
+        return transactions
 
+    transaction_ids = {transaction.transaction_id for transaction in transactions}
+    merged = [
+        transaction
+        for transaction in archived
+        if transaction.transaction_id not in transaction_ids
+    ]
+    merged.extend(transactions)
+    merged.sort(
+        key=lambda transaction: (transaction.timestamp, transaction.id),
+        reverse=reverse,
+    )
+    return merged
+
+
+def _upsert_rollups(transactions: Iterable[Mapping[str, Any]], sign: int = 1):
+    # ? Runs in the caller's transaction, so rollups commit (or roll back) together with the ledger rows
+    transactions = list(transactions)
+    deltas = rollup_deltas(transactions, sign)
+    if deltas:
+        db.session.execute(rollup_upsert(db.session.get_bind().dialect.name), deltas)
+    if sign < 0:
+        _reclose_rollups(transactions)
+
+
+def _reclose_rollups(removed: list[Mapping[str, Any]]):
+    # ? A rollup whose closing row was taken out closes on the latest counted row left in its key, from the table
+    # ? or else the archive. An emptied rollup keeps its count of 0 and its last closing balance. One indexed
+    # ? SELECT per key, two when it closed on a removed row.
+    removed_ids = {row["transaction_id"] for row in removed}
+    for key in {rollup_key(row) for row in removed}:
+        if db.session.scalar(closing_transaction_id(key)) not in removed_ids:
+            continue
+
+        closing = (
+            db.session.execute(latest_counted(key, removed_ids)).mappings().first()
+        )
+        if closing is None:
+            account_id, day, transaction_type = key
+            closing = next(
+                (
+                    row
+                    for row in _iter_archived_rows(
+                        account_id=account_id,
+                        transaction_type=transaction_type,
+                        before=((day + 1) * SECONDS_PER_DAY, 0),
+                        descending=True,
+                    )
+                    if row["timestamp"] >= day * SECONDS_PER_DAY
+                    and is_counted(row["status"])
+                    and row["transaction_id"] not in removed_ids
+                ),
+                None,
+            )
+        if closing is not None:
+            db.session.execute(reclose(key, closing))
+
+
+def _account_id_chunks(
+    account_ids: Iterable[int] | None, chunk_size: int
+) -> Iterator[list[int]]:
+    # ? Sorted chunks of the given Account ids, or of every Account walked by a keyset over the primary key
+    # ? (each chunk is an index range instead of an OFFSET scan)
+    if account_ids is not None:
+        ids = sorted(set(account_ids))
+        for start in range(0, len(ids), chunk_size):
+            yield ids[start : start + chunk_size]
+        return
+
+    last_id = 0
+    while True:
+        ids = list(
+            db.session.scalars(
+                select(Account.id)
+                .where(Account.id > last_id)
+                .order_by(Account.id)
+                .limit(chunk_size)
+            )
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def _apply_balance_deltas(deltas: Mapping[int, float]):
+    # ? Core UPDATE so the delta is applied SQL-side with a single executemany
+    account = Account.__table__
+    db.session.execute(
+        update(account)
+        .where(account.c.id == bindparam("b_account_id"))
+        .values(balance=account.c.balance + bindparam("b_delta")),
+        [
+            {"b_account_id": account_id, "b_delta": delta}
+            for account_id, delta in deltas.items()
+        ],
+    )
+
+
+def _carry_accrued_interest(remainders: Mapping[int, float]):
+    # ? Same executemany as _apply_balance_deltas, sets the unposted interest each Account carries
+    account = Account.__table__
+    db.session.execute(
+        update(account)
+        .where(account.c.id == bindparam("b_account_id"))
+        .values(accrued_interest=bindparam("b_remainder")),
+        [
+            {"b_account_id": account_id, "b_remainder": remainder}
+            for account_id, remainder in remainders.items()
+        ],
+    )
+
+
+@instrument_repository
 class UserRepository:
     @staticmethod
     def add_user(
@@ -21,16 +451,10 @@ class UserRepository:
         mobile: str,
         address: str,
     ) -> bool:
+        # ? Insert first and let the unique constraints reject duplicates, sign-up is a single round trip
         unique_args = {"username": username, "email": email, "mobile": mobile}
 
-        for key, values in unique_args.items():
-            if User.query.filter(getattr(User, key) == values).first():
-                app.logger.error(
-                    f"User attempted to be created with {key}: {values}, however User already exists!"
-                )
-                return False
-
-        password_hash = Bcrypt().generate_password_hash(password).decode("utf-8")
+        password_hash = get_password_hasher().generate_password_hash(password)
 
         # ? Known issue with db.Model and pylint - https://github.com/pallets-eco/flask-sqlalchemy/issues/1312#issue-2127942077
         new_user = User(username=username, password_hash=password_hash, email=email, first_name=first_name, last_name=last_name, mobile=mobile, address=address)  # type: ignore
@@ -38,10 +462,22 @@ class UserRepository:
             db.session.add(new_user)
             db.session.commit()
             app.logger.info(
-                f"User {username} created successfully with ID: {new_user.id}!"
+                "User %s created successfully with ID: %s!", username, new_user.id
             )
+        except IntegrityError as e:
+            db.session.rollback()
+            key = _unique_violation(e, unique_args)
+            if key is None:
+                app.logger.error("Error creating User: %s with error: %s", username, e)
+            else:
+                app.logger.error(
+                    "User attempted to be created with %s: %s, however User already exists!",
+                    key,
+                    unique_args[key],
+                )
+            return False
         except SQLAlchemyError as e:
-            app.logger.error(f"Error creating User: {username} with error: {e}")
+            app.logger.error("Error creating User: %s with error: %s", username, e)
             db.session.rollback()
             return False
 
@@ -52,28 +488,35 @@ class UserRepository:
         user = User.query.filter_by(username=username).first()
         if not user:
             app.logger.info(
-                f"User: {username} attempted to authenticate, but does not exist!"
+                "User: %s attempted to authenticate, but does not exist!", username
             )
             return False
 
-        if not Bcrypt().check_password_hash(user.password_hash, password):
+        if not get_password_hasher().check_password_hash(user.password_hash, password):
             app.logger.info(
-                f"User: {username} attempted to authenticate, but password was incorrect!"
+                "User: %s attempted to authenticate, but password was incorrect!",
+                username,
             )
             return False
         else:
-            app.logger.info(f"User: {username} authenticated successfully!")
+            app.logger.info("User: %s authenticated successfully!", username)
             return True
 
     @staticmethod
     def get_user_id_by_username(username: str):
+        cache = get_cache()
+        user_id = cache.get(("user_id_by_username", username))
+        if user_id is not None:
+            return user_id
+
         user = User.query.filter_by(username=username).first()
         if not user:
             app.logger.error(
-                f"User: {username} was attempted to be retrieved but does not exist!"
+                "User: %s was attempted to be retrieved but does not exist!", username
             )
             return None
 
+        cache.set(("user_id_by_username", username), user.id)
         return user.id
 
     @staticmethod
@@ -84,7 +527,7 @@ class UserRepository:
 
         if not user:
             app.logger.error(
-                f"User: {username} was attempted to be updated but does not exist!"
+                "User: %s was attempted to be updated but does not exist!", username
             )
             return False
 
@@ -95,11 +538,11 @@ class UserRepository:
                     setattr(user, key, value)
             db.session.commit()
         except SQLAlchemyError as e:
-            app.logger.error(f"Error updating User: {username} with error: {e}")
+            app.logger.error("Error updating User: %s with error: %s", username, e)
             db.session.rollback()
             return False
 
-        app.logger.info(f"User: {username} updated successfully!")
+        app.logger.info("User: %s updated successfully!", username)
 
         return True
 
@@ -108,20 +551,20 @@ class UserRepository:
         user = User.query.filter_by(username=username).first()
         if not user:
             app.logger.error(
-                f"User: {username} was attempted to be updated but does not exist!"
+                "User: %s was attempted to be updated but does not exist!", username
             )
             return False
 
-        password_hash = Bcrypt().generate_password_hash(new_password).decode("utf-8")
+        password_hash = get_password_hasher().generate_password_hash(new_password)
         try:
             user.password_hash = password_hash
             db.session.commit()
         except SQLAlchemyError as e:
-            app.logger.error(f"Error updating User: {username} with error: {e}")
+            app.logger.error("Error updating User: %s with error: %s", username, e)
             db.session.rollback()
             return False
 
-        app.logger.info(f"User: {username} updated successfully!")
+        app.logger.info("User: %s updated successfully!", username)
 
         return True
 
@@ -131,12 +574,9 @@ class UserRepository:
     ):
         if old_username == None and id == None:
             app.logger.error(
-                f"Username Change Failed: User {id} attempted to change username to {new_username} but no ID or Username was provided!"
-            )
-            return False
-        if User.query.filter_by(username=new_username).first():
-            app.logger.error(
-                f"Username Change Failed: User {id} attempted to change username to {new_username} but it already exists!"
+                "Username Change Failed: User %s attempted to change username to %s but no ID or Username was provided!",
+                id,
+                new_username,
             )
             return False
 
@@ -146,26 +586,127 @@ class UserRepository:
             user = User.query.filter_by(username=old_username).first()
 
         if not user:
-            app.logger.error(f"Username Change Failed: User {id} does not exist!")
+            app.logger.error("Username Change Failed: User %s does not exist!", id)
             return False
 
+        if user.username == new_username:
+            app.logger.error(
+                "Username Change Failed: User %s attempted to change username to %s but it already exists!",
+                id,
+                new_username,
+            )
+            return False
+
+        previous_username = user.username
         user.username = new_username
 
         try:
             db.session.commit()
-            app.logger.info(f"User: {id} updated successfully!")
+            app.logger.info("User: %s updated successfully!", id)
+        except IntegrityError:
+            app.logger.error(
+                "Username Change Failed: User %s attempted to change username to %s but it already exists!",
+                id,
+                new_username,
+            )
+            db.session.rollback()
+            return False
         except SQLAlchemyError as e:
-            app.logger.error(f"Error updating User: {id} with error: {e}")
+            app.logger.error("Error updating User: %s with error: %s", id, e)
             db.session.rollback()
             return False
 
+        get_cache().invalidate(("user_id_by_username", previous_username))
+
         return True
 
+    @staticmethod
+    def get_user_overview(
+        user_id: int, transactions_per_account: int = 5, as_view: bool = False
+    ):
+        # ? Three queries however many accounts the user has: the user, its accounts (selectinload) and the latest
+        # ? transactions of every account at once. The correlated LIMIT subquery walks each account's
+        # ? (account_id, timestamp) index backwards, so the cost does not grow with the length of the history.
+        # ? as_view returns UserView, AccountView and TransactionView rows instead of entities.
+        if transactions_per_account < 0:
+            app.logger.error(
+                "User: %s overview requested with invalid transaction count: %s!",
+                user_id,
+                transactions_per_account,
+            )
+            return False
+
+        if as_view:
+            users = _select_views(User.query.filter_by(id=user_id), UserView, User)
+            user = users[0] if users else None
+            accounts = (
+                _select_views(
+                    Account.query.filter_by(user_id=user_id), AccountView, Account
+                )
+                if user
+                else []
+            )
+        else:
+            user = db.session.scalar(
+                select(User).options(selectinload(User.accounts)).filter_by(id=user_id)
+            )
+            accounts = user.accounts if user else []
+        if not user:
+            app.logger.error(
+                "User: %s overview was requested but does not exist!", user_id
+            )
+            return False
+
+        recent_transactions: dict[int, list[Any]] = {
+            account.id: [] for account in accounts
+        }
+        if recent_transactions and transactions_per_account:
+            recent = aliased(Transaction)
+            latest_ids = (
+                select(recent.id)
+                .where(recent.account_id == Account.id)
+                .order_by(recent.timestamp.desc(), recent.id.desc())
+                .limit(transactions_per_account)
+                .correlate(Account)
+            )
+            query = (
+                select(Transaction)
+                .select_from(Account)
+                .join(Transaction, Transaction.id.in_(latest_ids))
+                .where(Account.user_id == user_id)
+            )
+            if as_view:
+                transactions = map(
+                    TransactionView._make,
+                    db.session.execute(
+                        query.with_only_columns(
+                            *view_columns(TransactionView, Transaction)
+                        )
+                    ),
+                )
+            else:
+                transactions = db.session.scalars(query)
+            for transaction in transactions:
+                recent_transactions[transaction.account_id].append(transaction)
+
+            for account_transactions in recent_transactions.values():
+                account_transactions.sort(
+                    key=lambda transaction: (transaction.timestamp, transaction.id),
+                    reverse=True,
+                )
+
+        return {
+            "user": user,
+            "accounts": accounts,
+            "recent_transactions": recent_transactions,
+        }
+
     @staticmethod
     def disable_user(username: str | None = None, id: str | None = None):
         if username == None and id == None:
             app.logger.error(
-                f"User: {id} was attempted to be disabled but no ID or Username was provided!"
+                "User: %s was attempted to be disabled but no ID or Username was provided!",
+                id,
             )
             return False
 
@@ -176,7 +717,7 @@ class UserRepository:
 
         if not user:
             app.logger.error(
-                f"User: {username} was attempted to be disabled but does not exist!"
+                "User: %s was attempted to be disabled but does not exist!", username
             )
             return False
         else:
@@ -184,7 +725,7 @@ class UserRepository:
         try:
             db.session.commit()
         except SQLAlchemyError as e:
-            app.logger.error(f"Error disabling User: {username} with error: {e}")
+            app.logger.error("Error disabling User: %s with error: %s", username, e)
             db.session.rollback()
             return False
 
@@ -194,7 +735,8 @@ class UserRepository:
     def enable_user(username: str | None = None, id: str | None = None):
         if username == None and id == None:
             app.logger.error(
-                f"User: {id} was attempted to be enabled but no ID or Username was provided!"
+                "User: %s was attempted to be enabled but no ID or Username was provided!",
+                id,
             )
             return False
 
@@ -205,7 +747,7 @@ class UserRepository:
 
         if not user:
             app.logger.error(
-                f"User: {username} was attempted to be enabled but does not exist!"
+                "User: %s was attempted to be enabled but does not exist!", username
             )
             return False
         else:
@@ -213,78 +755,144 @@ class UserRepository:
         try:
             db.session.commit()
         except SQLAlchemyError as e:
-            app.logger.error(f"Error enabling User: {username} with error: {e}")
+            app.logger.error("Error enabling User: %s with error: %s", username, e)
             db.session.rollback()
             return False
 
         return True
 
 
+@instrument_repository
 class AccountRepository:
     @staticmethod
     def create_bank_account(user_id: int, account_type: str, interest_rate: float):
-        account_number = token_hex(16)
         if not User.query.get(user_id):
             app.logger.error(
-                f"Account attempted to be created with user ID: {user_id}, however User does not exist!"
+                "Account attempted to be created with user ID: %s, however User does not exist!",
+                user_id,
             )
             return False
 
-        if Account.query.filter_by(account_number=account_number).first():
-            app.logger.error(
-                f"Account attempted to be created with account number: {account_number}, however Account already exists! Retrying..."
-            )
-            AccountRepository.create_bank_account(user_id, account_type, interest_rate)
+        def write():
+            # ? Generated ids are unique per node, so no existence check round trip is needed
+            # ? Known issue with db.Model and pylint - https://github.com/pallets-eco/flask-sqlalchemy/issues/1312#issue-2127942077
+            account = Account(
+                user_id=user_id,
+                account_number=get_id_generator().next_hex(),
+                balance=0,
+                account_type=account_type,
+                interest_rate=interest_rate,
+            )  # type:ignore
+            db.session.add(account)
+            db.session.commit()
+            return account
 
-        # ? Known issue with db.Model and pylint - https://github.com/pallets-eco/flask-sqlalchemy/issues/1312#issue-2127942077
-        new_account = Account(
-            user_id=user_id,
-            account_number=account_number,
-            balance=0,
-            account_type=account_type,
-            interest_rate=interest_rate,
-        )  # type:ignore
         try:
-            db.session.add(new_account)
-            db.session.commit()
+            new_account = _with_fresh_ids(write, ("account_number",))
             app.logger.info(
-                f"Account {account_number} created successfully with ID: {new_account.id}!"
+                "Account %s created successfully with ID: %s!",
+                new_account.account_number,
+                new_account.id,
             )
         except SQLAlchemyError as e:
             app.logger.error(
-                f"Error creating Account: {account_number} with error: {e}"
+                "Error creating Account for User: %s with error: %s", user_id, e
             )
             db.session.rollback()
             return False
 
+        get_cache().invalidate(("account_ids_by_user", user_id))
+
         return True
 
     @staticmethod
-    def get_account_by_id(account_id: int):
-        account = Account.query.get(account_id)
+    def get_account_by_id(
+        account_id: int, options: Iterable[Any] = (), as_view: bool = False
+    ):
+        # ? options are loader strategies, e.g. selectinload(Account.transactions) or joinedload(Account.user).
+        # ? Cached copies carry no relationships, so the cache is only read without them.
+        # ? as_view returns an AccountView, built from the cached copy or from a column-only select.
+        options = () if as_view else tuple(options)
+        cache = get_cache()
+        cached = None if options else cache.get(("account", account_id))
+        if cached is not None:
+            return to_view(AccountView, cached) if as_view else attach(cached)
+
+        if as_view:
+            views = _select_views(
+                Account.query.filter_by(id=account_id), AccountView, Account
+            )
+            account = views[0] if views else None
+        elif options:
+            account = Account.query.options(*options).filter_by(id=account_id).first()
+        else:
+            account = Account.query.get(account_id)
         if not account:
             app.logger.error(
-                f"Account: {account_id} was attempted to be retrieved but does not exist!"
+                "Account: %s was attempted to be retrieved but does not exist!",
+                account_id,
             )
             return False
 
+        if not as_view:
+            cache.set(("account", account_id), detach(account))
         return account
 
     @staticmethod
-    def get_accounts_by_user_id(user_id: int):
-        accounts = Account.query.filter_by(user_id=user_id).all()
+    def get_accounts_by_user_id(
+        user_id: int, options: Iterable[Any] = (), as_view: bool = False
+    ):
+        # ? Only the membership list is cached per user, the accounts themselves share the ("account", id) entries
+        # ? so a mutation of one account only has to invalidate that account's key.
+        options = () if as_view else tuple(options)
+        cache = get_cache()
+        account_ids = None if options else cache.get(("account_ids_by_user", user_id))
+        if account_ids is not None:
+            cached = [cache.get(("account", account_id)) for account_id in account_ids]
+            if all(account is not None for account in cached):
+                if as_view:
+                    return [to_view(AccountView, account) for account in cached]
+                return [attach(account) for account in cached]
+
+        if as_view:
+            accounts = _select_views(
+                Account.query.filter_by(user_id=user_id), AccountView, Account
+            )
+        else:
+            accounts = Account.query.options(*options).filter_by(user_id=user_id).all()
         if not accounts:
-            app.logger.error(f"User: {user_id} does not have any accounts!")
+            app.logger.error("User: %s does not have any accounts!", user_id)
             return False
 
+        if as_view:
+            return accounts
+
+        cache.set(
+            ("account_ids_by_user", user_id), [account.id for account in accounts]
+        )
+        for account in accounts:
+            cache.set(("account", account.id), detach(account))
         return accounts
 
     @staticmethod
-    def update_account_balance(account_id: int, amount: float):
+    def update_account_balance(
+        account_id: int,
+        amount: float,
+        atomic: bool = False,
+        description: str | None = None,
+        transaction_type: str | None = None,
+    ):
+        # ? atomic=True returns the new balance or None, see _update_account_balance_atomic
+        if atomic:
+            return AccountRepository._update_account_balance_atomic(
+                account_id, amount, description, transaction_type
+            )
+
         account = Account.query.get(account_id)
         if not account:
             app.logger.error(
-                f"Account: {account_id} was attempted to be updated but does not exist!"
+                "Account: %s was attempted to be updated but does not exist!",
+                account_id,
             )
             return False
 
@@ -293,21 +901,230 @@ class AccountRepository:
         try:
             db.session.commit()
             app.logger.info(
-                f"Account: {account_id} balance updated from {previous_balance} to {account.balance}!"
+                "Account: %s balance updated from %s to %s!",
+                account_id,
+                previous_balance,
+                account.balance,
             )
         except SQLAlchemyError as e:
-            app.logger.error(f"Error updating Account: {account_id} with error: {e}")
+            app.logger.error("Error updating Account: %s with error: %s", account_id, e)
             db.session.rollback()
             return False
 
+        get_cache().invalidate(("account", account_id))
+
         return True
 
+    @staticmethod
+    def _update_account_balance_atomic(
+        account_id: int,
+        amount: float,
+        description: str | None,
+        transaction_type: str | None,
+    ):
+        # ? Single UPDATE ... RETURNING, so concurrent workers can't lose updates and the entity is never loaded.
+        # ? Returns the new balance instead of True, or None on failure: a drained account's 0.0 is falsy, so
+        # ? callers test the result with `is None`.
+        if (description is None) != (transaction_type is None):
+            app.logger.error(
+                "Account: %s balance update needs both a description and transaction type to record a Transaction!",
+                account_id,
+            )
+            return None
+
+        def write():
+            new_balance = db.session.execute(
+                update(Account)
+                .where(Account.id == account_id)
+                .values(balance=Account.balance + amount)
+                .returning(Account.balance)
+            ).scalar_one_or_none()
+            if new_balance is None:
+                db.session.rollback()
+                return None
+
+            if transaction_type is not None:
+                ledger = [
+                    {
+                        "account_id": account_id,
+                        "transaction_id": get_id_generator().next_hex(),
+                        "amount": amount,
+                        "timestamp": time.time(),
+                        "description": description,
+                        "transaction_type": transaction_type,
+                        "post_tx_balance": new_balance,
+                    }
+                ]
+                db.session.execute(insert(Transaction), ledger)
+                _upsert_rollups(ledger)
+
+            db.session.commit()
+            return new_balance
+
+        try:
+            new_balance = _with_fresh_ids(write, ("transaction_id",))
+            if new_balance is None:
+                app.logger.error(
+                    "Account: %s was attempted to be updated but does not exist!",
+                    account_id,
+                )
+                return None
+
+            app.logger.info(
+                "Account: %s balance updated by %s to %s!",
+                account_id,
+                amount,
+                new_balance,
+            )
+        except SQLAlchemyError as e:
+            app.logger.error("Error updating Account: %s with error: %s", account_id, e)
+            db.session.rollback()
+            return None
+
+        get_cache().invalidate(("account", account_id))
+
+        return new_balance
+
+    @staticmethod
+    def get_balance_at(account_id: int, ts: float):
+        # ? Balance as of ts (epoch seconds): the post_tx_balance of the last Transaction at or before ts, or the
+        # ? latest BalanceCheckpoint at or before ts when that is newer. None if neither exists, False for unknown Accounts.
+        balances = AccountRepository.get_balances_at(ts, [account_id])
+        if balances is False:
+            return False
+
+        if account_id not in balances:
+            app.logger.error(
+                "Account: %s balance was requested but Account does not exist!",
+                account_id,
+            )
+            return False
+
+        return balances[account_id]
+
+    @staticmethod
+    def get_balances_at(
+        ts: float,
+        account_ids: Iterable[int] | None = None,
+        chunk_size: int = _IN_CLAUSE_CHUNK_SIZE,
+    ):
+        # ? One set-based query per chunk of Accounts (every Account by default, walked by id), each Account
+        # ? resolved with two index seeks. Returns {account_id: balance or None}, unknown ids are left out.
+        if chunk_size < 1 or (
+            account_ids is not None and chunk_size > _IN_CLAUSE_CHUNK_SIZE
+        ):
+            app.logger.error(
+                "Balances at %s requested with invalid chunk size: %s!", ts, chunk_size
+            )
+            return False
+
+        query = AccountRepository._balances_at_query(ts)
+        balances: dict[int, float | None] = {}
+        if account_ids is not None:
+            for chunk in _account_id_chunks(account_ids, chunk_size):
+                rows = db.session.execute(query.where(Account.id.in_(chunk)))
+                balances.update(AccountRepository._resolve_balances(rows))
+            return balances
+
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                query.where(Account.id > last_id).order_by(Account.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                return balances
+            balances.update(AccountRepository._resolve_balances(rows))
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _balances_at_query(ts: float):
+        last_transaction = (
+            select(Transaction.id)
+            .where(Transaction.account_id == Account.id, Transaction.timestamp <= ts)
+            .order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+            .limit(1)
+            .correlate(Account)
+            .scalar_subquery()
+        )
+        last_checkpoint = (
+            select(BalanceCheckpoint.id)
+            .where(
+                BalanceCheckpoint.account_id == Account.id,
+                BalanceCheckpoint.timestamp <= ts,
+            )
+            .order_by(BalanceCheckpoint.timestamp.desc(), BalanceCheckpoint.id.desc())
+            .limit(1)
+            .correlate(Account)
+            .scalar_subquery()
+        )
+        return (
+            select(
+                Account.id,
+                Transaction.timestamp,
+                Transaction.post_tx_balance,
+                BalanceCheckpoint.timestamp,
+                BalanceCheckpoint.balance,
+            )
+            .select_from(Account)
+            .outerjoin(Transaction, Transaction.id == last_transaction)
+            .outerjoin(BalanceCheckpoint, BalanceCheckpoint.id == last_checkpoint)
+        )
+
+    @staticmethod
+    def _resolve_balances(rows) -> dict[int, float | None]:
+        # ? A checkpoint taken at the same time as (or after) the last Transaction already includes it
+        balances: dict[int, float | None] = {}
+        for account_id, tx_ts, tx_balance, checkpoint_ts, checkpoint_balance in rows:
+            if checkpoint_ts is not None and (tx_ts is None or checkpoint_ts >= tx_ts):
+                balances[account_id] = checkpoint_balance
+            else:
+                balances[account_id] = tx_balance
+
+        return balances
+
+    @staticmethod
+    def checkpoint_balances(chunk_size: int = 10_000):
+        # ? Records every Account's current balance with one INSERT ... SELECT and commit per chunk of Accounts,
+        # ? meant to run periodically (e.g. at month end). Returns the number of checkpoints written.
+        if chunk_size < 1:
+            app.logger.error(
+                "Balance checkpoint attempted with invalid chunk size: %s!", chunk_size
+            )
+            return False
+
+        written = 0
+        try:
+            for chunk in _account_id_chunks(None, chunk_size):
+                result = db.session.execute(
+                    insert(BalanceCheckpoint).from_select(
+                        ["account_id", "timestamp", "balance"],
+                        select(Account.id, literal(time.time()), Account.balance).where(
+                            Account.id.between(chunk[0], chunk[-1])
+                        ),
+                    )
+                )
+                db.session.commit()
+                written += result.rowcount
+        except SQLAlchemyError as e:
+            app.logger.error(
+                "Error writing balance checkpoints after %s rows with error: %s",
+                written,
+                e,
+            )
+            db.session.rollback()
+            return False
+
+        app.logger.info("%s Account balances checkpointed!", written)
+
+        return written
+
     @staticmethod
     def update_account_interest(account_id: int, new_interest_rate: float):
         account = Account.query.get(account_id)
         if not account:
             app.logger.error(
-                f"Account: {account_id} was attempted to be updated but does not exist!"
+                "Account: %s was attempted to be updated but does not exist!",
+                account_id,
             )
             return False
 
@@ -317,33 +1134,199 @@ class AccountRepository:
         try:
             db.session.commit()
             app.logger.info(
-                f"Account: {account_id} interest rate updated from {previous_interest} to {account.interest_rate}!"
+                "Account: %s interest rate updated from %s to %s!",
+                account_id,
+                previous_interest,
+                account.interest_rate,
             )
         except SQLAlchemyError as e:
-            app.logger.error(f"Error updating Account: {account_id} with error: {e}")
+            app.logger.error("Error updating Account: %s with error: %s", account_id, e)
             db.session.rollback()
             return False
 
+        get_cache().invalidate(("account", account_id))
+
         return True
 
+    @staticmethod
+    def accrue_interest(
+        run_key: str,
+        days: int = 1,
+        chunk_size: int = 10_000,
+        day_count: int = 365,
+    ):
+        # ? Simple daily interest, balance * interest_rate% * days / day_count, for active accounts with a positive
+        # ? balance. Whole cents are posted as an interest Transaction and the sub-cent rest is carried in
+        # ? Account.accrued_interest to the next run, so small balances still earn interest over time.
+        # ? Each chunk commits its balances, interest Transactions and the run checkpoint together, so calling
+        # ? again with the same run_key resumes after the last committed chunk.
+        if days < 1 or chunk_size < 1 or day_count < 1:
+            app.logger.error(
+                "Interest run %s attempted with invalid days: %s, chunk size: %s or day count: %s!",
+                run_key,
+                days,
+                chunk_size,
+                day_count,
+            )
+            return False
+
+        run = db.session.scalar(select(InterestRun).filter_by(run_key=run_key))
+        if run is None:
+            run = InterestRun(run_key=run_key, days=days)  # type:ignore
+            try:
+                db.session.add(run)
+                db.session.commit()
+            except IntegrityError:
+                app.logger.error("Interest run %s was started concurrently!", run_key)
+                db.session.rollback()
+                return False
+        elif run.status == "completed":
+            app.logger.info("Interest run %s already completed, skipping!", run_key)
+        elif run.days != days:
+            app.logger.error(
+                "Interest run %s resumed with %s days but was started with %s!",
+                run_key,
+                days,
+                run.days,
+            )
+            return False
+
+        generator = get_id_generator()
+        factor = days / (day_count * 100.0)
+
+        def accrue_chunk():
+            # ? Reads, accrues and commits one chunk, drawing its transaction_ids, so a retry starts over
+            rows = db.session.execute(
+                select(
+                    Account.id,
+                    Account.balance,
+                    Account.interest_rate,
+                    Account.status,
+                    Account.accrued_interest,
+                )
+                .where(Account.id > run.last_account_id)
+                .order_by(Account.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                run.status = "completed"
+                run.finished = time.time()
+                db.session.commit()
+                return rows, [], 0
+
+            ids, balances, rates, statuses, carried = zip(*rows)
+            balances = np.array(balances, dtype=np.float64)
+            accrue = (np.array(statuses) == "active") & (balances > 0)
+            selected = np.flatnonzero(accrue)
+            accrued = (
+                np.array(carried, dtype=np.float64)[selected]
+                + balances[selected]
+                * np.array(rates, dtype=np.float64)[selected]
+                * factor
+            )
+            # ? Only whole cents are posted, the 1e-6 absorbs float error such as 0.29 * 100 = 28.999...
+            posted = np.floor(np.round(accrued * 100, 6)) / 100
+            remainders = np.maximum(accrued - posted, 0.0)
+
+            account_ids = np.array(ids, dtype=np.int64)[selected].tolist()
+            credited = np.flatnonzero(posted > 0)
+            if credited.size:
+                credited_ids = [account_ids[index] for index in credited]
+                amounts = posted[credited].tolist()
+                post_tx_balances = (
+                    balances[selected][credited] + posted[credited]
+                ).tolist()
+                timestamp = time.time()
+
+                _apply_balance_deltas(dict(zip(credited_ids, amounts)))
+                ledger = [
+                    {
+                        "account_id": account_id,
+                        "transaction_id": generator.next_hex(),
+                        "amount": amount,
+                        "timestamp": timestamp,
+                        "description": f"Interest {run_key}",
+                        "status": "processed",
+                        "transaction_type": "interest",
+                        "post_tx_balance": post_tx_balance,
+                    }
+                    for account_id, amount, post_tx_balance in zip(
+                        credited_ids, amounts, post_tx_balances
+                    )
+                ]
+                db.session.execute(insert(Transaction), ledger)
+                _upsert_rollups(ledger)
+
+            if account_ids:
+                _carry_accrued_interest(dict(zip(account_ids, remainders.tolist())))
+
+            run.last_account_id = ids[-1]
+            run.accounts_accrued += int(credited.size)
+            run.total_interest += float(posted.sum())
+            db.session.commit()
+            return rows, account_ids, int(credited.size)
+
+        while run.status != "completed":
+            try:
+                rows, account_ids, credited = _with_fresh_ids(
+                    accrue_chunk, ("transaction_id",)
+                )
+            except SQLAlchemyError as e:
+                app.logger.error(
+                    "Error accruing interest for run %s after Account: %s with error: %s",
+                    run_key,
+                    run.last_account_id,
+                    e,
+                )
+                db.session.rollback()
+                return False
+
+            if not rows:
+                break
+
+            if account_ids:
+                get_cache().invalidate(
+                    *(("account", account_id) for account_id in account_ids)
+                )
+            app.logger.info(
+                "Interest run %s credited %s of %s Accounts up to ID: %s!",
+                run_key,
+                credited,
+                len(rows),
+                rows[-1][0],
+            )
+
+        return {
+            "run_key": run.run_key,
+            "status": run.status,
+            "accounts_accrued": run.accounts_accrued,
+            "total_interest": run.total_interest,
+            "last_account_id": run.last_account_id,
+        }
+
     @staticmethod
     def disable_account(account_id: int):
         account = Account.query.get(account_id)
         if not account:
             app.logger.error(
-                f"Account: {account_id} was attempted to be disabled but does not exist!"
+                "Account: %s was attempted to be disabled but does not exist!",
+                account_id,
             )
             return False
         else:
             account.status = "disabled"
         try:
             db.session.commit()
-            app.logger.info(f"Account: {account_id} disabled successfully!")
+            app.logger.info("Account: %s disabled successfully!", account_id)
         except SQLAlchemyError as e:
-            app.logger.error(f"Error disabling Account: {account_id} with error: {e}")
+            app.logger.error(
+                "Error disabling Account: %s with error: %s", account_id, e
+            )
             db.session.rollback()
             return False
 
+        get_cache().invalidate(("account", account_id))
+
         return True
 
     @staticmethod
@@ -351,19 +1334,22 @@ class AccountRepository:
         account = Account.query.get(account_id)
         if not account:
             app.logger.error(
-                f"Account: {account_id} was attempted to be enabled but does not exist!"
+                "Account: %s was attempted to be enabled but does not exist!",
+                account_id,
             )
             return False
         else:
             account.status = "active"
         try:
             db.session.commit()
-            app.logger.info(f"Account: {account_id} enabled successfully!")
+            app.logger.info("Account: %s enabled successfully!", account_id)
         except SQLAlchemyError as e:
-            app.logger.error(f"Error enabling Account: {account_id} with error: {e}")
+            app.logger.error("Error enabling Account: %s with error: %s", account_id, e)
             db.session.rollback()
             return False
 
+        get_cache().invalidate(("account", account_id))
+
         return True
 
     @staticmethod
@@ -371,22 +1357,346 @@ class AccountRepository:
         account = Account.query.get(account_id)
         if not account:
             app.logger.error(
-                f"Account: {account_id} was attempted to be flagged but does not exist!"
+                "Account: %s was attempted to be flagged but does not exist!",
+                account_id,
             )
             return False
         else:
             account.status = "flagged"
         try:
             db.session.commit()
-            app.logger.info(f"Account: {account_id} flagged successfully!")
+            app.logger.info("Account: %s flagged successfully!", account_id)
         except SQLAlchemyError as e:
-            app.logger.error(f"Error flagging Account: {account_id} with error: {e}")
+            app.logger.error("Error flagging Account: %s with error: %s", account_id, e)
             db.session.rollback()
             return False
 
+        get_cache().invalidate(("account", account_id))
+
         return True
 
+    @staticmethod
+    def disable_accounts(
+        account_ids: Iterable[int], chunk_size: int = _IN_CLAUSE_CHUNK_SIZE
+    ):
+        return AccountRepository._set_account_statuses(
+            account_ids, "disabled", chunk_size
+        )
+
+    @staticmethod
+    def enable_accounts(
+        account_ids: Iterable[int], chunk_size: int = _IN_CLAUSE_CHUNK_SIZE
+    ):
+        return AccountRepository._set_account_statuses(
+            account_ids, "active", chunk_size
+        )
+
+    @staticmethod
+    def flag_accounts(
+        account_ids: Iterable[int], chunk_size: int = _IN_CLAUSE_CHUNK_SIZE
+    ):
+        return AccountRepository._set_account_statuses(
+            account_ids, "flagged", chunk_size
+        )
+
+    @staticmethod
+    def _set_account_statuses(account_ids: Iterable[int], status: str, chunk_size: int):
+        # ? Returns the number of Accounts updated. Chunks commit independently, so on failure the
+        # ? earlier chunks stay applied and the call can simply be repeated.
+        if not 0 < chunk_size <= _IN_CLAUSE_CHUNK_SIZE:
+            app.logger.error(
+                "Accounts were attempted to be set %s with invalid chunk size: %s!",
+                status,
+                chunk_size,
+            )
+            return False
+
+        cache = get_cache()
+        updated = 0
+        try:
+            for chunk, rowcount in _update_status_in_chunks(
+                Account.__table__.c.id, account_ids, status, chunk_size
+            ):
+                updated += rowcount
+                cache.invalidate(*(("account", account_id) for account_id in chunk))
+        except SQLAlchemyError as e:
+            app.logger.error(
+                "Error setting Accounts %s after %s rows with error: %s",
+                status,
+                updated,
+                e,
+            )
+            db.session.rollback()
+            return False
+
+        app.logger.info("%s Accounts set %s successfully!", updated, status)
+
+        return updated
+
+    @staticmethod
+    def transfer(
+        from_account_id: int, to_account_id: int, amount: float, description: str
+    ):
+        # ? Both balance updates and both ledger rows commit together, returns (debit_id, credit_id) or False.
+        # ? Accounts are updated in ascending id order so concurrent opposite transfers can't deadlock, and the
+        # ? funds / active checks live in the UPDATE's WHERE clause so nothing is read before it is locked.
+        error = AccountRepository._validate_transfer(
+            from_account_id, to_account_id, amount, description
+        )
+        if error:
+            app.logger.error(
+                "Transfer from Account: %s to Account: %s rejected: %s!",
+                from_account_id,
+                to_account_id,
+                error,
+            )
+            return False
+
+        amount = float(amount)
+        legs = {
+            from_account_id: (
+                -amount,
+                (Account.status == "active") & (Account.balance >= amount),
+            ),
+            to_account_id: (amount, Account.status == "active"),
+        }
+
+        def write():
+            balances = {}
+            for account_id in sorted(legs):
+                delta, condition = legs[account_id]
+                balances[account_id] = db.session.execute(
+                    update(Account)
+                    .where(Account.id == account_id, condition)
+                    .values(balance=Account.balance + delta)
+                    .returning(Account.balance)
+                ).scalar_one_or_none()
+                if balances[account_id] is None:
+                    db.session.rollback()
+                    app.logger.error(
+                        "Transfer from Account: %s to Account: %s rejected: %s!",
+                        from_account_id,
+                        to_account_id,
+                        AccountRepository._transfer_failure(account_id, delta),
+                    )
+                    return None
+
+            generator = get_id_generator()
+            timestamp = time.time()
+            ledger = [
+                {
+                    "account_id": account_id,
+                    "transaction_id": generator.next_hex(),
+                    "amount": legs[account_id][0],
+                    "timestamp": timestamp,
+                    "description": description,
+                    "transaction_type": transaction_type,
+                    "post_tx_balance": balances[account_id],
+                }
+                for account_id, transaction_type in (
+                    (from_account_id, "debit"),
+                    (to_account_id, "credit"),
+                )
+            ]
+            db.session.execute(insert(Transaction), ledger)
+            _upsert_rollups(ledger)
+            db.session.commit()
+            return ledger
+
+        try:
+            ledger = _with_fresh_ids(write, ("transaction_id",))
+            if ledger is None:
+                return False
 
+            app.logger.info(
+                "Transfer of %s from Account: %s to Account: %s completed!",
+                amount,
+                from_account_id,
+                to_account_id,
+            )
+        except SQLAlchemyError as e:
+            app.logger.error(
+                "Error transferring from Account: %s to Account: %s with error: %s",
+                from_account_id,
+                to_account_id,
+                e,
+            )
+            db.session.rollback()
+            return False
+
+        get_cache().invalidate(("account", from_account_id), ("account", to_account_id))
+
+        return ledger[0]["transaction_id"], ledger[1]["transaction_id"]
+
+    @staticmethod
+    def transfer_batch(
+        transfers: Iterable[Mapping[str, Any]], chunk_size: int = 1000
+    ) -> list[tuple[str, str] | bool]:
+        # ? Transfers are mappings of from_account_id, to_account_id, amount and description, applied in order.
+        # ? Each chunk is one DB transaction: one locking SELECT of the involved accounts (in id order), one ledger
+        # ? INSERT and one balance UPDATE executemany. Returns (debit_id, credit_id) per transfer, or False if the
+        # ? transfer was rejected (unknown/inactive account, insufficient funds) or its chunk failed.
+        rows = list(transfers)
+        results: list[tuple[str, str] | bool] = [False] * len(rows)
+        if chunk_size < 1:
+            app.logger.error(
+                "Transfer batch attempted with invalid chunk size: %s!", chunk_size
+            )
+            return results
+
+        generator = get_id_generator()
+        cache = get_cache()
+        for start in range(0, len(rows), chunk_size):
+            chunk = range(start, min(start + chunk_size, len(rows)))
+
+            def write():
+                # ? Locks, validates and draws the transaction_ids again on every attempt, a retry starts over
+                accounts = _lock_accounts(
+                    account_id
+                    for index in chunk
+                    if isinstance(rows[index], Mapping)
+                    for account_id in (
+                        rows[index].get("from_account_id"),
+                        rows[index].get("to_account_id"),
+                    )
+                )
+                balances = {
+                    account_id: balance for account_id, (balance, _) in accounts.items()
+                }
+                timestamp = time.time()
+                ledger: list[dict[str, Any]] = []
+                applied: list[tuple[int, tuple[str, str]]] = []
+                for index in chunk:
+                    row = rows[index]
+                    error = AccountRepository._validate_batch_transfer(row, accounts)
+                    if not error and balances[row["from_account_id"]] < row["amount"]:
+                        error = "insufficient funds"
+                    if error:
+                        app.logger.error(
+                            "Transfer batch row %s rejected: %s!", index, error
+                        )
+                        continue
+
+                    amount = float(row["amount"])
+                    ids = (generator.next_hex(), generator.next_hex())
+                    for account_id, delta, transaction_type, transaction_id in (
+                        (row["from_account_id"], -amount, "debit", ids[0]),
+                        (row["to_account_id"], amount, "credit", ids[1]),
+                    ):
+                        balances[account_id] += delta
+                        ledger.append(
+                            {
+                                "account_id": account_id,
+                                "transaction_id": transaction_id,
+                                "amount": delta,
+                                "timestamp": timestamp,
+                                "description": row["description"],
+                                "transaction_type": transaction_type,
+                                "post_tx_balance": balances[account_id],
+                            }
+                        )
+                    applied.append((index, ids))
+
+                if not applied:
+                    db.session.rollback()
+                    return applied, balances
+
+                db.session.execute(insert(Transaction), ledger)
+                _upsert_rollups(ledger)
+                _apply_balance_deltas(
+                    {
+                        account_id: balances[account_id] - accounts[account_id][0]
+                        for account_id in sorted(balances)
+                        if balances[account_id] != accounts[account_id][0]
+                    }
+                )
+                db.session.commit()
+                return applied, balances
+
+            try:
+                applied, balances = _with_fresh_ids(write, ("transaction_id",))
+                if not applied:
+                    continue
+
+                app.logger.info(
+                    "Transfer batch chunk of %s transfers completed successfully!",
+                    len(applied),
+                )
+            except SQLAlchemyError as e:
+                app.logger.error(
+                    "Error applying transfer batch chunk starting at row %s: %s",
+                    start,
+                    e,
+                )
+                db.session.rollback()
+                continue
+
+            for index, ids in applied:
+                results[index] = ids
+            cache.invalidate(*(("account", account_id) for account_id in balances))
+
+        return results
+
+    @staticmethod
+    def _validate_transfer(
+        from_account_id: Any, to_account_id: Any, amount: Any, description: Any
+    ) -> str | None:
+        if from_account_id == to_account_id:
+            return "source and destination are the same Account"
+
+        if (
+            isinstance(amount, bool)
+            or not isinstance(amount, (int, float))
+            or not math.isfinite(amount)
+            or amount <= 0
+        ):
+            return f"invalid amount {amount!r}"
+
+        if not isinstance(description, str) or not description or len(description) > 80:
+            return f"invalid description {description!r}"
+
+        return None
+
+    @staticmethod
+    def _validate_batch_transfer(
+        row: Any, accounts: Mapping[int, tuple[float, str]]
+    ) -> str | None:
+        if not isinstance(row, Mapping):
+            return f"expected a mapping, got {type(row).__name__}"
+
+        error = AccountRepository._validate_transfer(
+            row.get("from_account_id"),
+            row.get("to_account_id"),
+            row.get("amount"),
+            row.get("description"),
+        )
+        if error:
+            return error
+
+        for key in ("from_account_id", "to_account_id"):
+            if row[key] not in accounts:
+                return f"Account {row[key]} does not exist"
+            if accounts[row[key]][1] != "active":
+                return f"Account {row[key]} is {accounts[row[key]][1]}"
+
+        return None
+
+    @staticmethod
+    def _transfer_failure(account_id: int, delta: float) -> str:
+        # ? Only runs once the conditional UPDATE matched nothing, to log why
+        row = db.session.execute(
+            select(Account.balance, Account.status).where(Account.id == account_id)
+        ).first()
+        if row is None:
+            return f"Account {account_id} does not exist"
+        if row.status != "active":
+            return f"Account {account_id} is {row.status}"
+        if delta < 0 and row.balance < -delta:
+            return f"Account {account_id} has insufficient funds"
+        return f"Account {account_id} could not be updated"
+
+
+@instrument_repository
 class TransactionRepository:
     @staticmethod
     def create_transaction(
@@ -395,83 +1705,387 @@ class TransactionRepository:
         description: str,
         transaction_type: str,
     ):
-        if not Account.query.get(account_id):
+        account = Account.query.get(account_id)
+        if not account:
             app.logger.error(
-                f"Transaction attempted to be created with account ID: {account_id}, however Account does not exist!"
+                "Transaction attempted to be created with account ID: %s, however Account does not exist!",
+                account_id,
             )
             return False
 
         # ? Known issue with db.Model and pylint - https://github.com/pallets-eco/flask-sqlalchemy/issues/1312#issue-2127942077
-        post_tx_balance: float = float(
-            Account.query.get(account_id).balance + amount  # type:ignore
-        )  # type:ignore
-        try:
-            transaction = Transaction(
-                account_id=account_id,
-                transaction_id=f"{token_hex(8)}",
-                amount=amount,
-                description=description,
-                transaction_type=transaction_type,
-                post_tx_balance=post_tx_balance,
-            )  # type:ignore
+        post_tx_balance: float = float(account.balance + amount)  # type:ignore
+        timestamp = time.time()
+
+        def write():
+            values = {
+                "account_id": account_id,
+                "transaction_id": get_id_generator().next_hex(),
+                "amount": amount,
+                "timestamp": timestamp,
+                "description": description,
+                "transaction_type": transaction_type,
+                "post_tx_balance": post_tx_balance,
+            }
+            transaction = Transaction(**values)  # type:ignore
             db.session.add(transaction)
+            db.session.flush()
+            _upsert_rollups([values])
+            # ? Read before commit, expired attributes would cost a refresh SELECT
+            transaction_pk = transaction.id
             db.session.commit()
+            return transaction_pk
+
+        try:
+            transaction_pk = _with_fresh_ids(write, ("transaction_id",))
             app.logger.info(
-                f"{transaction.transaction_type} Transaction created successfully with ID: {transaction.id}!"
+                "%s Transaction created successfully with ID: %s!",
+                transaction_type,
+                transaction_pk,
             )
         except SQLAlchemyError as e:
-            app.logger.error(f"Error creating Transaction: {e}")
+            app.logger.error("Error creating Transaction: %s", e)
             db.session.rollback()
             return False
 
         return True
 
     @staticmethod
-    def get_transaction_by_id(transaction_id: int):
-        transaction = Transaction.query.filter_by(transaction_id=transaction_id).first()
+    def create_transactions_bulk(
+        transactions: Iterable[Mapping[str, Any]],
+        chunk_size: int = 1000,
+        update_balances: bool = True,
+    ) -> list[str | bool]:
+        # ? Rows are mappings of account_id, amount, description, transaction_type and an optional timestamp,
+        # ? given in posting order since post_tx_balance is a running balance per account.
+        # ? Returns one entry per row: the new transaction_id, or False if the row or its chunk failed.
+        rows = list(transactions)
+        results: list[str | bool] = [False] * len(rows)
+        if chunk_size < 1:
+            app.logger.error(
+                "Bulk Transaction ingestion attempted with invalid chunk size: %s!",
+                chunk_size,
+            )
+            return results
+
+        balances = _load_balances(
+            row.get("account_id") for row in rows if isinstance(row, Mapping)
+        )
+        timestamp = time.time()
+        generator = get_id_generator()
+
+        for start in range(0, len(rows), chunk_size):
+            deltas: dict[int, float] = {}
+            pending: list[tuple[int, dict[str, Any]]] = []
+            for index in range(start, min(start + chunk_size, len(rows))):
+                row = rows[index]
+                error = TransactionRepository._validate_bulk_row(row, balances)
+                if error:
+                    app.logger.error(
+                        "Bulk Transaction row %s rejected: %s!", index, error
+                    )
+                    continue
+
+                account_id = row["account_id"]
+                amount = float(row["amount"])
+                deltas[account_id] = deltas.get(account_id, 0.0) + amount
+                pending.append(
+                    (
+                        index,
+                        {
+                            "account_id": account_id,
+                            "amount": amount,
+                            "timestamp": row.get("timestamp") or timestamp,
+                            "description": row["description"],
+                            "transaction_type": row["transaction_type"],
+                            "post_tx_balance": balances[account_id]
+                            + deltas[account_id],
+                        },
+                    )
+                )
+
+            if not pending:
+                continue
+
+            def write():
+                # ? The chunk's transaction_ids are drawn here so a retried chunk gets fresh ones
+                ledger = [values for _, values in pending]
+                for values in ledger:
+                    values["transaction_id"] = generator.next_hex()
+                db.session.execute(insert(Transaction), ledger)
+                _upsert_rollups(ledger)
+                if update_balances:
+                    _apply_balance_deltas(deltas)
+                db.session.commit()
+
+            try:
+                _with_fresh_ids(write, ("transaction_id",))
+                app.logger.info(
+                    "Bulk Transaction chunk of %s rows created successfully!",
+                    len(pending),
+                )
+            except SQLAlchemyError as e:
+                app.logger.error(
+                    "Error creating Bulk Transaction chunk starting at row %s: %s",
+                    start,
+                    e,
+                )
+                db.session.rollback()
+                continue
+
+            for index, values in pending:
+                results[index] = values["transaction_id"]
+            for account_id, delta in deltas.items():
+                balances[account_id] += delta
+            if update_balances:
+                get_cache().invalidate(
+                    *(("account", account_id) for account_id in deltas)
+                )
+
+        return results
+
+    @staticmethod
+    def _validate_bulk_row(row: Any, balances: Mapping[int, float]) -> str | None:
+        if not isinstance(row, Mapping):
+            return f"expected a mapping, got {type(row).__name__}"
+
+        if row.get("account_id") not in balances:
+            return f"Account {row.get('account_id')} does not exist"
+
+        amount = row.get("amount")
+        if (
+            isinstance(amount, bool)
+            or not isinstance(amount, (int, float))
+            or not math.isfinite(amount)
+        ):
+            return f"invalid amount {amount!r}"
+
+        for key in ("description", "transaction_type"):
+            value = row.get(key)
+            if not isinstance(value, str) or not value or len(value) > 80:
+                return f"invalid {key} {value!r}"
+
+        return None
+
+    @staticmethod
+    def get_transaction_by_id(
+        transaction_id: int, options: Iterable[Any] = (), as_view: bool = False
+    ):
+        query = Transaction.query.filter_by(transaction_id=transaction_id)
+        if as_view:
+            views = _select_views(query, TransactionView, Transaction)
+            transaction = views[0] if views else None
+        else:
+            transaction = query.options(*options).first()
+        if not transaction:
+            archived = _archived_transactions(as_view, transaction_id=transaction_id)
+            transaction = archived[0] if archived else None
         if not transaction:
             app.logger.error(
-                f"Transaction: {transaction_id} was attempted to be retrieved but does not exist!"
+                "Transaction: %s was attempted to be retrieved but does not exist!",
+                transaction_id,
             )
             return False
 
         return transaction
 
     @staticmethod
-    def get_transactions_by_account_id(account_id: int):
-        transactions = Transaction.query.filter_by(account_id=account_id).all()
+    def get_transactions_by_account_id(
+        account_id: int, options: Iterable[Any] = (), as_view: bool = False
+    ):
+        query = Transaction.query.filter_by(account_id=account_id)
+        if as_view:
+            transactions = _select_views(query, TransactionView, Transaction)
+        else:
+            transactions = query.options(*options).all()
+        transactions = _merge_archived(
+            _archived_transactions(as_view, account_id=account_id), transactions
+        )
         if not transactions:
-            app.logger.error(f"Account: {account_id} does not have any transactions!")
+            app.logger.error("Account: %s does not have any transactions!", account_id)
             return False
 
         return transactions
 
+    @staticmethod
+    def get_transactions_page(
+        account_id: int,
+        cursor: str | None = None,
+        page_size: int = 100,
+        transaction_type: str | None = None,
+        options: Iterable[Any] = (),
+        as_view: bool = False,
+    ):
+        # ? Keyset pagination on (timestamp, id): every page is an index range seek, so page N costs the same as page 1.
+        # ? Returns (transactions, next_cursor), next_cursor is None on the last page.
+        if page_size < 1:
+            app.logger.error(
+                "Account: %s transactions requested with invalid page size: %s!",
+                account_id,
+                page_size,
+            )
+            return False
+
+        query = Transaction.query.filter_by(account_id=account_id)
+        if not as_view:
+            query = query.options(*options)
+        if transaction_type is not None:
+            query = query.filter_by(transaction_type=transaction_type)
+
+        position = None
+        if cursor is not None:
+            position = TransactionRepository._decode_cursor(cursor)
+            if position is None:
+                app.logger.error(
+                    "Account: %s transactions requested with invalid cursor: %s!",
+                    account_id,
+                    cursor,
+                )
+                return False
+            query = query.filter(
+                tuple_(Transaction.timestamp, Transaction.id) > position
+            )
+
+        query = query.order_by(Transaction.timestamp, Transaction.id).limit(
+            page_size + 1
+        )
+        if as_view:
+            transactions = _select_views(query, TransactionView, Transaction)
+        else:
+            transactions = query.all()
+
+        # ? Archived rows are older than anything left in the table for the same month, but an Account's unsettled
+        # ? rows can stay behind, so both sides are merged on the same (timestamp, id) key
+        archived = _archived_transactions(
+            as_view,
+            account_id=account_id,
+            transaction_type=transaction_type,
+            after=position,
+            limit=page_size + 1,
+        )
+        transactions = _merge_archived(archived, transactions)
+        if len(transactions) <= page_size:
+            return transactions, None
+
+        transactions = transactions[:page_size]
+        last = transactions[-1]
+        return transactions, TransactionRepository._encode_cursor(
+            last.timestamp, last.id
+        )
+
+    @staticmethod
+    def stream_transactions_by_account_id(
+        account_id: int,
+        transaction_type: str | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Transaction]:
+        # ? yield_per fetches batch_size rows at a time from the cursor, memory stays flat however long the history is
+        statement = select(Transaction).filter_by(account_id=account_id)
+        if transaction_type is not None:
+            statement = statement.filter_by(transaction_type=transaction_type)
+
+        result = db.session.scalars(
+            statement.order_by(Transaction.timestamp, Transaction.id).execution_options(
+                yield_per=batch_size
+            )
+        )
+        archived = _iter_archived(
+            account_id=account_id, transaction_type=transaction_type
+        )
+        try:
+            first = next(archived, None)
+            if first is None:
+                yield from result
+                return
+
+            # ? Both sides are ordered by (timestamp, id) and merge is stable, so a leftover archived copy
+            # ? comes right after its table row and is skipped
+            last = None
+            for transaction in heapq.merge(
+                result,
+                itertools.chain((first,), archived),
+                key=lambda transaction: (transaction.timestamp, transaction.id),
+            ):
+                if (
+                    last is not None
+                    and transaction.transaction_id == last.transaction_id
+                ):
+                    continue
+                last = transaction
+                yield transaction
+        finally:
+            result.close()
+
+    @staticmethod
+    def make_cursor(transaction: Transaction) -> str:
+        return TransactionRepository._encode_cursor(
+            transaction.timestamp, transaction.id
+        )
+
+    @staticmethod
+    def _encode_cursor(timestamp: float, id: int) -> str:
+        return base64.urlsafe_b64encode(json.dumps([timestamp, id]).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[float, int] | None:
+        try:
+            timestamp, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError, TypeError, AttributeError):
+            return None
+
+        if (
+            isinstance(timestamp, bool)
+            or not isinstance(timestamp, (int, float))
+            or isinstance(id, bool)
+            or not isinstance(id, int)
+        ):
+            return None
+
+        return timestamp, id
+
     @staticmethod
     def update_transaction_status(transaction_id: str, status: int):
-        status_list = [
-            "processing",
-            "processed",
-            "declined",
-            "disputed",
-            "refunded",
-            "flagged",
-        ]
+        new_status = _transaction_status(status)
+        if new_status is None:
+            app.logger.error(
+                "Transaction: %s was attempted to be updated with invalid status: %s!",
+                transaction_id,
+                status,
+            )
+            return False
+
         transaction = Transaction.query.filter_by(transaction_id=transaction_id).first()
         if not transaction:
             app.logger.error(
-                f"Transaction: {transaction_id} was attempted to be updated but does not exist!"
+                "Transaction: %s was attempted to be updated but does not exist!",
+                transaction_id,
             )
             return False
 
-        transaction.status = status_list[status]
+        counted = is_counted(new_status)
         try:
+            if is_counted(transaction.status) != counted:
+                _upsert_rollups(
+                    [
+                        {
+                            "account_id": transaction.account_id,
+                            "transaction_id": transaction.transaction_id,
+                            "amount": transaction.amount,
+                            "timestamp": transaction.timestamp,
+                            "transaction_type": transaction.transaction_type,
+                            "post_tx_balance": transaction.post_tx_balance,
+                        }
+                    ],
+                    1 if counted else -1,
+                )
+            transaction.status = new_status
             db.session.commit()
             app.logger.info(
-                f"Transaction: {transaction_id} status updated to completed!"
+                "Transaction: %s status updated to completed!", transaction_id
             )
         except SQLAlchemyError as e:
             app.logger.error(
-                f"Error updating Transaction: {transaction_id} with error: {e}"
+                "Error updating Transaction: %s with error: %s", transaction_id, e
             )
             db.session.rollback()
             return False
@@ -479,25 +2093,685 @@ class TransactionRepository:
         return True
 
     @staticmethod
-    def get_recent_transactions(account_id: int, limit: int = 10):
-        transactions = (
-            Transaction.query.filter_by(account_id=account_id).limit(limit).all()
+    def update_transaction_statuses(
+        transaction_ids: Iterable[str],
+        status: int | str,
+        chunk_size: int = _IN_CLAUSE_CHUNK_SIZE,
+    ):
+        # ? Returns the number of Transactions updated. Chunks commit independently, so on failure the
+        # ? earlier chunks stay applied and the call can simply be repeated.
+        new_status = _transaction_status(status)
+        if new_status is None or not 0 < chunk_size <= _IN_CLAUSE_CHUNK_SIZE:
+            app.logger.error(
+                "Transactions were attempted to be updated with invalid status: %s or chunk size: %s!",
+                status,
+                chunk_size,
+            )
+            return False
+
+        updated = 0
+        try:
+            for _, rowcount in _update_status_in_chunks(
+                Transaction.__table__.c.transaction_id,
+                transaction_ids,
+                new_status,
+                chunk_size,
+                lambda chunk: TransactionRepository._move_rollups(chunk, new_status),
+            ):
+                updated += rowcount
+        except SQLAlchemyError as e:
+            app.logger.error(
+                "Error updating Transactions to %s after %s rows with error: %s",
+                new_status,
+                updated,
+                e,
+            )
+            db.session.rollback()
+            return False
+
+        app.logger.info("%s Transactions status updated to %s!", updated, new_status)
+
+        return updated
+
+    @staticmethod
+    def _move_rollups(transaction_ids: list[str], new_status: str):
+        # ? Only rows crossing between counted and excluded statuses change the rollups
+        counted = is_counted(new_status)
+        excluded = Transaction.status.in_(ROLLUP_EXCLUDED_STATUSES)
+        rows = db.session.execute(
+            select(
+                Transaction.account_id,
+                Transaction.transaction_id,
+                Transaction.amount,
+                Transaction.timestamp,
+                Transaction.transaction_type,
+                Transaction.post_tx_balance,
+            ).where(
+                Transaction.transaction_id.in_(transaction_ids),
+                excluded if counted else ~excluded,
+            )
+        ).mappings()
+        _upsert_rollups(rows, 1 if counted else -1)
+
+    @staticmethod
+    def get_recent_transactions(
+        account_id: int,
+        limit: int = 10,
+        before: str | None = None,
+        options: Iterable[Any] = (),
+        as_view: bool = False,
+    ):
+        # ? Walks the (account_id, timestamp) index backwards from the newest row (or from the before cursor, see make_cursor)
+        # ? so the cost depends on limit, not on the length of the history.
+        if limit < 1:
+            app.logger.error(
+                "Account: %s recent transactions requested with invalid limit: %s!",
+                account_id,
+                limit,
+            )
+            return False
+
+        query = Transaction.query.filter_by(account_id=account_id)
+        if not as_view:
+            query = query.options(*options)
+        position = None
+        if before is not None:
+            position = TransactionRepository._decode_cursor(before)
+            if position is None:
+                app.logger.error(
+                    "Account: %s recent transactions requested with invalid cursor: %s!",
+                    account_id,
+                    before,
+                )
+                return False
+            query = query.filter(
+                tuple_(Transaction.timestamp, Transaction.id) < position
+            )
+
+        query = query.order_by(
+            Transaction.timestamp.desc(), Transaction.id.desc()
+        ).limit(limit)
+        if as_view:
+            transactions = _select_views(query, TransactionView, Transaction)
+        else:
+            transactions = query.all()
+
+        archived = _archived_transactions(
+            as_view,
+            account_id=account_id,
+            before=position,
+            descending=True,
+            limit=limit,
         )
+        transactions = _merge_archived(archived, transactions, reverse=True)[:limit]
         if not transactions:
-            app.logger.error(f"Account: {account_id} does not have any transactions!")
+            app.logger.error("Account: %s does not have any transactions!", account_id)
             return False
 
         return transactions
 
     @staticmethod
-    def get_transaction_by_type(account_id: int, transaction_type: str):
-        transactions = Transaction.query.filter_by(
+    def get_transaction_by_type(
+        account_id: int,
+        transaction_type: str,
+        options: Iterable[Any] = (),
+        as_view: bool = False,
+    ):
+        query = Transaction.query.filter_by(
             account_id=account_id, transaction_type=transaction_type
-        ).all()
+        )
+        if as_view:
+            transactions = _select_views(query, TransactionView, Transaction)
+        else:
+            transactions = query.options(*options).all()
+        transactions = _merge_archived(
+            _archived_transactions(
+                as_view, account_id=account_id, transaction_type=transaction_type
+            ),
+            transactions,
+        )
         if not transactions:
             app.logger.error(
-                f"Account: {account_id} does not have any transactions of type {transaction_type}!"
+                "Account: %s does not have any transactions of type %s!",
+                account_id,
+                transaction_type,
             )
             return False
 
         return transactions
+
+    @staticmethod
+    def aggregate_transactions(
+        group_by: Iterable[str] = ("transaction_type",),
+        account_id: int | None = None,
+        start: float | None = None,
+        end: float | None = None,
+        transaction_type: str | None = None,
+        status: str | None = None,
+    ):
+        # ? Count, total, min, max and average amount computed in SQL, grouped by any of transaction_type, status,
+        # ? account_id and at most one time bucket (hour, day or month, UTC). start is inclusive, end exclusive.
+        # ? Returns one plain dict per group, ordered by the group keys, no ORM entities are loaded.
+        # ? Archived rows in range are aggregated from the segment columns and merged into the SQL groups.
+        group_by = tuple(group_by)
+        buckets = [key for key in group_by if key in _TIME_BUCKETS]
+        if (
+            len(buckets) > 1
+            or len(set(group_by)) != len(group_by)
+            or any(
+                key not in _TIME_BUCKETS and key not in _AGGREGATE_COLUMNS
+                for key in group_by
+            )
+        ):
+            app.logger.error(
+                "Transactions were attempted to be aggregated by invalid groups: %s!",
+                group_by,
+            )
+            return False
+
+        dialect = db.session.get_bind().dialect.name
+        keys = [
+            (
+                _time_bucket(key, dialect)
+                if key in _TIME_BUCKETS
+                else _AGGREGATE_COLUMNS[key]
+            ).label(key)
+            for key in group_by
+        ]
+
+        query = select(
+            *keys,
+            func.count().label("count"),
+            func.sum(Transaction.amount).label("total"),
+            func.min(Transaction.amount).label("min"),
+            func.max(Transaction.amount).label("max"),
+            func.avg(Transaction.amount).label("avg"),
+        )
+        for column, value in (
+            (Transaction.account_id, account_id),
+            (Transaction.transaction_type, transaction_type),
+            (Transaction.status, status),
+        ):
+            if value is not None:
+                query = query.where(column == value)
+        if start is not None:
+            query = query.where(Transaction.timestamp >= start)
+        if end is not None:
+            query = query.where(Transaction.timestamp < end)
+        if group_by:
+            # ? By label, so GROUP BY and ORDER BY share one sort instead of comparing two bucket expressions
+            query = query.group_by(*group_by).order_by(*group_by)
+
+        groups = [dict(row) for row in db.session.execute(query).mappings()]
+        archived = _aggregate_archived(
+            group_by, account_id, start, end, transaction_type, status
+        )
+        if not archived:
+            return groups
+
+        merged = {tuple(group[key] for key in group_by): group for group in groups}
+        for label, (count, total, minimum, maximum) in archived.items():
+            group = merged.get(label)
+            if group is None or not group["count"]:
+                merged[label] = {
+                    **dict(zip(group_by, label)),
+                    "count": count,
+                    "total": total,
+                    "min": minimum,
+                    "max": maximum,
+                    "avg": total / count,
+                }
+                continue
+
+            group["count"] += count
+            group["total"] += total
+            group["min"] = min(group["min"], minimum)
+            group["max"] = max(group["max"], maximum)
+            group["avg"] = group["total"] / group["count"]
+
+        return [merged[label] for label in sorted(merged)]
+
+    @staticmethod
+    def get_transaction_type_summary(
+        account_id: int, start: float | None = None, end: float | None = None
+    ):
+        # ? {transaction_type: {count, total, min, max, avg}}, what callers of get_transaction_by_type computed by hand
+        groups = TransactionRepository.aggregate_transactions(
+            ("transaction_type",), account_id=account_id, start=start, end=end
+        )
+        if groups is False:
+            return False
+
+        return {group.pop("transaction_type"): group for group in groups}
+
+    @staticmethod
+    def archive_transactions(before: float | None = None):
+        # ? Moves settled Transactions (ARCHIVED_STATUSES) older than before, ARCHIVE_RETENTION_DAYS ago by default,
+        # ? into the transaction archive: one segment per account range and month, published before its rows are
+        # ? deleted. The deletes commit together with a BalanceCheckpoint per Account and day, so balances as of
+        # ? archived days still resolve. A crash in between leaves rows in both places, readers prefer the table
+        # ? copy and the next run archives them again. Returns {"segments": ..., "rows": ...}.
+        archive = get_transaction_archive()
+        if archive is None:
+            app.logger.error("Transactions archival attempted without an archive!")
+            return False
+
+        if before is None:
+            before = (
+                time.time()
+                - app.config.get("ARCHIVE_RETENTION_DAYS", 365) * SECONDS_PER_DAY
+            )
+
+        columns = [getattr(Transaction, name) for name in SEGMENT_COLUMNS]
+        segments = rows = 0
+        try:
+            last_account_id = db.session.scalar(select(func.max(Account.id))) or 0
+            for account_min in range(1, last_account_id + 1, archive.account_range):
+                _, account_max = archive.account_bounds(account_min)
+                eligible = (
+                    Transaction.account_id.between(account_min, account_max),
+                    Transaction.status.in_(ARCHIVED_STATUSES),
+                    Transaction.timestamp < before,
+                )
+                oldest = db.session.scalar(
+                    select(func.min(Transaction.timestamp)).where(*eligible)
+                )
+                while oldest is not None:
+                    month, month_start, month_end = month_bounds(oldest)
+                    batch = [
+                        dict(row)
+                        for row in db.session.execute(
+                            select(*columns).where(
+                                *eligible,
+                                Transaction.timestamp >= month_start,
+                                Transaction.timestamp < month_end,
+                            )
+                        ).mappings()
+                    ]
+                    archive.publish(
+                        [archive.write_segment(month, account_min, account_max, batch)]
+                    )
+                    TransactionRepository._drop_archived(batch)
+                    segments += 1
+                    rows += len(batch)
+
+                    oldest = db.session.scalar(
+                        select(func.min(Transaction.timestamp)).where(
+                            *eligible, Transaction.timestamp >= month_end
+                        )
+                    )
+        except (SQLAlchemyError, OSError) as e:
+            app.logger.error(
+                "Error archiving transactions after %s rows with error: %s", rows, e
+            )
+            db.session.rollback()
+            return False
+
+        app.logger.info("%s Transactions archived into %s segments!", rows, segments)
+
+        return {"segments": segments, "rows": rows}
+
+    @staticmethod
+    def _drop_archived(rows: list[dict[str, Any]]):
+        # ? Closing balance per Account and day, rows are in no particular order
+        closing: dict[tuple[int, int], dict[str, Any]] = {}
+        for row in rows:
+            key = (row["account_id"], rollup_day(row["timestamp"]))
+            current = closing.get(key)
+            if current is None or (row["timestamp"], row["id"]) > (
+                current["timestamp"],
+                current["id"],
+            ):
+                closing[key] = row
+
+        # ? Archiving rows again after an interrupted run finds their checkpoints already written
+        timestamps = [row["timestamp"] for row in closing.values()]
+        accounts = sorted({account_id for account_id, _ in closing})
+        existing: set[tuple[int, float]] = set()
+        for start in range(0, len(accounts), _IN_CLAUSE_CHUNK_SIZE):
+            existing.update(
+                db.session.execute(
+                    select(
+                        BalanceCheckpoint.account_id, BalanceCheckpoint.timestamp
+                    ).where(
+                        BalanceCheckpoint.account_id.in_(
+                            accounts[start : start + _IN_CLAUSE_CHUNK_SIZE]
+                        ),
+                        BalanceCheckpoint.timestamp.between(
+                            min(timestamps), max(timestamps)
+                        ),
+                    )
+                ).tuples()
+            )
+        checkpoints = [
+            {
+                "account_id": row["account_id"],
+                "timestamp": row["timestamp"],
+                "balance": row["post_tx_balance"],
+            }
+            for row in closing.values()
+            if (row["account_id"], row["timestamp"]) not in existing
+        ]
+        if checkpoints:
+            db.session.execute(insert(BalanceCheckpoint), checkpoints)
+        ids = [row["id"] for row in rows]
+        for start in range(0, len(ids), _IN_CLAUSE_CHUNK_SIZE):
+            db.session.execute(
+                delete(Transaction).where(
+                    Transaction.id.in_(ids[start : start + _IN_CLAUSE_CHUNK_SIZE])
+                )
+            )
+        db.session.commit()
+
+    @staticmethod
+    def export_snapshot(chunk_size: int = 100_000):
+        # ? Appends Transactions above the snapshot's high-water mark to the columnar snapshot, one primary key range
+        # ? per chunk, so a refresh only reads new rows. Later status changes and archival are not reflected, the
+        # ? snapshot is an append only log for analytics. Returns the number of rows exported.
+        snapshot = get_transaction_snapshot()
+        if snapshot is None:
+            app.logger.error("Snapshot export attempted without a snapshot!")
+            return False
+
+        if chunk_size < 1:
+            app.logger.error(
+                "Snapshot export attempted with invalid chunk size: %s!", chunk_size
+            )
+            return False
+
+        exported = 0
+        try:
+            last_id = snapshot.high_water_mark
+            while True:
+                rows = (
+                    db.session.execute(
+                        select(
+                            Transaction.id,
+                            Transaction.account_id,
+                            Transaction.amount,
+                            Transaction.timestamp,
+                            Transaction.transaction_type,
+                            Transaction.status,
+                        )
+                        .where(Transaction.id > last_id)
+                        .order_by(Transaction.id)
+                        .limit(chunk_size)
+                    )
+                    .mappings()
+                    .all()
+                )
+                if not rows:
+                    break
+                exported += snapshot.append(rows)
+                last_id = rows[-1]["id"]
+        except (SQLAlchemyError, OSError, SnapshotError) as e:
+            app.logger.error(
+                "Error exporting snapshot after %s rows with error: %s", exported, e
+            )
+            db.session.rollback()
+            return False
+
+        app.logger.info("%s Transactions exported to the snapshot!", exported)
+
+        return exported
+
+
+@instrument_repository
+class RollupRepository:
+    @staticmethod
+    def rebuild_rollups(
+        account_ids: Iterable[int] | None = None, chunk_size: int = 1000
+    ):
+        # ? Backfill / repair: recomputes the rollups of the given Accounts (every Account by default) from the
+        # ? ledger, one delete + INSERT ... SELECT and commit per chunk of Accounts. Archived Transactions are added
+        # ? back with an upsert. Chunks are idempotent, so a failed rebuild can simply be run again.
+        # ? Returns the number of rollup rows written.
+        if not 0 < chunk_size <= _IN_CLAUSE_CHUNK_SIZE * 2:
+            app.logger.error(
+                "Rollup rebuild attempted with invalid chunk size: %s!", chunk_size
+            )
+            return False
+
+        written = 0
+        try:
+            for chunk in _account_id_chunks(account_ids, chunk_size):
+                db.session.execute(
+                    delete(DailyRollup).where(DailyRollup.account_id.in_(chunk))
+                )
+                result = db.session.execute(
+                    insert(DailyRollup).from_select(
+                        [
+                            "account_id",
+                            "day",
+                            "transaction_type",
+                            "count",
+                            "credits",
+                            "debits",
+                            "closing_balance",
+                            "closing_timestamp",
+                            "last_transaction_id",
+                        ],
+                        RollupRepository._rollups_from_ledger(chunk),
+                    )
+                )
+                if RollupRepository._add_archived_rollups(chunk):
+                    written += db.session.scalar(
+                        select(func.count())
+                        .select_from(DailyRollup)
+                        .where(DailyRollup.account_id.in_(chunk))
+                    )
+                else:
+                    written += result.rowcount
+                db.session.commit()
+        except SQLAlchemyError as e:
+            app.logger.error(
+                "Error rebuilding rollups after %s rows with error: %s", written, e
+            )
+            db.session.rollback()
+            return False
+
+        app.logger.info("Rollups rebuilt with %s rows!", written)
+
+        return written
+
+    @staticmethod
+    def _add_archived_rollups(account_ids: list[int]) -> bool:
+        archive = get_transaction_archive()
+        if archive is None or not archive.segments():
+            return False
+
+        archived = [
+            row
+            for account_id in account_ids
+            for row in archive.rows(account_id=account_id)
+            if is_counted(row["status"])
+        ]
+        if not archived:
+            return False
+
+        # ? Leftovers of an interrupted archival run were already counted from the table
+        transaction_ids = [row["transaction_id"] for row in archived]
+        hot: set[str] = set()
+        for start in range(0, len(transaction_ids), _IN_CLAUSE_CHUNK_SIZE):
+            hot.update(
+                db.session.scalars(
+                    select(Transaction.transaction_id).where(
+                        Transaction.transaction_id.in_(
+                            transaction_ids[start : start + _IN_CLAUSE_CHUNK_SIZE]
+                        )
+                    )
+                )
+            )
+        _upsert_rollups(row for row in archived if row["transaction_id"] not in hot)
+        return True
+
+    @staticmethod
+    def _rollups_from_ledger(account_ids: list[int]):
+        # ? One pass with window functions: per rollup key totals, and the closing row ranked by (timestamp, id)
+        day = cast(Transaction.timestamp / SECONDS_PER_DAY, Integer)
+        partition = (Transaction.account_id, day, Transaction.transaction_type)
+        ranked = (
+            select(
+                Transaction.account_id,
+                day.label("day"),
+                Transaction.transaction_type,
+                func.count().over(partition_by=partition).label("count"),
+                func.sum(case((Transaction.amount >= 0, Transaction.amount), else_=0.0))
+                .over(partition_by=partition)
+                .label("credits"),
+                func.sum(case((Transaction.amount < 0, -Transaction.amount), else_=0.0))
+                .over(partition_by=partition)
+                .label("debits"),
+                Transaction.post_tx_balance,
+                Transaction.timestamp,
+                Transaction.transaction_id,
+                func.row_number()
+                .over(
+                    partition_by=partition,
+                    order_by=(Transaction.timestamp.desc(), Transaction.id.desc()),
+                )
+                .label("position"),
+            )
+            .where(
+                Transaction.account_id.in_(account_ids),
+                Transaction.status.not_in(ROLLUP_EXCLUDED_STATUSES),
+            )
+            .subquery()
+        )
+        return select(
+            ranked.c.account_id,
+            ranked.c.day,
+            ranked.c.transaction_type,
+            ranked.c.count,
+            ranked.c.credits,
+            ranked.c.debits,
+            ranked.c.post_tx_balance,
+            ranked.c.timestamp,
+            ranked.c.transaction_id,
+        ).where(ranked.c.position == 1)
+
+    @staticmethod
+    def get_daily_rollups(
+        account_id: int,
+        start: datetime.date | None = None,
+        end: datetime.date | None = None,
+    ):
+        query = DailyRollup.query.filter_by(account_id=account_id)
+        if start is not None:
+            query = query.filter(DailyRollup.day >= date_to_day(start))
+        if end is not None:
+            query = query.filter(DailyRollup.day <= date_to_day(end))
+
+        rollups = query.order_by(DailyRollup.day, DailyRollup.transaction_type).all()
+        if not rollups:
+            app.logger.error("Account: %s does not have any rollups!", account_id)
+            return False
+
+        return rollups
+
+    @staticmethod
+    def get_statement_summary(
+        account_id: int, end: datetime.date | None = None, days: int = 365
+    ):
+        # ? Totals, per type and per month figures plus opening and closing balances for the days up to end
+        # ? (today, UTC, by default). Reads one grouped row per day and per type, never the Transactions.
+        if days < 1:
+            app.logger.error(
+                "Account: %s statement requested with invalid days: %s!",
+                account_id,
+                days,
+            )
+            return False
+
+        end_day = date_to_day(end) if end is not None else rollup_day(time.time())
+        start_day = end_day - days + 1
+        in_range = (
+            DailyRollup.account_id == account_id,
+            DailyRollup.day >= start_day,
+            DailyRollup.day <= end_day,
+        )
+        totals = (
+            func.sum(DailyRollup.count),
+            func.sum(DailyRollup.credits),
+            func.sum(DailyRollup.debits),
+        )
+
+        daily = db.session.execute(
+            select(DailyRollup.day, *totals)
+            .where(*in_range)
+            .group_by(DailyRollup.day)
+            .order_by(DailyRollup.day)
+        ).all()
+        opening_balance = RollupRepository._closing_balance(account_id, start_day - 1)
+        if (
+            not daily
+            and opening_balance is None
+            and db.session.get(Account, account_id) is None
+        ):
+            app.logger.error(
+                "Account: %s statement requested but Account does not exist!",
+                account_id,
+            )
+            return False
+
+        by_type = {
+            transaction_type: {"count": count, "credits": credits, "debits": debits}
+            for transaction_type, count, credits, debits in db.session.execute(
+                select(DailyRollup.transaction_type, *totals)
+                .where(*in_range)
+                .group_by(DailyRollup.transaction_type)
+            )
+        }
+
+        months: dict[str, dict[str, Any]] = {}
+        for day, count, credits, debits in daily:
+            month = months.setdefault(
+                day_to_date(day).strftime("%Y-%m"),
+                {"count": 0, "credits": 0.0, "debits": 0.0},
+            )
+            month["count"] += count
+            month["credits"] += credits
+            month["debits"] += debits
+
+        credits = sum(row[2] for row in daily)
+        debits = sum(row[3] for row in daily)
+        closing_balance = (
+            RollupRepository._closing_balance(account_id, end_day)
+            if daily
+            else opening_balance
+        )
+        return {
+            "account_id": account_id,
+            "start": day_to_date(start_day).isoformat(),
+            "end": day_to_date(end_day).isoformat(),
+            "count": sum(row[1] for row in daily),
+            "credits": credits,
+            "debits": debits,
+            "net": credits - debits,
+            "opening_balance": opening_balance,
+            "closing_balance": closing_balance,
+            "by_type": by_type,
+            "months": [
+                {"month": month, **figures} for month, figures in months.items()
+            ],
+        }
+
+    @staticmethod
+    def _closing_balance(account_id: int, day: int) -> float | None:
+        # ? Balance after the last counted Transaction on or before day, None if there is none
+        last_day = (
+            select(func.max(DailyRollup.day))
+            .where(DailyRollup.account_id == account_id, DailyRollup.day <= day)
+            .scalar_subquery()
+        )
+        rows = db.session.execute(
+            select(
+                DailyRollup.closing_timestamp,
+                DailyRollup.last_transaction_id,
+                DailyRollup.closing_balance,
+            ).where(DailyRollup.account_id == account_id, DailyRollup.day == last_day)
+        ).all()
+        if not rows:
+            return None
+
+        return max(rows)[2]
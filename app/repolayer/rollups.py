@@ -0,0 +1,213 @@
+import datetime
+from typing import Any, Iterable, Mapping
+
+import click
+from sqlalchemy import and_, case, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+from app.datalayer import DailyRollup, Transaction
+
+SECONDS_PER_DAY = 86_400
+
+# ? Transactions in these statuses are left out of the rollups, moving in or out of them adjusts the totals
+ROLLUP_EXCLUDED_STATUSES = ("declined", "refunded")
+
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+_UPSERTS: dict[str, Any] = {}
+
+
+class RollupsUnsupported(RuntimeError):
+    pass
+
+
+def rollup_day(timestamp: float) -> int:
+    return int(timestamp // SECONDS_PER_DAY)
+
+
+def day_to_date(day: int) -> datetime.date:
+    return datetime.date(1970, 1, 1) + datetime.timedelta(days=day)
+
+
+def date_to_day(date: datetime.date) -> int:
+    return (date - datetime.date(1970, 1, 1)).days
+
+
+def is_counted(status: str | None) -> bool:
+    # ? New rows without an explicit status default to "processing"
+    return status not in ROLLUP_EXCLUDED_STATUSES
+
+
+def rollup_deltas(
+    transactions: Iterable[Mapping[str, Any]], sign: int = 1
+) -> list[dict[str, Any]]:
+    # ? Folds ledger rows (account_id, transaction_id, amount, timestamp, transaction_type, post_tx_balance)
+    # ? into one upsert parameter set per rollup key. sign=-1 takes the rows back out, leaving closing balances to
+    # ? the reclose_* statements below.
+    # ? The closing row is the latest by (timestamp, transaction_id): ids are not assigned yet on the insert paths,
+    # ? and within one timestamp transaction_ids are generated in posting order.
+    deltas: dict[tuple[int, int, str], dict[str, Any]] = {}
+    for row in transactions:
+        key = (
+            row["account_id"],
+            rollup_day(row["timestamp"]),
+            row["transaction_type"],
+        )
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = {
+                "account_id": key[0],
+                "day": key[1],
+                "transaction_type": key[2],
+                "count": 0,
+                "credits": 0.0,
+                "debits": 0.0,
+                "closing_balance": 0.0,
+                "closing_timestamp": 0.0,
+                "last_transaction_id": "",
+            }
+
+        amount = row["amount"]
+        delta["count"] += sign
+        if amount >= 0:
+            delta["credits"] += sign * amount
+        else:
+            delta["debits"] -= sign * amount
+        if sign > 0 and (row["timestamp"], row["transaction_id"]) > (
+            delta["closing_timestamp"],
+            delta["last_transaction_id"],
+        ):
+            delta["closing_balance"] = row["post_tx_balance"]
+            delta["closing_timestamp"] = row["timestamp"]
+            delta["last_transaction_id"] = row["transaction_id"]
+
+    return list(deltas.values())
+
+
+def rollup_key(row: Mapping[str, Any]) -> tuple[int, int, str]:
+    return row["account_id"], rollup_day(row["timestamp"]), row["transaction_type"]
+
+
+def _rollup_where(key: tuple[int, int, str]) -> tuple:
+    account_id, day, transaction_type = key
+    return (
+        DailyRollup.account_id == account_id,
+        DailyRollup.day == day,
+        DailyRollup.transaction_type == transaction_type,
+    )
+
+
+def closing_transaction_id(key: tuple[int, int, str]):
+    # ? SELECT of the rollup's last_transaction_id, through the (account_id, day, transaction_type) unique index
+    return select(DailyRollup.last_transaction_id).where(*_rollup_where(key))
+
+
+def latest_counted(key: tuple[int, int, str], excluded_ids: Iterable[str]):
+    # ? The latest counted Transaction of the rollup key once excluded_ids are taken out, walking the
+    # ? (account_id, transaction_type, timestamp) index backwards
+    account_id, day, transaction_type = key
+    return (
+        select(
+            Transaction.post_tx_balance,
+            Transaction.timestamp,
+            Transaction.transaction_id,
+        )
+        .where(
+            Transaction.account_id == account_id,
+            Transaction.transaction_type == transaction_type,
+            Transaction.timestamp >= day * SECONDS_PER_DAY,
+            Transaction.timestamp < (day + 1) * SECONDS_PER_DAY,
+            Transaction.status.not_in(ROLLUP_EXCLUDED_STATUSES),
+            Transaction.transaction_id.not_in(list(excluded_ids)),
+        )
+        .order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+        .limit(1)
+    )
+
+
+def reclose(key: tuple[int, int, str], closing: Mapping[str, Any]):
+    # ? Moves the rollup's closing balance to closing, a row of latest_counted
+    return (
+        update(DailyRollup)
+        .where(*_rollup_where(key))
+        .values(
+            closing_balance=closing["post_tx_balance"],
+            closing_timestamp=closing["timestamp"],
+            last_transaction_id=closing["transaction_id"],
+        )
+    )
+
+
+def check_dialect(dialect_name: str):
+    if dialect_name not in _DIALECT_INSERTS:
+        raise RollupsUnsupported(
+            f"Rollups need INSERT ... ON CONFLICT, supported databases are {', '.join(_DIALECT_INSERTS)}, got {dialect_name}!"
+        )
+
+
+def rollup_upsert(dialect_name: str):
+    # ? INSERT ... ON CONFLICT (account_id, day, transaction_type) DO UPDATE adding the deltas,
+    # ? executed with a list of rollup_deltas so every write path costs one extra statement
+    upsert = _UPSERTS.get(dialect_name)
+    if upsert is not None:
+        return upsert
+
+    check_dialect(dialect_name)
+
+    table = DailyRollup.__table__
+    statement = _DIALECT_INSERTS[dialect_name](table)
+    excluded = statement.excluded
+    newer = or_(
+        excluded.closing_timestamp > table.c.closing_timestamp,
+        and_(
+            excluded.closing_timestamp == table.c.closing_timestamp,
+            excluded.last_transaction_id > table.c.last_transaction_id,
+        ),
+    )
+    upsert = _UPSERTS[dialect_name] = statement.on_conflict_do_update(
+        index_elements=[table.c.account_id, table.c.day, table.c.transaction_type],
+        set_={
+            "count": table.c.count + excluded.count,
+            "credits": table.c.credits + excluded.credits,
+            "debits": table.c.debits + excluded.debits,
+            "closing_balance": case(
+                (newer, excluded.closing_balance), else_=table.c.closing_balance
+            ),
+            "closing_timestamp": case(
+                (newer, excluded.closing_timestamp),
+                else_=table.c.closing_timestamp,
+            ),
+            "last_transaction_id": case(
+                (newer, excluded.last_transaction_id),
+                else_=table.c.last_transaction_id,
+            ),
+        },
+    )
+    return upsert
+
+
+def register_extension(app):
+    # ? Every write path upserts its rollups, so an unsupported database is rejected here rather than on first write
+    check_dialect(make_url(app.config["SQLALCHEMY_DATABASE_URI"]).get_backend_name())
+
+    # ? flask --app "app:create_app()" rebuild-rollups [--account ID ...] [--chunk-size N]
+    @app.cli.command("rebuild-rollups")
+    @click.option(
+        "--account",
+        "account_ids",
+        type=int,
+        multiple=True,
+        help="Only rebuild these Accounts, every Account by default.",
+    )
+    @click.option("--chunk-size", type=int, default=1000)
+    def rebuild_rollups_command(account_ids: tuple[int, ...], chunk_size: int):
+        from app.repolayer.repositories import RollupRepository
+
+        written = RollupRepository.rebuild_rollups(account_ids or None, chunk_size)
+        if written is False:
+            raise click.ClickException(
+                "Rollup rebuild failed, see the log for details."
+            )
+        click.echo(f"Rebuilt {written} rollup rows.")
+
+    app.logger.info("Rollups extension registered.")
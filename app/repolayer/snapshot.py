@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+from typing import Any, Iterable, Mapping
+
+import click
+import numpy as np
+from flask import current_app
+
+# ? One fixed width little endian file per column plus snapshot.json, the header. Rows are appended in Transaction
+# ? id order and the header's rows / high_water_mark only move after the column files are fsynced, so readers that
+# ? map exactly header["rows"] rows never see a partial append. String columns are stored as codes into the
+# ? header's append only dictionaries. The high-water mark relies on Transaction ids never being reused, which
+# ? the table's AUTOINCREMENT guarantees even after archival deletes the newest rows.
+SNAPSHOT_COLUMNS = {
+    "account_id": "<i8",
+    "amount": "<f8",
+    "timestamp": "<f8",
+    "transaction_type": "<u2",
+    "status": "<u2",
+}
+_CODED_COLUMNS = ("transaction_type", "status")
+
+
+class SnapshotError(RuntimeError):
+    pass
+
+
+class TransactionSnapshot:
+    # ? Append only, analytics reads columns() without touching the database
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.header_path = os.path.join(directory, "snapshot.json")
+        self._lock = threading.Lock()
+
+    def header(self) -> dict[str, Any]:
+        try:
+            with open(self.header_path, encoding="utf-8") as header:
+                return json.load(header)
+        except FileNotFoundError:
+            return {
+                "version": 1,
+                "rows": 0,
+                "high_water_mark": 0,
+                "columns": {
+                    name: {"file": f"{name}.bin", "dtype": dtype}
+                    for name, dtype in SNAPSHOT_COLUMNS.items()
+                },
+                "dictionaries": {name: [] for name in _CODED_COLUMNS},
+            }
+
+    @property
+    def high_water_mark(self) -> int:
+        return self.header()["high_water_mark"]
+
+    def append(self, rows: Iterable[Mapping[str, Any]]) -> int:
+        # ? rows carry id, account_id, amount, timestamp, transaction_type and status, in ascending id order.
+        # ? Returns the number of rows appended.
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        with self._lock:
+            header = self.header()
+            if rows[0]["id"] <= header["high_water_mark"]:
+                raise SnapshotError(
+                    f"Row {rows[0]['id']} is not above the high-water mark {header['high_water_mark']}!"
+                )
+
+            dictionaries = header["dictionaries"]
+            codes = {
+                name: {value: code for code, value in enumerate(dictionaries[name])}
+                for name in _CODED_COLUMNS
+            }
+            arrays = {}
+            for name, column in header["columns"].items():
+                if name in _CODED_COLUMNS:
+                    values = []
+                    for row in rows:
+                        code = codes[name].get(row[name])
+                        if code is None:
+                            code = codes[name][row[name]] = len(dictionaries[name])
+                            dictionaries[name].append(row[name])
+                        values.append(code)
+                else:
+                    values = [row[name] for row in rows]
+                arrays[name] = np.asarray(values, dtype=column["dtype"])
+
+            os.makedirs(self.directory, exist_ok=True)
+            for name, column in header["columns"].items():
+                self._append_column(column, header["rows"], arrays[name])
+
+            header["rows"] += len(rows)
+            header["high_water_mark"] = rows[-1]["id"]
+            temporary = f"{self.header_path}.{os.getpid()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(header, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.header_path)
+
+        return len(rows)
+
+    def _append_column(self, column: Mapping[str, Any], rows: int, array: np.ndarray):
+        path = os.path.join(self.directory, column["file"])
+        with open(path, "ab") as file:
+            # ? Drops whatever an interrupted append left past the committed rows
+            file.truncate(rows * np.dtype(column["dtype"]).itemsize)
+            file.write(array.tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+
+    def columns(self) -> dict[str, np.ndarray]:
+        # ? Read only numpy.memmap per column, sized by the header so concurrent appends stay invisible.
+        # ? String columns hold codes, see code() and dictionary().
+        header = self.header()
+        columns = {}
+        for name, column in header["columns"].items():
+            if header["rows"] == 0:
+                columns[name] = np.empty(0, dtype=column["dtype"])
+                continue
+            columns[name] = np.memmap(
+                os.path.join(self.directory, column["file"]),
+                dtype=column["dtype"],
+                mode="r",
+                shape=(header["rows"],),
+            )
+
+        return columns
+
+    def dictionary(self, name: str) -> list[str]:
+        return self.header()["dictionaries"][name]
+
+    def code(self, name: str, value: str) -> int | None:
+        # ? e.g. columns["transaction_type"] == snapshot.code("transaction_type", "credit")
+        try:
+            return self.dictionary(name).index(value)
+        except ValueError:
+            return None
+
+
+def get_transaction_snapshot() -> TransactionSnapshot | None:
+    return current_app.extensions.get("transaction_snapshot")
+
+
+def register_extension(app):
+    snapshot = TransactionSnapshot(
+        app.config.get("SNAPSHOT_DIR") or os.path.join(app.instance_path, "snapshot")
+    )
+    app.extensions["transaction_snapshot"] = snapshot
+
+    # ? flask --app "app:create_app()" export-snapshot [--chunk-size N]
+    @app.cli.command("export-snapshot")
+    @click.option("--chunk-size", type=int, default=100_000)
+    def export_snapshot_command(chunk_size: int):
+        from app.repolayer.repositories import TransactionRepository
+
+        exported = TransactionRepository.export_snapshot(chunk_size)
+        if exported is False:
+            raise click.ClickException(
+                "Snapshot export failed, see the log for details."
+            )
+        click.echo(f"Exported {exported} transactions.")
+
+    app.logger.info(
+        "Transaction snapshot extension registered at %s.", snapshot.directory
+    )
+
+    return snapshot
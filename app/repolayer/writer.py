@@ -0,0 +1,202 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+
+from flask import current_app
+
+from app.ext.database import DB as db
+from app.repolayer.repositories import TransactionRepository
+
+_STOP = object()
+
+
+class GroupCommitWriterClosed(RuntimeError):
+    pass
+
+
+class GroupCommitWriter:
+    # ? Write-behind buffer for Transaction inserts: one background thread drains the queue and commits up to
+    # ? max_batch rows at once, or whatever arrived within max_delay seconds of the first row of the batch.
+    # ? A future only resolves after its batch commits, with the new transaction_id or False if it was rejected.
+    def __init__(
+        self,
+        app,
+        max_batch: int = 500,
+        max_delay: float = 0.005,
+        max_pending: int = 10_000,
+    ):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Condition()
+        self._closed = False
+        self._submitting = 0
+        self._thread = threading.Thread(
+            target=self._run, name="group-commit-writer", daemon=True
+        )
+
+        self.batches = 0
+        self.rows = 0
+        self.failed = 0
+        self.retried = 0
+        self.max_batch_seen = 0
+
+        self._thread.start()
+
+    def submit(
+        self,
+        account_id: int,
+        amount: float,
+        description: str,
+        transaction_type: str,
+        timestamp: float | None = None,
+    ) -> Future:
+        row = {
+            "account_id": account_id,
+            "amount": amount,
+            "description": description,
+            "transaction_type": transaction_type,
+        }
+        if timestamp is not None:
+            row["timestamp"] = timestamp
+
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise GroupCommitWriterClosed("Group commit writer is closed!")
+            self._submitting += 1
+        try:
+            # ? Blocks once max_pending rows are waiting, which pushes back on producers instead of growing memory.
+            # ? Outside the lock so a full queue never stalls close() or the other producers' closed check.
+            self._queue.put((row, future))
+        finally:
+            with self._lock:
+                self._submitting -= 1
+                if not self._submitting:
+                    self._lock.notify_all()
+        return future
+
+    def close(self, timeout: float | None = None):
+        # ? Rows submitted before close are still committed: the stop marker is queued behind every accepted row
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            while self._submitting:
+                self._lock.wait()
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending": self._queue.qsize(),
+            "batches": self.batches,
+            "rows": self.rows,
+            "failed": self.failed,
+            "retried": self.retried,
+            "avg_batch": self.rows / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch_seen,
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = (
+                        self._queue.get(timeout=remaining)
+                        if remaining > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+
+    def _commit(self, rows: list[dict]) -> list[str | bool]:
+        with self.app.app_context():
+            try:
+                return TransactionRepository.create_transactions_bulk(
+                    rows, chunk_size=len(rows)
+                )
+            finally:
+                db.session.remove()
+
+    def _flush(self, batch: list[tuple[dict, Future]]):
+        try:
+            results: list[Any] = self._commit([row for row, _ in batch])
+        except Exception as e:
+            self.app.logger.error(
+                "Group commit of %s Transactions failed with error: %s", len(batch), e
+            )
+            results = [e] * len(batch)
+
+        # ? One bad row fails its whole chunk, so rows of a failed multi row batch are retried one by one and
+        # ? only the rows that fail on their own are reported. Rejected rows are simply rejected again.
+        if len(batch) > 1:
+            for index, result in enumerate(results):
+                if result is False or isinstance(result, Exception):
+                    self.retried += 1
+                    try:
+                        results[index] = self._commit([batch[index][0]])[0]
+                    except Exception as e:
+                        self.app.logger.error(
+                            "Group commit retry of a Transaction failed with error: %s",
+                            e,
+                        )
+                        results[index] = e
+
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        self.batches += 1
+        self.rows += len(batch)
+        self.failed += sum(
+            1 for result in results if result is False or isinstance(result, Exception)
+        )
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+
+def get_group_commit_writer() -> GroupCommitWriter | None:
+    return current_app.extensions.get("group_commit_writer")
+
+
+def register_extension(app):
+    if not app.config.get("GROUP_COMMIT_ENABLED", False):
+        return None
+
+    writer = GroupCommitWriter(
+        app,
+        max_batch=app.config.get("GROUP_COMMIT_MAX_BATCH", 500),
+        max_delay=app.config.get("GROUP_COMMIT_MAX_DELAY", 0.005),
+        max_pending=app.config.get("GROUP_COMMIT_MAX_PENDING", 10_000),
+    )
+    app.extensions["group_commit_writer"] = writer
+    atexit.register(writer.close)
+
+    app.logger.info(
+        "Group commit writer extension registered with batches of %s rows or %s seconds.",
+        writer.max_batch,
+        writer.max_delay,
+    )
+
+    return writer
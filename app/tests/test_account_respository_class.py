@@ -1,10 +1,14 @@
+import time
+
 import pytest
+from sqlalchemy.orm import joinedload, selectinload
 
 
 from app import create_app
-from app.repolayer import UserRepository, AccountRepository
-from app.datalayer import User, Account
+from app.repolayer import UserRepository, AccountRepository, TransactionRepository
+from app.datalayer import User, Account, Transaction, AccountView
 from app.ext.database import DB as db
+from app.ext.metrics import assert_max_queries
 
 
 def quick_add_test_user():
@@ -23,8 +27,7 @@ def quick_add_test_user():
 
 @pytest.fixture()
 def app():
-    app = create_app()
-    app.config.update(
+    app = create_app(
         {
             "TESTING": True,
             "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
@@ -190,3 +193,419 @@ def test_flag_account_failure(db_session):
     user_repo = quick_add_test_user()
     result = AccountRepository.flag_account(999)
     assert result is False
+
+
+def test_update_account_balance_atomic_success(db_session):
+    user_repo = quick_add_test_user()
+    account_repo = AccountRepository()
+    account_repo.create_bank_account(1, "checking", 0.5)
+    account_id = db_session.query(Account).first().id
+
+    assert account_repo.update_account_balance(account_id, 100.0, atomic=True) == 100.0
+    assert account_repo.update_account_balance(account_id, -25.0, atomic=True) == 75.0
+    assert db_session.query(Account).get(account_id).balance == 75.0
+
+    # ? Draining the account is a success, not a falsy failure
+    drained = account_repo.update_account_balance(account_id, -75.0, atomic=True)
+    assert drained == 0.0 and drained is not None
+
+
+def test_update_account_balance_atomic_with_transaction(db_session):
+    user_repo = quick_add_test_user()
+    account_repo = AccountRepository()
+    account_repo.create_bank_account(1, "checking", 0.5)
+    account_id = db_session.query(Account).first().id
+
+    new_balance = account_repo.update_account_balance(
+        account_id,
+        40.0,
+        atomic=True,
+        description="Deposit",
+        transaction_type="credit",
+    )
+
+    assert new_balance == 40.0
+    transaction = db_session.query(Transaction).filter_by(account_id=account_id).one()
+    assert transaction.amount == 40.0
+    assert transaction.post_tx_balance == 40.0
+
+
+def test_update_account_balance_atomic_failure(db_session):
+    user_repo = quick_add_test_user()
+    account_repo = AccountRepository()
+    account_repo.create_bank_account(1, "checking", 0.5)
+    account_id = db_session.query(Account).first().id
+
+    assert account_repo.update_account_balance(99, 100.0, atomic=True) is None
+    assert (
+        account_repo.update_account_balance(
+            account_id, 100.0, atomic=True, transaction_type="credit"
+        )
+        is None
+    )
+    assert db_session.query(Account).get(account_id).balance == 0.0
+    assert db_session.query(Transaction).count() == 0
+
+
+def test_accrue_interest_success(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 3.65)
+    AccountRepository.create_bank_account(1, "checking", 3.65)
+    AccountRepository.create_bank_account(1, "savings", 3.65)
+    AccountRepository.update_account_balance(1, 1000.0)
+    AccountRepository.update_account_balance(2, 1000.0)
+    AccountRepository.disable_account(2)
+
+    result = AccountRepository.accrue_interest("2024-01-01", chunk_size=2)
+
+    assert result["status"] == "completed"
+    assert result["accounts_accrued"] == 1
+    assert result["total_interest"] == pytest.approx(0.1)
+    assert db_session.get(Account, 1).balance == pytest.approx(1000.1)
+    assert db_session.get(Account, 2).balance == 1000.0
+    assert db_session.get(Account, 3).balance == 0.0
+    interest = (
+        db_session.query(Transaction).filter_by(transaction_type="interest").all()
+    )
+    assert len(interest) == 1
+    assert interest[0].account_id == 1
+    assert interest[0].post_tx_balance == pytest.approx(1000.1)
+
+
+def test_accrue_interest_completed_run_is_not_repeated(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 3.65)
+    AccountRepository.update_account_balance(1, 1000.0)
+
+    AccountRepository.accrue_interest("2024-01-01")
+    result = AccountRepository.accrue_interest("2024-01-01")
+
+    assert result["accounts_accrued"] == 1
+    assert db_session.get(Account, 1).balance == pytest.approx(1000.1)
+
+
+def test_accrue_interest_resumes_after_failed_chunk(db_session, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+    from app.repolayer import repositories
+
+    quick_add_test_user()
+    for _ in range(3):
+        AccountRepository.create_bank_account(1, "savings", 3.65)
+    for account_id in (1, 2, 3):
+        AccountRepository.update_account_balance(account_id, 1000.0)
+
+    apply_balance_deltas = repositories._apply_balance_deltas
+    calls = []
+
+    def fail_second_chunk(deltas):
+        calls.append(deltas)
+        if len(calls) == 2:
+            raise OperationalError("UPDATE", {}, Exception("disk I/O error"))
+        apply_balance_deltas(deltas)
+
+    monkeypatch.setattr(repositories, "_apply_balance_deltas", fail_second_chunk)
+    assert AccountRepository.accrue_interest("2024-01-01", chunk_size=1) is False
+
+    result = AccountRepository.accrue_interest("2024-01-01", chunk_size=1)
+
+    assert result["status"] == "completed"
+    assert result["accounts_accrued"] == 3
+    assert [
+        db_session.get(Account, account_id).balance for account_id in (1, 2, 3)
+    ] == pytest.approx([1000.1, 1000.1, 1000.1])
+    assert (
+        db_session.query(Transaction).filter_by(transaction_type="interest").count()
+        == 3
+    )
+
+
+def test_accrue_interest_carries_sub_cent_accruals(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.update_account_balance(1, 100.0)
+
+    # ? $100 at 1.5% earns about 0.41 cents a day, posted once a whole cent has built up
+    result = AccountRepository.accrue_interest("day-1")
+    assert result["accounts_accrued"] == 0
+    assert db_session.get(Account, 1).balance == 100.0
+    assert db_session.get(Account, 1).accrued_interest == pytest.approx(
+        100 * 0.015 / 365
+    )
+
+    for day in range(2, 366):
+        AccountRepository.accrue_interest(f"day-{day}")
+
+    db_session.expire_all()
+    account = db_session.get(Account, 1)
+    interest = (
+        db_session.query(Transaction).filter_by(transaction_type="interest").all()
+    )
+    assert account.balance == pytest.approx(101.51)
+    assert 0 <= account.accrued_interest < 0.01
+    assert sum(transaction.amount for transaction in interest) == pytest.approx(1.51)
+    assert all(transaction.amount >= 0.01 for transaction in interest)
+
+
+def test_accrue_interest_failure(db_session):
+    assert AccountRepository.accrue_interest("2024-01-01", days=0) is False
+
+
+def test_batch_account_status_changes(db_session):
+    quick_add_test_user()
+    for _ in range(3):
+        AccountRepository.create_bank_account(1, "savings", 1.5)
+
+    assert AccountRepository.flag_accounts([1, 2, 99], chunk_size=1) == 2
+    assert [
+        account.status for account in db_session.query(Account).order_by(Account.id)
+    ] == [
+        "flagged",
+        "flagged",
+        "active",
+    ]
+
+    assert AccountRepository.disable_accounts(range(1, 4)) == 3
+    assert AccountRepository.get_account_by_id(3).status == "disabled"
+
+    assert AccountRepository.enable_accounts([2, 2, 3]) == 2
+    assert [
+        account.status for account in db_session.query(Account).order_by(Account.id)
+    ] == [
+        "disabled",
+        "active",
+        "active",
+    ]
+
+
+def test_batch_account_status_changes_failure(db_session):
+    assert AccountRepository.disable_accounts([1], chunk_size=0) is False
+    assert AccountRepository.flag_accounts([]) == 0
+
+
+def test_get_accounts_by_user_id_with_loader_options(db_session):
+    quick_add_test_user()
+    for _ in range(4):
+        AccountRepository.create_bank_account(1, "savings", 1.5)
+    for account_id in range(1, 5):
+        TransactionRepository.create_transaction(account_id, 10.0, "Deposit", "credit")
+    db_session.expire_all()
+
+    with assert_max_queries(2):
+        accounts = AccountRepository.get_accounts_by_user_id(
+            1, options=[selectinload(Account.transactions), joinedload(Account.user)]
+        )
+        assert [len(account.transactions) for account in accounts] == [1, 1, 1, 1]
+        assert {account.user.username for account in accounts} == {"test_user"}
+
+
+def test_get_account_by_id_with_loader_options(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    TransactionRepository.create_transaction(1, 10.0, "Deposit", "credit")
+    AccountRepository.get_account_by_id(1)
+    db_session.expire_all()
+
+    with assert_max_queries(2):
+        account = AccountRepository.get_account_by_id(
+            1, options=[selectinload(Account.transactions)]
+        )
+        assert len(account.transactions) == 1
+
+
+def test_get_accounts_as_views(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+
+    views = AccountRepository.get_accounts_by_user_id(1, as_view=True)
+    assert [(view.id, view.account_type) for view in views] == [
+        (1, "savings"),
+        (2, "checking"),
+    ]
+    assert all(isinstance(view, AccountView) for view in views)
+    assert AccountRepository.get_account_by_id(2, as_view=True) == views[1]
+
+    # ? A cached copy is turned into a view without attaching it to the session
+    AccountRepository.get_account_by_id(1)
+    assert AccountRepository.get_account_by_id(1, as_view=True) == views[0]
+    assert AccountRepository.get_account_by_id(99, as_view=True) is False
+
+
+def test_transfer_success(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    AccountRepository.update_account_balance(1, 100.0)
+
+    with assert_max_queries(4):
+        result = AccountRepository.transfer(1, 2, 40.0, "Rent")
+
+    debit = db_session.query(Transaction).filter_by(transaction_id=result[0]).one()
+    credit = db_session.query(Transaction).filter_by(transaction_id=result[1]).one()
+    assert (debit.account_id, debit.amount, debit.transaction_type) == (
+        1,
+        -40.0,
+        "debit",
+    )
+    assert (credit.account_id, credit.amount, credit.transaction_type) == (
+        2,
+        40.0,
+        "credit",
+    )
+    assert (debit.post_tx_balance, credit.post_tx_balance) == (60.0, 40.0)
+    assert AccountRepository.get_account_by_id(1).balance == 60.0
+    assert AccountRepository.get_account_by_id(2).balance == 40.0
+
+
+def test_transfer_failure(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    AccountRepository.update_account_balance(1, 100.0)
+
+    assert AccountRepository.transfer(1, 2, 500.0, "Too much") is False
+    assert AccountRepository.transfer(1, 1, 10.0, "Self") is False
+    assert AccountRepository.transfer(1, 2, -10.0, "Negative") is False
+    assert AccountRepository.transfer(1, 99, 10.0, "Missing") is False
+    AccountRepository.disable_account(2)
+    assert AccountRepository.transfer(1, 2, 10.0, "Disabled") is False
+
+    assert AccountRepository.get_account_by_id(1).balance == 100.0
+    assert AccountRepository.get_account_by_id(2).balance == 0.0
+    assert db_session.query(Transaction).count() == 0
+
+
+def test_transfer_batch(db_session):
+    quick_add_test_user()
+    for account_type in ("payroll", "checking", "savings"):
+        AccountRepository.create_bank_account(1, account_type, 0.5)
+    AccountRepository.update_account_balance(1, 100.0)
+    AccountRepository.flag_account(3)
+
+    transfers = [
+        {
+            "from_account_id": 1,
+            "to_account_id": 2,
+            "amount": 60.0,
+            "description": "Pay",
+        },
+        {
+            "from_account_id": 1,
+            "to_account_id": 2,
+            "amount": 60.0,
+            "description": "Pay",
+        },
+        {"from_account_id": 2, "to_account_id": 1, "amount": 10, "description": "Back"},
+        {"from_account_id": 1, "to_account_id": 3, "amount": 5.0, "description": "Pay"},
+        {
+            "from_account_id": 1,
+            "to_account_id": 99,
+            "amount": 5.0,
+            "description": "Pay",
+        },
+        "not a transfer",
+    ]
+    with assert_max_queries(4):
+        results = AccountRepository.transfer_batch(transfers)
+
+    assert [bool(result) for result in results] == [True, False, True] + [False] * 3
+    assert AccountRepository.get_account_by_id(1).balance == 50.0
+    assert AccountRepository.get_account_by_id(2).balance == 50.0
+    credit = db_session.query(Transaction).filter_by(transaction_id=results[2][1]).one()
+    assert (credit.account_id, credit.post_tx_balance) == (1, 50.0)
+    assert db_session.query(Transaction).count() == 4
+
+
+def test_transfer_batch_chunks(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "payroll", 0.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    AccountRepository.update_account_balance(1, 10.0)
+
+    transfers = [
+        {"from_account_id": 1, "to_account_id": 2, "amount": 1.0, "description": "Pay"}
+    ] * 12
+    results = AccountRepository.transfer_batch(transfers, chunk_size=5)
+
+    assert sum(1 for result in results if result) == 10
+    assert AccountRepository.get_account_by_id(2).balance == 10.0
+    assert AccountRepository.transfer_batch(transfers, chunk_size=0) == [False] * 12
+
+
+def test_get_balance_at(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    TransactionRepository.create_transactions_bulk(
+        {
+            "account_id": 1,
+            "amount": amount,
+            "description": "Deposit",
+            "transaction_type": "credit",
+            "timestamp": timestamp,
+        }
+        for timestamp, amount in ((1_000, 100.0), (2_000, -40.0), (2_000, 5.0))
+    )
+
+    assert AccountRepository.get_balance_at(1, 999) is None
+    assert AccountRepository.get_balance_at(1, 1_000) == 100.0
+    assert AccountRepository.get_balance_at(1, 1_999) == 100.0
+    # ? Same timestamp, the later posted Transaction wins
+    assert AccountRepository.get_balance_at(1, 2_000) == 65.0
+    assert AccountRepository.get_balance_at(2, 2_000) is None
+    assert AccountRepository.get_balance_at(99, 2_000) is False
+
+
+def test_get_balance_at_falls_back_to_checkpoints(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    TransactionRepository.create_transactions_bulk(
+        [
+            {
+                "account_id": 1,
+                "amount": 100.0,
+                "description": "Deposit",
+                "transaction_type": "credit",
+                "timestamp": 1_000,
+            }
+        ]
+    )
+    # ? Balance changes without a ledger row are only visible through a checkpoint
+    AccountRepository.update_account_balance(2, 70.0)
+
+    assert AccountRepository.checkpoint_balances(chunk_size=1) == 2
+    now = time.time()
+    assert AccountRepository.get_balance_at(1, now + 1) == 100.0
+    assert AccountRepository.get_balance_at(2, now + 1) == 70.0
+    assert AccountRepository.get_balance_at(2, 1_000) is None
+
+    # ? A Transaction after the checkpoint takes precedence again
+    AccountRepository.update_account_balance(
+        2, 5.0, atomic=True, description="Deposit", transaction_type="credit"
+    )
+    assert AccountRepository.get_balance_at(2, time.time() + 10) == 75.0
+    assert AccountRepository.checkpoint_balances(chunk_size=0) is False
+
+
+def test_get_balances_at(db_session):
+    quick_add_test_user()
+    for account_type in ("savings", "checking", "payroll"):
+        AccountRepository.create_bank_account(1, account_type, 0.5)
+    TransactionRepository.create_transactions_bulk(
+        {
+            "account_id": account_id,
+            "amount": 10.0 * account_id,
+            "description": "Deposit",
+            "transaction_type": "credit",
+            "timestamp": 1_000,
+        }
+        for account_id in (1, 2)
+    )
+
+    expected = {1: 10.0, 2: 20.0, 3: None}
+    with assert_max_queries(1):
+        assert AccountRepository.get_balances_at(1_000, [1, 2, 3, 99]) == expected
+    assert AccountRepository.get_balances_at(1_000, chunk_size=2) == expected
+    assert AccountRepository.get_balances_at(1_000, [1, 2, 3], chunk_size=1) == expected
+    assert AccountRepository.get_balances_at(1_000, chunk_size=0) is False
@@ -0,0 +1,393 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app import create_app
+from app.datalayer import DailyRollup, Transaction
+from app.ext.database import DB as db
+from app.ext.metrics import MetricsRegistry
+from app.ext.passwords import PasswordHasher
+from app.repolayer import (
+    AccountRepository,
+    TransactionRepository,
+    UserRepository,
+    AsyncDatabase,
+    AsyncUserRepository,
+    AsyncAccountRepository,
+    AsyncTransactionRepository,
+)
+from app.repolayer.archive import TransactionArchive
+from app.repolayer.async_repositories import async_database_url
+
+
+@pytest.fixture()
+def database(tmp_path):
+    hasher = PasswordHasher(rounds=4)
+    database = AsyncDatabase(
+        f"sqlite+aiosqlite:///{tmp_path / 'async.sqlite'}",
+        pragmas={"journal_mode": "WAL"},
+        hasher=hasher,
+        metrics=MetricsRegistry(),
+    )
+    asyncio.run(database.create_all())
+
+    yield database
+
+    asyncio.run(database.dispose())
+    hasher.shutdown()
+
+
+async def quick_add_test_user(database):
+    user_repo = AsyncUserRepository(database)
+    await user_repo.add_user(
+        username="test_user",
+        password="secure_password",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        mobile="1234567890",
+        address="123 Test St",
+    )
+    return user_repo
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///db.sqlite") == "sqlite+aiosqlite:///db.sqlite"
+    assert (
+        async_database_url("sqlite+aiosqlite:///db.sqlite")
+        == "sqlite+aiosqlite:///db.sqlite"
+    )
+
+
+def test_add_and_authenticate_user(database):
+    async def scenario():
+        user_repo = await quick_add_test_user(database)
+        assert await user_repo.authenticate_user("test_user", "secure_password")
+        assert not await user_repo.authenticate_user("test_user", "wrong_password")
+        assert not await user_repo.authenticate_user("missing", "secure_password")
+        assert await user_repo.get_user_id_by_username("test_user") == 1
+        assert await user_repo.get_user_id_by_username("missing") is None
+
+    asyncio.run(scenario())
+
+
+def test_add_duplicate_user(database):
+    async def scenario():
+        user_repo = await quick_add_test_user(database)
+        assert not await user_repo.add_user(
+            "test_user", "pw", "other@example.com", "A", "B", "0987654321", "Addr"
+        )
+
+    asyncio.run(scenario())
+
+
+def test_update_user(database):
+    async def scenario():
+        user_repo = await quick_add_test_user(database)
+        assert await user_repo.update_basic_user_info("test_user", address="1 Elm St")
+        assert not await user_repo.update_basic_user_info("test_user")
+        assert not await user_repo.update_basic_user_info("missing", address="x")
+
+        assert await user_repo.change_user_password("test_user", "new_password")
+        assert await user_repo.authenticate_user("test_user", "new_password")
+
+        assert await user_repo.change_username("renamed", old_username="test_user")
+        assert not await user_repo.change_username("renamed", id=1)
+        assert await user_repo.get_user_id_by_username("renamed") == 1
+
+        assert await user_repo.disable_user(id=1)
+        assert await user_repo.enable_user(username="renamed")
+        assert not await user_repo.disable_user()
+
+    asyncio.run(scenario())
+
+
+def test_accounts_and_balances(database):
+    async def scenario():
+        await quick_add_test_user(database)
+        account_repo = AsyncAccountRepository(database)
+
+        assert await account_repo.create_bank_account(1, "savings", 1.5)
+        assert not await account_repo.create_bank_account(99, "savings", 1.5)
+
+        account = await account_repo.get_account_by_id(1)
+        assert account.balance == 0
+        assert len(account.account_number) == 16
+        assert not await account_repo.get_account_by_id(99)
+        assert len(await account_repo.get_accounts_by_user_id(1)) == 1
+
+        assert (
+            await account_repo.update_account_balance(1, 50, "Deposit", "credit") == 50
+        )
+        assert await account_repo.update_account_balance(1, -20) == 30
+        assert await account_repo.update_account_balance(1, 10, "Deposit") is None
+        assert await account_repo.update_account_balance(99, 10) is None
+        assert await account_repo.update_account_balance(1, -30) == 0.0
+
+        assert await account_repo.flag_account(1)
+        assert (await account_repo.get_account_by_id(1)).status == "flagged"
+        assert await account_repo.enable_account(1)
+        assert await account_repo.update_account_interest(1, 2.0)
+        assert not await account_repo.disable_account(99)
+
+    asyncio.run(scenario())
+
+
+def test_transactions(database):
+    async def scenario():
+        await quick_add_test_user(database)
+        await AsyncAccountRepository(database).create_bank_account(1, "savings", 1.5)
+        transaction_repo = AsyncTransactionRepository(database)
+
+        for index in range(5):
+            assert await transaction_repo.create_transaction(
+                1, 10.0, f"Deposit {index}", "credit"
+            )
+        assert not await transaction_repo.create_transaction(99, 10.0, "x", "credit")
+
+        transactions = await transaction_repo.get_transactions_by_account_id(1)
+        assert len(transactions) == 5
+        assert await transaction_repo.get_transaction_by_id(
+            transactions[0].transaction_id
+        )
+        assert len(await transaction_repo.get_transaction_by_type(1, "credit")) == 5
+        assert not await transaction_repo.get_transaction_by_type(1, "debit")
+
+        page, cursor = await transaction_repo.get_transactions_page(1, page_size=3)
+        rest, end = await transaction_repo.get_transactions_page(
+            1, cursor=cursor, page_size=3
+        )
+        assert len(page) == 3 and len(rest) == 2 and end is None
+        assert not await transaction_repo.get_transactions_page(1, cursor="garbage")
+
+        recent = await transaction_repo.get_recent_transactions(1, limit=2)
+        assert [transaction.description for transaction in recent] == [
+            "Deposit 4",
+            "Deposit 3",
+        ]
+
+        transaction_id = transactions[0].transaction_id
+        assert await transaction_repo.update_transaction_status(transaction_id, 1)
+        assert not await transaction_repo.update_transaction_status(
+            transaction_id, "unknown"
+        )
+        assert (
+            await transaction_repo.get_transaction_by_id(transaction_id)
+        ).status == "processed"
+
+    asyncio.run(scenario())
+
+
+def test_async_writes_retry_id_collisions(database, monkeypatch):
+    async def scenario():
+        await quick_add_test_user(database)
+        account_repo = AsyncAccountRepository(database)
+        transaction_repo = AsyncTransactionRepository(database)
+        assert await account_repo.create_bank_account(1, "savings", 1.5)
+        assert await transaction_repo.create_transaction(1, 10.0, "Deposit", "credit")
+        account = await account_repo.get_account_by_id(1)
+        (transaction,) = await transaction_repo.get_transactions_by_account_id(1)
+
+        fresh = database.ids.next_hex
+
+        def collide_once(taken):
+            values = iter([taken])
+            monkeypatch.setattr(
+                database.ids, "next_hex", lambda: next(values, None) or fresh()
+            )
+
+        collide_once(account.account_number)
+        assert await account_repo.create_bank_account(1, "checking", 0.5)
+        collide_once(transaction.transaction_id)
+        assert await transaction_repo.create_transaction(1, 5.0, "Deposit", "credit")
+        collide_once(transaction.transaction_id)
+        assert (
+            await account_repo.update_account_balance(1, 1.0, "Deposit", "credit")
+            == 1.0
+        )
+
+        assert len(await account_repo.get_accounts_by_user_id(1)) == 2
+        assert len(await transaction_repo.get_transactions_by_account_id(1)) == 3
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_balance_updates_are_not_lost(database):
+    async def scenario():
+        await quick_add_test_user(database)
+        account_repo = AsyncAccountRepository(database)
+        await account_repo.create_bank_account(1, "savings", 1.5)
+
+        await asyncio.gather(
+            *(account_repo.update_account_balance(1, 1) for _ in range(50))
+        )
+        return await account_repo.get_account_by_id(1)
+
+    assert asyncio.run(scenario()).balance == 50
+
+
+def test_statements_are_recorded_in_metrics(database):
+    async def scenario():
+        await quick_add_test_user(database)
+
+    asyncio.run(scenario())
+    counters = database.metrics.snapshot()["counters"]
+    assert counters["sql.statements{AsyncUserRepository.add_user}"] == 1
+
+
+def test_rollups_follow_async_writes(database):
+    async def scenario():
+        await quick_add_test_user(database)
+        await AsyncAccountRepository(database).create_bank_account(1, "savings", 1.5)
+        transaction_repo = AsyncTransactionRepository(database)
+        await transaction_repo.create_transaction(1, 10.0, "Deposit", "credit")
+        await transaction_repo.create_transaction(1, 5.0, "Deposit", "credit")
+        await AsyncAccountRepository(database).update_account_balance(
+            1, 20.0, "Deposit", "credit"
+        )
+        first = (await transaction_repo.get_transactions_by_account_id(1))[0]
+        await transaction_repo.update_transaction_status(
+            first.transaction_id, "declined"
+        )
+
+        async with database.session() as session:
+            before = (await session.scalars(select(DailyRollup))).one()
+
+        # ? Declining the closing row moves the closing balance back to the 5.0 deposit
+        last = (await transaction_repo.get_transactions_by_account_id(1))[-1]
+        await transaction_repo.update_transaction_status(
+            last.transaction_id, "declined"
+        )
+        async with database.session() as session:
+            return before, (await session.scalars(select(DailyRollup))).one()
+
+    rollup, declined = asyncio.run(scenario())
+    assert (rollup.count, rollup.credits, rollup.closing_balance) == (2, 25.0, 20.0)
+    assert (declined.count, declined.credits, declined.closing_balance) == (
+        1,
+        5.0,
+        5.0,
+    )
+
+
+def test_async_writes_invalidate_the_app_cache(tmp_path):
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'shared.sqlite'}",
+            "BCRYPT_LOG_ROUNDS": 4,
+        }
+    )
+    # ? Built while the app's cache is still empty
+    database = AsyncDatabase.from_app(app)
+    assert database.cache is app.extensions["repository_cache"]
+    assert database.ids is app.extensions["id_generator"]
+
+    with app.app_context():
+        UserRepository.add_user(
+            "test_user", "pw", "test@example.com", "A", "B", "1234567890", "Addr"
+        )
+        AccountRepository.create_bank_account(1, "savings", 1.5)
+        assert AccountRepository.get_account_by_id(1).balance == 0
+        db.session.remove()
+
+    async def scenario():
+        try:
+            return await AsyncAccountRepository(database).update_account_balance(1, 25)
+        finally:
+            await database.dispose()
+
+    assert asyncio.run(scenario()) == 25
+    with app.app_context():
+        assert AccountRepository.get_account_by_id(1).balance == 25
+        db.engine.dispose()
+
+
+def test_async_readers_include_archived_transactions(tmp_path):
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'shared.sqlite'}",
+            "BCRYPT_LOG_ROUNDS": 4,
+        }
+    )
+    app.extensions["transaction_archive"] = TransactionArchive(
+        str(tmp_path / "archive"), account_range=10
+    )
+    database = AsyncDatabase.from_app(app)
+    assert database.archive is app.extensions["transaction_archive"]
+
+    with app.app_context():
+        db.create_all()
+        UserRepository.add_user(
+            "test_user", "pw", "test@example.com", "A", "B", "1234567890", "Addr"
+        )
+        AccountRepository.create_bank_account(1, "savings", 1.5)
+        # ? 2024-01-05, 2024-01-09 and 2024-02-03, archived below, then one recent row left in the table
+        TransactionRepository.create_transactions_bulk(
+            [
+                {
+                    "account_id": 1,
+                    "amount": amount,
+                    "description": "Old",
+                    "transaction_type": "credit" if amount > 0 else "debit",
+                    "timestamp": timestamp,
+                }
+                for amount, timestamp in [
+                    (100.0, 1704456000.0),
+                    (-20.0, 1704801600.0),
+                    (40.0, 1706961600.0),
+                ]
+            ]
+        )
+        transaction_ids = [
+            transaction.transaction_id
+            for transaction in TransactionRepository.get_transactions_by_account_id(1)
+        ]
+        TransactionRepository.update_transaction_statuses(transaction_ids, "processed")
+        TransactionRepository.create_transaction(1, 7.0, "Recent", "credit")
+        assert TransactionRepository.archive_transactions(before=1735689600.0)
+        db.session.remove()
+
+    async def scenario():
+        transaction_repo = AsyncTransactionRepository(database)
+        try:
+            archived = await transaction_repo.get_transaction_by_id(transaction_ids[0])
+            assert archived.amount == 100.0
+            history = await transaction_repo.get_transactions_by_account_id(1)
+            assert [transaction.amount for transaction in history] == [
+                100.0,
+                -20.0,
+                40.0,
+                7.0,
+            ]
+            debits = await transaction_repo.get_transaction_by_type(1, "debit")
+            assert [transaction.amount for transaction in debits] == [-20.0]
+
+            amounts, cursor = [], None
+            while True:
+                page, cursor = await transaction_repo.get_transactions_page(
+                    1, cursor=cursor, page_size=3
+                )
+                amounts.extend(transaction.amount for transaction in page)
+                if cursor is None:
+                    break
+            assert amounts == [100.0, -20.0, 40.0, 7.0]
+
+            recent = await transaction_repo.get_recent_transactions(1, limit=2)
+            older = await transaction_repo.get_recent_transactions(
+                1, limit=2, before=TransactionRepository.make_cursor(recent[-1])
+            )
+            assert [transaction.amount for transaction in recent + older] == [
+                7.0,
+                40.0,
+                -20.0,
+                100.0,
+            ]
+            assert not await transaction_repo.get_recent_transactions(1, limit=0)
+        finally:
+            await database.dispose()
+
+    asyncio.run(scenario())
+    with app.app_context():
+        assert db.session.query(Transaction).count() == 1
+        db.engine.dispose()
@@ -0,0 +1,114 @@
+import json
+
+from sqlalchemy import func, select
+
+from app import create_app
+from app.benchmarks.__main__ import main
+from app.benchmarks.seed import SEED_EPOCH, SEED_YEAR, seed_database
+from app.datalayer import Transaction
+from app.ext.database import DB as db
+from app.benchmarks.harness import compare, percentile, summarize
+from app.benchmarks.async_repositories import run as run_async_benchmark
+from app.benchmarks.ids import run as run_id_benchmark
+from app.benchmarks.snapshot import run as run_snapshot_benchmark
+from app.benchmarks.views import run as run_view_benchmark
+from app.benchmarks.writer import run as run_writer_benchmark
+from app.benchmarks.repositories import uncovered_methods
+
+
+def test_percentile_nearest_rank():
+    samples = [float(value) for value in range(1, 101)]
+
+    assert percentile(samples, 0.50) == 50.0
+    assert percentile(samples, 0.99) == 99.0
+    assert percentile([], 0.99) == 0.0
+
+
+def test_compare_flags_regressions():
+    baseline = {"case": summarize([0.001] * 10, 0.01)}
+    slower = {"case": summarize([0.002] * 10, 0.02)}
+
+    assert compare(baseline, baseline, 0.2) == []
+    assert len(compare(slower, baseline, 0.2)) == 2
+
+
+def test_seeded_history_is_pinned_to_the_epoch(tmp_path):
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'seed.sqlite'}",
+            "BCRYPT_LOG_ROUNDS": 4,
+        }
+    )
+    with app.app_context():
+        db.create_all()
+
+    info = seed_database(app, 1, 2, 10)
+    assert info["epoch"] == SEED_EPOCH
+    with app.app_context():
+        first, last = db.session.execute(
+            select(func.min(Transaction.timestamp), func.max(Transaction.timestamp))
+        ).one()
+        db.engine.dispose()
+    assert first == SEED_EPOCH + SEED_YEAR / 10
+    assert last == SEED_EPOCH + SEED_YEAR
+
+
+def test_benchmark_suite_covers_every_repository_method(tmp_path):
+    output = tmp_path / "results.json"
+
+    exit_code = main(
+        [
+            "--users=5",
+            "--accounts=10",
+            "--transactions=100",
+            "--iterations=2",
+            "--slow-iterations=1",
+            "--bcrypt-rounds=4",
+            f"--database={tmp_path / 'bench.sqlite'}",
+            f"--output={output}",
+        ]
+    )
+
+    report = json.loads(output.read_text())
+    assert exit_code == 0
+    assert report["dataset"]["transactions"] == 100
+    assert uncovered_methods(report["results"]) == set()
+    assert all(result["iterations"] > 0 for result in report["results"].values())
+
+
+def test_id_benchmark_compares_schemes(tmp_path):
+    results = run_id_benchmark(rows=500, chunk_size=100, directory=str(tmp_path))
+
+    assert set(results) == {"random_hex", "snowflake"}
+    assert all(result["rows_per_sec"] > 0 for result in results.values())
+
+
+def test_view_benchmark_compares_entities_and_views():
+    results = run_view_benchmark(accounts=2, transactions=50, repeat=1)
+
+    assert results["entities"]["rows"] == results["views"]["rows"] == 50
+    assert all(result["bytes_per_row"] > 0 for result in results.values())
+
+
+def test_writer_benchmark_compares_commit_modes():
+    results = run_writer_benchmark(transactions=40, threads=4, accounts=2)
+
+    assert results["group_commit"]["rows"] == 40
+    assert all(result["transactions_per_sec"] > 0 for result in results.values())
+
+
+def test_async_benchmark_compares_sync_and_async():
+    results = run_async_benchmark(
+        requests=20, concurrency=4, accounts=2, transactions=20, login_every=10
+    )
+
+    assert set(results) == {"sync", "async"}
+    assert all(result["requests_per_sec"] > 0 for result in results.values())
+
+
+def test_snapshot_benchmark_compares_sql_and_snapshot_scans():
+    results = run_snapshot_benchmark(accounts=2, transactions=50, refresh=5, repeat=1)
+
+    assert results["export"]["rows"] == 50
+    assert results["refresh"]["rows"] == 5
+    assert results["snapshot_scan"]["matches_sql"]
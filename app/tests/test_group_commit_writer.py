@@ -0,0 +1,199 @@
+import threading
+import time
+
+import pytest
+
+
+from app import create_app
+from app.repolayer import UserRepository, AccountRepository, TransactionRepository
+from app.repolayer.writer import (
+    GroupCommitWriter,
+    GroupCommitWriterClosed,
+    get_group_commit_writer,
+)
+from app.datalayer import Account, Transaction
+from app.ext.database import DB as db
+
+
+def quick_add_test_user():
+    user_repo = UserRepository()
+    user_repo.add_user(
+        username="test_user",
+        password="secure_password",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        mobile="1234567890",
+        address="123 Test St",
+    )
+    return user_repo
+
+
+@pytest.fixture()
+def app():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        }
+    )
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def db_session(app):
+    with app.app_context():
+        db.session.begin_nested()
+        yield db.session
+        db.session.rollback()
+
+
+@pytest.fixture()
+def account(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    return db_session.query(Account).first()
+
+
+def test_group_commit_writer_resolves_after_commit(app, db_session, account):
+    writer = GroupCommitWriter(app, max_batch=500, max_delay=0.05)
+    try:
+        futures = [
+            writer.submit(account.id, 10.0, "Deposit", "credit") for _ in range(20)
+        ]
+        transaction_ids = [future.result(timeout=5) for future in futures]
+    finally:
+        writer.close()
+
+    db_session.expire_all()
+    persisted = db_session.query(Transaction).order_by(Transaction.id).all()
+    assert [transaction.transaction_id for transaction in persisted] == transaction_ids
+    assert persisted[-1].post_tx_balance == 200.0
+    assert db_session.get(Account, account.id).balance == 200.0
+    assert writer.stats()["batches"] < 20
+
+
+def test_group_commit_writer_splits_batches_by_size(app, db_session, account):
+    writer = GroupCommitWriter(app, max_batch=4, max_delay=0.5)
+    try:
+        futures = [
+            writer.submit(account.id, 1.0, "Deposit", "credit") for _ in range(8)
+        ]
+        assert all(future.result(timeout=5) for future in futures)
+    finally:
+        writer.close()
+
+    assert writer.stats()["max_batch"] == 4
+    assert writer.stats()["rows"] == 8
+
+
+def test_group_commit_writer_rejected_rows_resolve_false(app, db_session, account):
+    writer = GroupCommitWriter(app, max_delay=0.05)
+    try:
+        valid = writer.submit(account.id, 5.0, "Deposit", "credit")
+        missing = writer.submit(99, 5.0, "Deposit", "credit")
+
+        assert valid.result(timeout=5)
+        assert missing.result(timeout=5) is False
+    finally:
+        writer.close()
+
+    assert writer.stats()["failed"] == 1
+
+
+def test_group_commit_writer_retries_failed_batches_row_by_row(
+    app, db_session, account, monkeypatch
+):
+    create_transactions_bulk = TransactionRepository.create_transactions_bulk
+
+    def fail_batches_and_poison_rows(transactions, *args, **kwargs):
+        transactions = list(transactions)
+        if len(transactions) > 1 or transactions[0]["amount"] == 13.0:
+            raise RuntimeError("disk I/O error")
+        return create_transactions_bulk(transactions, *args, **kwargs)
+
+    monkeypatch.setattr(
+        TransactionRepository,
+        "create_transactions_bulk",
+        staticmethod(fail_batches_and_poison_rows),
+    )
+    writer = GroupCommitWriter(app, max_batch=500, max_delay=10.0)
+    futures = [
+        writer.submit(account.id, amount, "Deposit", "credit")
+        for amount in (1.0, 13.0, 2.0)
+    ]
+    writer.close(timeout=5)
+
+    assert futures[0].result() and futures[2].result()
+    with pytest.raises(RuntimeError):
+        futures[1].result()
+    assert writer.stats()["retried"] == 3
+    assert writer.stats()["failed"] == 1
+    db_session.expire_all()
+    assert db_session.get(Account, account.id).balance == 3.0
+
+
+def test_group_commit_writer_close_is_not_blocked_by_full_queue(
+    app, db_session, account, monkeypatch
+):
+    release = threading.Event()
+    writer = GroupCommitWriter(app, max_batch=1, max_delay=0.0, max_pending=1)
+    commit = writer._commit
+    monkeypatch.setattr(
+        writer, "_commit", lambda rows: release.wait(5) and commit(rows)
+    )
+
+    futures = []
+
+    def produce():
+        for _ in range(3):
+            futures.append(writer.submit(account.id, 1.0, "Deposit", "credit"))
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    # ? One row held by the stalled flush, one filling the queue, the third blocked in put
+    deadline = time.monotonic() + 5
+    while (len(futures) < 2 or not writer._submitting) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    closer = threading.Thread(target=writer.close, kwargs={"timeout": 5})
+    closer.start()
+    while not writer._closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with pytest.raises(GroupCommitWriterClosed):
+        writer.submit(account.id, 1.0, "Deposit", "credit")
+
+    release.set()
+    producer.join(5)
+    closer.join(5)
+    assert [future.done() for future in futures] == [True] * 3
+    assert all(future.result() for future in futures)
+
+
+def test_group_commit_writer_close_flushes_pending_rows(app, db_session, account):
+    writer = GroupCommitWriter(app, max_batch=500, max_delay=10.0)
+    future = writer.submit(account.id, 5.0, "Deposit", "credit")
+    writer.close(timeout=5)
+
+    assert future.done()
+    assert future.result()
+    with pytest.raises(GroupCommitWriterClosed):
+        writer.submit(account.id, 5.0, "Deposit", "credit")
+
+
+def test_group_commit_writer_extension_is_optional(app):
+    with app.app_context():
+        assert get_group_commit_writer() is None
+
+    enabled = create_app({"GROUP_COMMIT_ENABLED": True, "GROUP_COMMIT_MAX_BATCH": 50})
+    with enabled.app_context():
+        writer = get_group_commit_writer()
+        assert writer.max_batch == 50
+        writer.close()
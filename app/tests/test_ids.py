@@ -0,0 +1,322 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+
+from app import create_app
+from app.repolayer import UserRepository, AccountRepository, TransactionRepository
+from app.repolayer.ids import (
+    SnowflakeGenerator,
+    acquire_id_generator,
+    get_id_generator,
+    parse_id,
+    _lease_node,
+)
+from app.datalayer import Account, Transaction
+from app.ext.database import DB as db
+from app.ext.metrics import capture_queries
+
+
+def quick_add_test_user():
+    user_repo = UserRepository()
+    user_repo.add_user(
+        username="test_user",
+        password="secure_password",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        mobile="1234567890",
+        address="123 Test St",
+    )
+    return user_repo
+
+
+@pytest.fixture()
+def app():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "ID_NODE": 7,
+        }
+    )
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def db_session(app):
+    with app.app_context():
+        db.session.begin_nested()
+        yield db.session
+        db.session.rollback()
+
+
+def test_ids_are_monotonic_within_a_millisecond():
+    generator = SnowflakeGenerator(node=3, clock=lambda: 1800000000.0)
+    ids = [generator.next_id() for _ in range(5000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert parse_id(ids[0]) == {
+        "timestamp_ms": 1800000000000,
+        "node": 3,
+        "sequence": 0,
+    }
+    # ? 4096 ids fit in one millisecond, the rest borrow the next one
+    assert parse_id(ids[-1])["timestamp_ms"] == 1800000000001
+
+
+def test_ids_survive_clock_going_backwards():
+    times = iter([1800000000.002, 1800000000.001, 1800000000.000])
+    generator = SnowflakeGenerator(node=0, clock=lambda: next(times))
+    ids = [generator.next_id() for _ in range(3)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 3
+
+
+def test_hex_ids_sort_like_integers():
+    generator = SnowflakeGenerator(node=1)
+    values = [generator.next_hex() for _ in range(100)]
+
+    assert values == sorted(values)
+    assert all(len(value) == 16 for value in values)
+    assert [int(value, 16) for value in values] == sorted(
+        int(value, 16) for value in values
+    )
+
+
+def test_ids_are_unique_across_threads():
+    generator = SnowflakeGenerator(node=1)
+    results = []
+
+    def worker():
+        results.extend(generator.next_id() for _ in range(2000))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 8000
+
+
+def test_invalid_node_is_rejected():
+    with pytest.raises(ValueError):
+        SnowflakeGenerator(node=1024)
+
+
+def test_one_generator_per_node_per_process(app):
+    assert acquire_id_generator() is acquire_id_generator()
+    assert acquire_id_generator(7) is acquire_id_generator(7)
+    with app.app_context():
+        assert get_id_generator() is acquire_id_generator(7)
+
+    second = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "ID_NODE": 7})
+    assert second.extensions["id_generator"] is app.extensions["id_generator"]
+
+
+def test_nodes_are_leased_per_process(tmp_path):
+    assert _lease_node(str(tmp_path), 5) == 5
+
+    # ? Another process can neither take the held node nor be handed it
+    script = (
+        "import sys\n"
+        "from app.repolayer.ids import NodeUnavailable, _lease_node\n"
+        "try:\n"
+        "    _lease_node(sys.argv[1], 5)\n"
+        "except NodeUnavailable:\n"
+        "    print(_lease_node(sys.argv[1]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script, str(tmp_path)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    )
+    assert result.stdout.strip().isdigit()
+    assert int(result.stdout) != 5
+
+
+def test_create_bank_account_skips_existence_check(db_session):
+    quick_add_test_user()
+
+    with capture_queries() as queries:
+        assert AccountRepository.create_bank_account(1, "savings", 1.5)
+
+    account = db_session.query(Account).first()
+    assert parse_id(account.account_number)["node"] == 7
+    assert not any("account_number =" in query.statement for query in queries)
+
+
+def test_transaction_ids_are_time_ordered(db_session, app):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    TransactionRepository.create_transaction(1, 10.0, "Deposit", "credit")
+    TransactionRepository.create_transactions_bulk(
+        [
+            {
+                "account_id": 1,
+                "amount": 5.0,
+                "description": "Deposit",
+                "transaction_type": "credit",
+            }
+        ]
+        * 3
+    )
+    AccountRepository.update_account_balance(
+        1, 1.0, atomic=True, description="Deposit", transaction_type="credit"
+    )
+
+    transaction_ids = [
+        transaction.transaction_id
+        for transaction in db_session.query(Transaction).order_by(Transaction.id)
+    ]
+    assert len(transaction_ids) == 5
+    assert transaction_ids == sorted(transaction_ids)
+    assert get_id_generator().node == 7
+
+
+def test_create_bank_account_retries_id_collisions(db_session, app, monkeypatch):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    taken = db_session.query(Account).first().account_number
+
+    generator = get_id_generator()
+    fresh = generator.next_hex
+    values = iter([taken, taken])
+    monkeypatch.setattr(generator, "next_hex", lambda: next(values, None) or fresh())
+    assert AccountRepository.create_bank_account(1, "checking", 0.5)
+    assert db_session.query(Account).count() == 2
+
+    # ? Bounded, a generator stuck on a taken id gives up
+    monkeypatch.setattr(generator, "next_hex", lambda: taken)
+    assert not AccountRepository.create_bank_account(1, "checking", 0.5)
+
+
+def test_transaction_writes_retry_id_collisions(db_session, app, monkeypatch):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    TransactionRepository.create_transaction(1, 100.0, "Deposit", "credit")
+    taken = db_session.query(Transaction).first().transaction_id
+
+    generator = get_id_generator()
+    fresh = generator.next_hex
+
+    def collide_once():
+        values = iter([taken])
+        monkeypatch.setattr(
+            generator, "next_hex", lambda: next(values, None) or fresh()
+        )
+
+    collide_once()
+    assert TransactionRepository.create_transaction(1, 5.0, "Deposit", "credit")
+    collide_once()
+    assert (
+        AccountRepository.update_account_balance(
+            1, 50.0, atomic=True, description="Deposit", transaction_type="credit"
+        )
+        is not None
+    )
+    collide_once()
+    assert AccountRepository.transfer(1, 2, 10.0, "Transfer")
+
+    db_session.expire_all()
+    assert db_session.query(Transaction).count() == 5
+    assert db_session.query(Account).get(1).balance == 40.0
+
+
+def test_batch_writes_retry_id_collisions(db_session, app, monkeypatch):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 1.5)
+    TransactionRepository.create_transaction(1, 100.0, "Deposit", "credit")
+    AccountRepository.update_account_balance(1, 100.0)
+    taken = db_session.query(Transaction).first().transaction_id
+
+    generator = get_id_generator()
+    fresh = generator.next_hex
+
+    def collide_once():
+        values = iter([taken])
+        monkeypatch.setattr(
+            generator, "next_hex", lambda: next(values, None) or fresh()
+        )
+
+    row = {
+        "account_id": 1,
+        "amount": 5.0,
+        "description": "Deposit",
+        "transaction_type": "credit",
+    }
+    collide_once()
+    assert all(TransactionRepository.create_transactions_bulk([row, row]))
+    collide_once()
+    transfer = {
+        "from_account_id": 1,
+        "to_account_id": 2,
+        "amount": 10.0,
+        "description": "Transfer",
+    }
+    assert all(AccountRepository.transfer_batch([transfer]))
+    collide_once()
+    run = AccountRepository.accrue_interest("2026-10-17", days=365)
+    assert run["accounts_accrued"] == 2
+
+    db_session.expire_all()
+    assert db_session.query(Transaction).count() == 7
+    assert db_session.query(Account).get(2).balance == 10.15
+
+
+def _in_forked_child(work) -> str:
+    # ? Runs work in a forked child and returns what it printed, or the name of the exception it raised
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        try:
+            output = str(work())
+        except Exception as e:
+            output = type(e).__name__
+        os.write(write, output.encode())
+        os._exit(0)
+
+    os.close(write)
+    with os.fdopen(read) as pipe:
+        output = pipe.read()
+    os.waitpid(pid, 0)
+    return output
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_children_never_share_a_node(app, tmp_path):
+    pinned = app.extensions["id_generator"]
+    pinned.next_id()
+    assert _in_forked_child(pinned.next_id) == "NodeUnavailable"
+    assert _in_forked_child(lambda: acquire_id_generator(7).next_id()) == (
+        "NodeUnavailable"
+    )
+
+    unleased = SnowflakeGenerator(node=9)
+    assert _in_forked_child(unleased.next_id) == "NodeUnavailable"
+
+    leased = SnowflakeGenerator(_lease_node(str(tmp_path)), lease_dir=str(tmp_path))
+    child_node = _in_forked_child(lambda: parse_id(leased.next_id())["node"])
+    assert int(child_node) != leased.node
+
+    # ? The parent carries on with its nodes
+    assert parse_id(pinned.next_id())["node"] == 7
+    assert parse_id(unleased.next_id())["node"] == 9
@@ -0,0 +1,44 @@
+import logging
+
+import pytest
+
+
+from app import create_app
+from app.ext import logger
+from app.ext.logger import CustomFormatter
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app({"LOG_FILE": str(tmp_path / "logs" / "app.log")})
+    yield app
+    logger.stop_pipeline()
+
+
+def test_custom_formatter_reuses_formatters():
+    formatter = CustomFormatter()
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "%s!", ("hi",), None)
+
+    first = formatter.formatters[logging.INFO]
+    assert formatter.format(record).endswith("hi!\x1b[0m")
+    assert formatter.formatters[logging.INFO] is first
+
+
+def test_register_extension_does_not_stack_handlers(app, tmp_path):
+    create_app({"LOG_FILE": str(tmp_path / "logs" / "app.log")})
+
+    queue_handlers = [
+        handler
+        for handler in logging.getLogger().handlers
+        if isinstance(handler, logging.handlers.QueueHandler)
+    ]
+    assert len(queue_handlers) == 1
+
+
+def test_log_records_reach_rotating_file(app, tmp_path):
+    app.logger.info("Account: %s flagged successfully!", 42)
+    logger.stop_pipeline()
+
+    contents = (tmp_path / "logs" / "app.log").read_text()
+    assert "Account: 42 flagged successfully!" in contents
+    assert contents.count("Account: 42 flagged successfully!") == 1
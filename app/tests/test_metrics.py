@@ -0,0 +1,171 @@
+import pytest
+
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.repolayer import UserRepository, AccountRepository, TransactionRepository
+from app.repolayer import NullCache
+from app.repolayer import cache
+from app.ext.database import DB as db
+from app.ext.metrics import (
+    Histogram,
+    MetricsRegistry,
+    assert_max_queries,
+    capture_queries,
+    get_registry,
+)
+
+
+def quick_add_test_user():
+    user_repo = UserRepository()
+    user_repo.add_user(
+        username="test_user",
+        password="secure_password",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        mobile="1234567890",
+        address="123 Test St",
+    )
+    return user_repo
+
+
+@pytest.fixture()
+def app():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        }
+    )
+    cache.register_extension(app, NullCache())
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def db_session(app):
+    with app.app_context():
+        db.session.begin_nested()
+        yield db.session
+        db.session.rollback()
+
+
+def test_histogram_buckets_observations():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 4
+    assert snapshot["sum"] == pytest.approx(6.05)
+    assert snapshot["min"] == 0.05
+    assert snapshot["max"] == 5.0
+    assert snapshot["buckets"] == {"0.1": 1, "1.0": 2, "inf": 1}
+
+
+def test_registry_snapshot_labels_metrics():
+    registry = MetricsRegistry()
+    registry.counter("calls", "Repo.method").inc()
+    registry.counter("calls", "Repo.method").inc(2)
+    registry.counter("calls").inc()
+
+    counters = registry.snapshot()["counters"]
+    assert counters["calls{Repo.method}"] == 3
+    assert counters["calls"] == 1
+
+    registry.reset()
+    assert registry.snapshot() == {"counters": {}, "histograms": {}}
+
+
+def test_statements_are_attributed_to_repository_method(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    registry = get_registry()
+    registry.reset()
+
+    with capture_queries() as queries:
+        assert TransactionRepository.create_transaction(1, 50.0, "Deposit", "credit")
+
+    snapshot = registry.snapshot()
+    operation = "TransactionRepository.create_transaction"
+    assert snapshot["counters"][f"repository.calls{{{operation}}}"] == 1
+    assert snapshot["counters"][f"sql.statements{{{operation}}}"] == len(queries)
+    assert snapshot["histograms"][f"sql.duration{{{operation}}}"]["count"] == len(
+        queries
+    )
+    assert all(query.operation == operation for query in queries)
+
+
+def test_generator_statements_are_attributed(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    TransactionRepository.create_transaction(1, 50.0, "Deposit", "credit")
+
+    with capture_queries() as queries:
+        assert len(list(TransactionRepository.stream_transactions_by_account_id(1)))
+
+    assert queries
+    assert all(
+        query.operation == "TransactionRepository.stream_transactions_by_account_id"
+        for query in queries
+    )
+
+
+def test_generator_calls_are_timed_across_iteration(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    TransactionRepository.create_transaction(1, 50.0, "Deposit", "credit")
+    registry = get_registry()
+    registry.reset()
+
+    operation = "TransactionRepository.stream_transactions_by_account_id"
+    stream = TransactionRepository.stream_transactions_by_account_id(1)
+    assert f"repository.calls{{{operation}}}" not in registry.snapshot()["counters"]
+
+    assert len(list(stream)) == 1
+    snapshot = registry.snapshot()
+    assert snapshot["counters"][f"repository.calls{{{operation}}}"] == 1
+    duration = snapshot["histograms"][f"repository.duration{{{operation}}}"]
+    assert duration["count"] == 1 and duration["sum"] > 0
+
+
+def test_failed_statement_leaves_no_start_time(db_session):
+    connection = db_session.connection()
+    with pytest.raises(OperationalError):
+        connection.execute(text("SELECT * FROM missing_table"))
+
+    assert connection.info.get("query_started", []) == []
+
+
+def test_create_transaction_reads_account_once(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    db_session.expire_all()
+
+    with assert_max_queries(3) as queries:
+        TransactionRepository.create_transaction(1, 50.0, "Deposit", "credit")
+
+    # ? The second INSERT is the daily rollup upsert
+    assert [query.statement.split()[0] for query in queries] == [
+        "SELECT",
+        "INSERT",
+        "INSERT",
+    ]
+
+
+def test_assert_max_queries_fails_when_exceeded(db_session):
+    quick_add_test_user()
+    db_session.expire_all()
+
+    with pytest.raises(AssertionError, match="at most 0 queries"):
+        with assert_max_queries(0):
+            UserRepository.get_user_id_by_username("test_user")
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+
+from app.ext.passwords import (
+    PasswordHasher,
+    PasswordHasherBusy,
+    PasswordHasherTimeout,
+)
+
+
+@pytest.fixture()
+def hasher():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=1, timeout=5.0)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_generate_and_check_password_hash_success(hasher):
+    pw_hash = hasher.generate_password_hash("secure_password")
+
+    assert pw_hash.startswith("$2b$04$")
+    assert hasher.check_password_hash(pw_hash, "secure_password") is True
+    assert hasher.check_password_hash(pw_hash, "wrong_password") is False
+    assert hasher.stats()["completed"] == 3
+
+
+def test_password_hasher_rejects_when_busy(hasher):
+    release = threading.Event()
+    blocked = hasher.submit(release.wait)
+
+    with pytest.raises(PasswordHasherBusy):
+        hasher.generate_password_hash("secure_password")
+
+    release.set()
+    blocked.result()
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.generate_password_hash("secure_password")
+
+
+def test_password_hasher_times_out():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=2)
+    release = threading.Event()
+    blocked = hasher.submit(release.wait)
+
+    with pytest.raises(PasswordHasherTimeout):
+        hasher.generate_password_hash("secure_password", timeout=0.01)
+
+    release.set()
+    blocked.result()
+    stats = hasher.stats()
+    assert stats["timeouts"] == 1
+    assert stats["queue_depth"] == 0
+    hasher.shutdown()
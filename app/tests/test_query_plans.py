@@ -0,0 +1,316 @@
+import datetime
+import inspect
+
+import pytest
+from sqlalchemy.orm import joinedload, selectinload
+
+
+from app import create_app
+from app.repolayer import (
+    UserRepository,
+    AccountRepository,
+    TransactionRepository,
+    RollupRepository,
+    NullCache,
+)
+from app.repolayer import cache
+from app.repolayer.archive import TransactionArchive
+from app.repolayer.snapshot import TransactionSnapshot
+from app.datalayer import Account, Transaction
+from app.ext.database import DB as db
+from app.ext.metrics import capture_queries
+
+
+def quick_add_test_user():
+    user_repo = UserRepository()
+    user_repo.add_user(
+        username="test_user",
+        password="secure_password",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        mobile="1234567890",
+        address="123 Test St",
+    )
+    return user_repo
+
+
+def setup_dependencies():
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    for amount in (100.0, -20.0, 35.0):
+        TransactionRepository.create_transaction(
+            1, amount, "Deposit", "credit" if amount > 0 else "debit"
+        )
+
+    _, cursor = TransactionRepository.get_transactions_page(1, page_size=1)
+    return {
+        "transaction_id": db.session.query(Transaction).first().transaction_id,
+        "cursor": cursor,
+    }
+
+
+def query_plan(statement, parameters):
+    rows = (
+        db.session.connection()
+        .exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        .all()
+    )
+    return [row[-1] for row in rows]
+
+
+# ? Every public repository method must have at least one case here, see test_every_repository_method_is_covered
+REPOSITORY_CALLS = {
+    "UserRepository.add_user": lambda seed: UserRepository.add_user(
+        "other_user", "pw", "other@example.com", "O", "U", "555", "1 St"
+    ),
+    "UserRepository.authenticate_user": lambda seed: UserRepository.authenticate_user(
+        "test_user", "secure_password"
+    ),
+    "UserRepository.get_user_id_by_username": lambda seed: UserRepository.get_user_id_by_username(
+        "test_user"
+    ),
+    "UserRepository.update_basic_user_info": lambda seed: UserRepository.update_basic_user_info(
+        "test_user", address="1 New St"
+    ),
+    "UserRepository.change_user_password": lambda seed: UserRepository.change_user_password(
+        "test_user", "new_password"
+    ),
+    "UserRepository.change_username": lambda seed: UserRepository.change_username(
+        "renamed_user", old_username="test_user"
+    ),
+    "UserRepository.change_username[id]": lambda seed: UserRepository.change_username(
+        "renamed_user", id=1
+    ),
+    "UserRepository.get_user_overview": lambda seed: UserRepository.get_user_overview(
+        1, transactions_per_account=2
+    ),
+    "AccountRepository.get_accounts_by_user_id[selectinload]": lambda seed: AccountRepository.get_accounts_by_user_id(
+        1, options=[selectinload(Account.transactions), joinedload(Account.user)]
+    ),
+    "UserRepository.get_user_overview[view]": lambda seed: UserRepository.get_user_overview(
+        1, transactions_per_account=2, as_view=True
+    ),
+    "UserRepository.disable_user": lambda seed: UserRepository.disable_user(
+        "test_user"
+    ),
+    "UserRepository.enable_user": lambda seed: UserRepository.enable_user(id=1),
+    "AccountRepository.create_bank_account": lambda seed: AccountRepository.create_bank_account(
+        1, "savings", 1.0
+    ),
+    "AccountRepository.get_account_by_id": lambda seed: AccountRepository.get_account_by_id(
+        1
+    ),
+    "AccountRepository.get_accounts_by_user_id": lambda seed: AccountRepository.get_accounts_by_user_id(
+        1
+    ),
+    "AccountRepository.update_account_balance": lambda seed: AccountRepository.update_account_balance(
+        1, 10.0
+    ),
+    "AccountRepository.update_account_balance[atomic]": lambda seed: AccountRepository.update_account_balance(
+        1, 10.0, atomic=True, description="Deposit", transaction_type="credit"
+    ),
+    "AccountRepository.get_balance_at": lambda seed: AccountRepository.get_balance_at(
+        1, 4_102_444_800
+    ),
+    "AccountRepository.get_balances_at": lambda seed: AccountRepository.get_balances_at(
+        4_102_444_800
+    ),
+    "AccountRepository.get_balances_at[ids]": lambda seed: AccountRepository.get_balances_at(
+        4_102_444_800, [1, 2]
+    ),
+    "AccountRepository.checkpoint_balances": lambda seed: AccountRepository.checkpoint_balances(),
+    "AccountRepository.update_account_interest": lambda seed: AccountRepository.update_account_interest(
+        1, 2.0
+    ),
+    "AccountRepository.accrue_interest": lambda seed: AccountRepository.accrue_interest(
+        "2024-01-01", chunk_size=1
+    ),
+    "AccountRepository.disable_account": lambda seed: AccountRepository.disable_account(
+        1
+    ),
+    "AccountRepository.enable_account": lambda seed: AccountRepository.enable_account(
+        1
+    ),
+    "AccountRepository.flag_account": lambda seed: AccountRepository.flag_account(1),
+    "AccountRepository.disable_accounts": lambda seed: AccountRepository.disable_accounts(
+        [1, 2]
+    ),
+    "AccountRepository.enable_accounts": lambda seed: AccountRepository.enable_accounts(
+        [1, 2]
+    ),
+    "AccountRepository.flag_accounts": lambda seed: AccountRepository.flag_accounts(
+        [1, 2]
+    ),
+    "AccountRepository.transfer": lambda seed: AccountRepository.transfer(
+        1, 2, 10.0, "Transfer"
+    ),
+    "AccountRepository.transfer_batch": lambda seed: AccountRepository.transfer_batch(
+        [
+            {
+                "from_account_id": 1,
+                "to_account_id": 2,
+                "amount": 5.0,
+                "description": "Pay",
+            },
+            {
+                "from_account_id": 2,
+                "to_account_id": 1,
+                "amount": 1.0,
+                "description": "Pay",
+            },
+        ]
+    ),
+    "TransactionRepository.create_transaction": lambda seed: TransactionRepository.create_transaction(
+        1, 5.0, "Deposit", "credit"
+    ),
+    "TransactionRepository.create_transactions_bulk": lambda seed: TransactionRepository.create_transactions_bulk(
+        [
+            {
+                "account_id": account_id,
+                "amount": 5.0,
+                "description": "Deposit",
+                "transaction_type": "credit",
+            }
+            for account_id in (1, 2)
+        ]
+    ),
+    "TransactionRepository.get_transaction_by_id": lambda seed: TransactionRepository.get_transaction_by_id(
+        seed["transaction_id"]
+    ),
+    "TransactionRepository.get_transactions_by_account_id": lambda seed: TransactionRepository.get_transactions_by_account_id(
+        1
+    ),
+    "TransactionRepository.get_transactions_by_account_id[view]": lambda seed: TransactionRepository.get_transactions_by_account_id(
+        1, as_view=True
+    ),
+    "TransactionRepository.get_transactions_page": lambda seed: TransactionRepository.get_transactions_page(
+        1, cursor=seed["cursor"], page_size=1
+    ),
+    "TransactionRepository.get_transactions_page[type]": lambda seed: TransactionRepository.get_transactions_page(
+        1, page_size=1, transaction_type="credit"
+    ),
+    "TransactionRepository.stream_transactions_by_account_id": lambda seed: list(
+        TransactionRepository.stream_transactions_by_account_id(
+            1, transaction_type="credit"
+        )
+    ),
+    "TransactionRepository.update_transaction_status": lambda seed: TransactionRepository.update_transaction_status(
+        seed["transaction_id"], 1
+    ),
+    "TransactionRepository.update_transaction_statuses": lambda seed: TransactionRepository.update_transaction_statuses(
+        [seed["transaction_id"], "missing"], "processed"
+    ),
+    "TransactionRepository.update_transaction_statuses[declined]": lambda seed: TransactionRepository.update_transaction_statuses(
+        [seed["transaction_id"]], "declined"
+    ),
+    "TransactionRepository.update_transaction_status[declined]": lambda seed: TransactionRepository.update_transaction_status(
+        seed["transaction_id"], "declined"
+    ),
+    "RollupRepository.rebuild_rollups": lambda seed: RollupRepository.rebuild_rollups(),
+    "RollupRepository.rebuild_rollups[ids]": lambda seed: RollupRepository.rebuild_rollups(
+        [1, 2]
+    ),
+    "RollupRepository.get_daily_rollups": lambda seed: RollupRepository.get_daily_rollups(
+        1, start=datetime.date(2024, 1, 1), end=datetime.date(2099, 1, 1)
+    ),
+    "RollupRepository.get_statement_summary": lambda seed: RollupRepository.get_statement_summary(
+        1
+    ),
+    "TransactionRepository.aggregate_transactions": lambda seed: TransactionRepository.aggregate_transactions(
+        account_id=1
+    ),
+    "TransactionRepository.aggregate_transactions[day]": lambda seed: TransactionRepository.aggregate_transactions(
+        ("day", "transaction_type"), account_id=1, start=0, end=4_102_444_800
+    ),
+    "TransactionRepository.get_transaction_type_summary": lambda seed: TransactionRepository.get_transaction_type_summary(
+        1
+    ),
+    "TransactionRepository.get_recent_transactions": lambda seed: TransactionRepository.get_recent_transactions(
+        1
+    ),
+    "TransactionRepository.get_recent_transactions[before]": lambda seed: TransactionRepository.get_recent_transactions(
+        1, limit=1, before=seed["cursor"]
+    ),
+    "TransactionRepository.get_transaction_by_type": lambda seed: TransactionRepository.get_transaction_by_type(
+        1, "credit"
+    ),
+    "TransactionRepository.archive_transactions": lambda seed: TransactionRepository.update_transaction_status(
+        seed["transaction_id"], "processed"
+    )
+    and TransactionRepository.archive_transactions(before=4_102_444_800),
+    "TransactionRepository.export_snapshot": lambda seed: TransactionRepository.export_snapshot(
+        chunk_size=2
+    ),
+}
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        }
+    )
+    # ? Cache hits skip SQL entirely, which would hide the queries under test
+    cache.register_extension(app, NullCache())
+    app.extensions["transaction_archive"] = TransactionArchive(str(tmp_path))
+    app.extensions["transaction_snapshot"] = TransactionSnapshot(
+        str(tmp_path / "snapshot")
+    )
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def db_session(app):
+    with app.app_context():
+        db.session.begin_nested()
+        yield db.session
+        db.session.rollback()
+
+
+# ? Public helpers that never touch the database
+SQL_FREE_METHODS = {"TransactionRepository.make_cursor"}
+
+
+def test_every_repository_method_is_covered():
+    covered = {name.split("[")[0] for name in REPOSITORY_CALLS} | SQL_FREE_METHODS
+    for repository in (
+        UserRepository,
+        AccountRepository,
+        TransactionRepository,
+        RollupRepository,
+    ):
+        for name, _ in inspect.getmembers(repository, inspect.isfunction):
+            if not name.startswith("_"):
+                assert f"{repository.__name__}.{name}" in covered
+
+
+@pytest.mark.parametrize("name", REPOSITORY_CALLS)
+def test_repository_queries_use_indexes(db_session, name):
+    seed = setup_dependencies()
+
+    with capture_queries() as queries:
+        REPOSITORY_CALLS[name](seed)
+
+    assert queries
+    for _, statement, parameters, _ in queries:
+        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            continue
+
+        plan = query_plan(statement, parameters)
+        assert not any(
+            step.startswith("SCAN") for step in plan
+        ), f"{name} falls back to a scan:\n{statement}\n{plan}"
+        assert not any(
+            "TEMP B-TREE FOR ORDER BY" in step for step in plan
+        ), f"{name} sorts instead of walking an index:\n{statement}\n{plan}"
@@ -0,0 +1,137 @@
+import time
+
+import pytest
+
+
+from app import create_app
+from app.repolayer import UserRepository, AccountRepository, LRUCache
+from app.repolayer.cache import get_cache
+from app.datalayer import Account
+from app.ext.database import DB as db
+
+
+def quick_add_test_user():
+    user_repo = UserRepository()
+    user_repo.add_user(
+        username="test_user",
+        password="secure_password",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        mobile="1234567890",
+        address="123 Test St",
+    )
+    return user_repo
+
+
+@pytest.fixture()
+def app():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        }
+    )
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def db_session(app):
+    with app.app_context():
+        db.session.begin_nested()
+        yield db.session
+        db.session.rollback()
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_respects_max_size():
+    cache = LRUCache(max_entries=10, ttl=None, max_size=3)
+    cache.set("a", [1, 2])
+    cache.set("b", [3, 4])
+    cache.set("c", [1, 2, 3, 4])
+
+    assert cache.get("a") is None
+    assert cache.get("b") == [3, 4]
+    assert cache.get("c") is None
+    assert cache.stats()["size"] == 2
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["misses"] == 1
+
+
+def test_get_account_by_id_is_cached(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    account_id = db_session.query(Account).first().id
+
+    AccountRepository.get_account_by_id(account_id)
+    account = AccountRepository.get_account_by_id(account_id)
+
+    assert account.id == account_id
+    assert get_cache().stats()["hits"] == 1
+
+
+def test_update_account_balance_invalidates_cache(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    account_id = db_session.query(Account).first().id
+    AccountRepository.get_account_by_id(account_id)
+
+    AccountRepository.update_account_balance(account_id, 100.0)
+    assert AccountRepository.get_account_by_id(account_id).balance == 100.0
+
+    AccountRepository.update_account_balance(account_id, 50.0, atomic=True)
+    assert AccountRepository.get_account_by_id(account_id).balance == 150.0
+
+
+def test_account_status_changes_invalidate_user_accounts(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    assert len(AccountRepository.get_accounts_by_user_id(1)) == 1
+
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    accounts = AccountRepository.get_accounts_by_user_id(1)
+    assert len(accounts) == 2
+
+    AccountRepository.flag_account(accounts[0].id)
+    statuses = [
+        account.status for account in AccountRepository.get_accounts_by_user_id(1)
+    ]
+    assert statuses == ["flagged", "active"]
+
+
+def test_change_username_invalidates_cache(db_session):
+    quick_add_test_user()
+    assert UserRepository.get_user_id_by_username("test_user") == 1
+
+    UserRepository.change_username("new_username", old_username="test_user")
+
+    assert UserRepository.get_user_id_by_username("test_user") is None
+    assert UserRepository.get_user_id_by_username("new_username") == 1
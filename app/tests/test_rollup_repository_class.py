@@ -0,0 +1,325 @@
+import datetime
+
+import pytest
+from flask import Flask
+
+
+from app import create_app
+from app.repolayer import (
+    UserRepository,
+    AccountRepository,
+    TransactionRepository,
+    RollupRepository,
+)
+from app.repolayer import rollups as rollups_extension
+from app.repolayer.rollups import RollupsUnsupported, rollup_day, rollup_upsert
+from app.datalayer import Account, Transaction, DailyRollup
+from app.ext.database import DB as db
+from app.ext.metrics import capture_queries
+
+
+def quick_add_test_user():
+    user_repo = UserRepository()
+    user_repo.add_user(
+        username="test_user",
+        password="secure_password",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        mobile="1234567890",
+        address="123 Test St",
+    )
+    return user_repo
+
+
+def setup_dependencies():
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+
+
+def rollup_rows(db_session):
+    return sorted(
+        (
+            rollup.account_id,
+            rollup.day,
+            rollup.transaction_type,
+            rollup.count,
+            round(rollup.credits, 2),
+            round(rollup.debits, 2),
+            rollup.closing_balance,
+            rollup.closing_timestamp,
+            rollup.last_transaction_id,
+        )
+        for rollup in db_session.query(DailyRollup)
+    )
+
+
+@pytest.fixture()
+def app():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        }
+    )
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def db_session(app):
+    with app.app_context():
+        db.session.begin_nested()
+        yield db.session
+        db.session.rollback()
+
+
+def test_rollups_follow_every_write_path(db_session):
+    setup_dependencies()
+    TransactionRepository.create_transaction(1, 100.0, "Deposit", "credit")
+    TransactionRepository.create_transaction(1, -30.0, "Groceries", "debit")
+    AccountRepository.update_account_balance(
+        1, 50.0, atomic=True, description="Deposit", transaction_type="credit"
+    )
+    TransactionRepository.create_transactions_bulk(
+        [
+            {
+                "account_id": 2,
+                "amount": 10.0,
+                "description": "Bulk",
+                "transaction_type": "credit",
+            }
+        ]
+        * 3
+    )
+    AccountRepository.transfer(1, 2, 20.0, "Transfer")
+
+    today = rollup_day(datetime.datetime.now(datetime.timezone.utc).timestamp())
+    rollups = {
+        (rollup.account_id, rollup.transaction_type): rollup
+        for rollup in db_session.query(DailyRollup).filter_by(day=today)
+    }
+    assert {key: rollup.count for key, rollup in rollups.items()} == {
+        (1, "credit"): 2,
+        (1, "debit"): 2,
+        (2, "credit"): 4,
+    }
+    assert rollups[(1, "credit")].credits == 150.0
+    assert rollups[(1, "debit")].debits == 50.0
+    assert rollups[(2, "credit")].credits == 50.0
+    assert rollups[(1, "debit")].closing_balance == 30.0
+    assert rollups[(2, "credit")].closing_balance == 50.0
+
+
+def test_rollups_follow_status_changes(db_session):
+    setup_dependencies()
+    for amount in (100.0, 40.0, 25.0):
+        TransactionRepository.create_transaction(1, amount, "Deposit", "credit")
+    transaction_ids = [
+        transaction.transaction_id
+        for transaction in db_session.query(Transaction).order_by(Transaction.id)
+    ]
+
+    def credit_rollup():
+        db_session.expire_all()
+        rollup = db_session.query(DailyRollup).filter_by(account_id=1).one()
+        return rollup.count, rollup.credits
+
+    TransactionRepository.update_transaction_status(transaction_ids[0], "declined")
+    assert credit_rollup() == (2, 65.0)
+
+    # ? Moving between two excluded (or two counted) statuses leaves the rollup alone
+    TransactionRepository.update_transaction_status(transaction_ids[0], "refunded")
+    TransactionRepository.update_transaction_status(transaction_ids[1], "processed")
+    assert credit_rollup() == (2, 65.0)
+
+    assert (
+        TransactionRepository.update_transaction_statuses(transaction_ids, "declined")
+        == 3
+    )
+    assert credit_rollup() == (0, 0.0)
+
+    TransactionRepository.update_transaction_statuses(transaction_ids[1:], "processed")
+    assert credit_rollup() == (2, 65.0)
+
+
+def test_rebuild_rollups_matches_incremental_rollups(db_session):
+    setup_dependencies()
+    for amount in (100.0, -20.0, 35.0):
+        TransactionRepository.create_transaction(1, amount, "Deposit", "credit")
+    TransactionRepository.create_transaction(2, 12.5, "Deposit", "credit")
+    AccountRepository.transfer(1, 2, 10.0, "Transfer")
+    declined = db_session.query(Transaction).first().transaction_id
+    TransactionRepository.update_transaction_status(declined, "declined")
+    # ? Declining the day's closing row moves the closing balance back to the previous row
+    for amount in (100.0, 50.0):
+        TransactionRepository.create_transaction(2, amount, "Deposit", "fee")
+    closing = (
+        db_session.query(Transaction).order_by(Transaction.id.desc()).first()
+    ).transaction_id
+    TransactionRepository.update_transaction_status(closing, "declined")
+
+    incremental = rollup_rows(db_session)
+    fee = db_session.query(DailyRollup).filter_by(transaction_type="fee").one()
+    assert fee.closing_balance == 100.0
+
+    assert RollupRepository.rebuild_rollups(chunk_size=1) == len(incremental)
+    assert rollup_rows(db_session) == incremental
+    assert RollupRepository.rebuild_rollups([2]) == 2
+    assert rollup_rows(db_session) == incremental
+    assert RollupRepository.rebuild_rollups(chunk_size=0) is False
+
+
+def test_closing_balance_follows_timestamps(db_session):
+    setup_dependencies()
+    noon = datetime.datetime(2025, 3, 3, 12, tzinfo=datetime.timezone.utc).timestamp()
+    # ? Posted in this order, so the later timestamp carries the smaller transaction_id
+    TransactionRepository.create_transactions_bulk(
+        [
+            {
+                "account_id": 1,
+                "amount": amount,
+                "description": "Backdated",
+                "transaction_type": "credit",
+                "timestamp": timestamp,
+            }
+            for amount, timestamp in ((100.0, noon + 60), (50.0, noon))
+        ]
+    )
+    latest = db_session.query(Transaction).filter_by(timestamp=noon + 60).one()
+
+    rollup = db_session.query(DailyRollup).filter_by(day=rollup_day(noon)).one()
+    assert (rollup.closing_balance, rollup.last_transaction_id) == (
+        100.0,
+        latest.transaction_id,
+    )
+    incremental = rollup_rows(db_session)
+    RollupRepository.rebuild_rollups()
+    db_session.expire_all()
+    assert rollup_rows(db_session) == incremental
+    assert (
+        RollupRepository.get_statement_summary(
+            1, end=datetime.date(2025, 3, 3), days=1
+        )["closing_balance"]
+        == 100.0
+    )
+
+
+def test_rollups_reject_databases_without_upserts():
+    with pytest.raises(RollupsUnsupported):
+        rollup_upsert("mysql")
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "mysql://bank@localhost/bank"
+    with pytest.raises(RollupsUnsupported):
+        rollups_extension.register_extension(app)
+
+
+def test_rebuild_rollups_backfills_untracked_history(db_session):
+    setup_dependencies()
+    day = 19_800
+    db_session.add_all(
+        Transaction(
+            account_id=1,
+            transaction_id=f"{index:016x}",
+            amount=amount,
+            timestamp=(day + offset) * 86_400 + index,
+            description="Import",
+            status="processed",
+            transaction_type="credit" if amount > 0 else "debit",
+            post_tx_balance=balance,
+        )
+        for index, (offset, amount, balance) in enumerate(
+            [(0, 100.0, 100.0), (0, 50.0, 150.0), (0, -25.0, 125.0), (1, 10.0, 135.0)],
+            start=1,
+        )
+    )
+    db_session.commit()
+
+    assert RollupRepository.rebuild_rollups() == 3
+    rollups = RollupRepository.get_daily_rollups(
+        1, start=datetime.date(2024, 3, 18), end=datetime.date(2024, 3, 19)
+    )
+    assert [
+        (rollup.day, rollup.transaction_type, rollup.count, rollup.closing_balance)
+        for rollup in rollups
+    ] == [
+        (day, "credit", 2, 150.0),
+        (day, "debit", 1, 125.0),
+        (day + 1, "credit", 1, 135.0),
+    ]
+    assert RollupRepository.get_daily_rollups(2) is False
+
+
+def test_get_statement_summary(db_session):
+    setup_dependencies()
+    start = datetime.date(2025, 1, 1)
+    rows = []
+    balance = 0.0
+    for offset in range(0, 400, 20):
+        for amount in (100.0, -30.0):
+            balance += amount
+            rows.append(
+                {
+                    "account_id": 1,
+                    "amount": amount,
+                    "description": "Statement",
+                    "transaction_type": "credit" if amount > 0 else "debit",
+                    "timestamp": datetime.datetime(
+                        2025, 1, 1, 12, tzinfo=datetime.timezone.utc
+                    ).timestamp()
+                    + offset * 86_400,
+                }
+            )
+    TransactionRepository.create_transactions_bulk(rows)
+
+    end = start + datetime.timedelta(days=379)
+    with capture_queries() as queries:
+        summary = RollupRepository.get_statement_summary(1, end=end)
+
+    # ? Every query reads DailyRollup, never the Transaction table
+    assert len(queries) == 4
+    assert all('"transaction"' not in query.statement for query in queries)
+    assert summary["start"] == "2025-01-16"
+    assert summary["end"] == "2026-01-15"
+    assert summary["count"] == 36
+    assert summary["credits"] == 1800.0
+    assert summary["debits"] == 540.0
+    assert summary["net"] == 1260.0
+    assert summary["opening_balance"] == 70.0
+    assert summary["closing_balance"] == 1330.0
+    assert summary["by_type"]["debit"] == {"count": 18, "credits": 0.0, "debits": 540.0}
+    assert len(summary["months"]) == 12
+    assert sum(month["count"] for month in summary["months"]) == 36
+
+
+def test_get_statement_summary_without_history(db_session):
+    setup_dependencies()
+
+    summary = RollupRepository.get_statement_summary(2)
+    assert summary["count"] == 0
+    assert summary["opening_balance"] is None
+    assert summary["closing_balance"] is None
+    assert RollupRepository.get_statement_summary(99) is False
+    assert RollupRepository.get_statement_summary(1, days=0) is False
+
+
+def test_rebuild_rollups_command(app, db_session):
+    setup_dependencies()
+    TransactionRepository.create_transaction(1, 100.0, "Deposit", "credit")
+    TransactionRepository.create_transaction(2, 10.0, "Deposit", "credit")
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["rebuild-rollups", "--account", "1"])
+    assert result.exit_code == 0
+    assert "Rebuilt 1 rollup rows." in result.output
+
+    result = runner.invoke(args=["rebuild-rollups", "--chunk-size", "0"])
+    assert result.exit_code != 0
@@ -0,0 +1,422 @@
+import datetime
+import json
+import threading
+
+import pytest
+
+
+from app import create_app
+from app.repolayer import (
+    UserRepository,
+    AccountRepository,
+    TransactionRepository,
+    RollupRepository,
+)
+from app.repolayer.archive import (
+    ArchiveCorrupted,
+    TransactionArchive,
+    decode_segment,
+    encode_segment,
+    month_bounds,
+)
+from app.datalayer import Transaction, DailyRollup, BalanceCheckpoint
+from app.ext.database import DB as db
+
+
+def quick_add_test_user():
+    user_repo = UserRepository()
+    user_repo.add_user(
+        username="test_user",
+        password="secure_password",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        mobile="1234567890",
+        address="123 Test St",
+    )
+    return user_repo
+
+
+def at(year, month, day):
+    return datetime.datetime(
+        year, month, day, 12, tzinfo=datetime.timezone.utc
+    ).timestamp()
+
+
+def setup_dependencies():
+    # ? Account 1: two settled months, one unsettled old row and two recent rows. Account 2: one settled row.
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    TransactionRepository.create_transactions_bulk(
+        [
+            {
+                "account_id": account_id,
+                "amount": amount,
+                "description": "Old",
+                "transaction_type": "credit" if amount > 0 else "debit",
+                "timestamp": timestamp,
+            }
+            for account_id, amount, timestamp in [
+                (1, 100.0, at(2024, 1, 5)),
+                (1, -20.0, at(2024, 1, 9)),
+                (1, 5.0, at(2024, 1, 20)),
+                (1, 40.0, at(2024, 2, 3)),
+                (2, 10.0, at(2024, 1, 7)),
+            ]
+        ]
+    )
+    transaction_ids = [
+        transaction.transaction_id
+        for transaction in db.session.query(Transaction).order_by(Transaction.id)
+    ]
+    TransactionRepository.update_transaction_statuses(
+        [transaction_ids[index] for index in (0, 1, 3, 4)], "processed"
+    )
+    TransactionRepository.create_transaction(1, 7.0, "Recent", "credit")
+    TransactionRepository.create_transaction(1, -2.0, "Recent", "debit")
+    return transaction_ids
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        }
+    )
+    app.extensions["transaction_archive"] = TransactionArchive(
+        str(tmp_path / "archive"), account_range=10
+    )
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def db_session(app):
+    with app.app_context():
+        db.session.begin_nested()
+        yield db.session
+        db.session.rollback()
+
+
+def test_segment_round_trip():
+    rows = [
+        {
+            "id": index,
+            "account_id": 1 + index % 2,
+            "transaction_id": f"{index:016x}",
+            "amount": index * 1.5,
+            "timestamp": 1_700_000_000.25 + index,
+            "description": "Deposit",
+            "status": "processed",
+            "transaction_type": "credit",
+            "post_tx_balance": index * 10.0,
+        }
+        for index in range(1, 11)
+    ]
+
+    data = encode_segment(rows)
+    columns = decode_segment(data)
+    assert [
+        {name: columns[name][index] for name in rows[0]} for index in range(10)
+    ] == rows
+
+    corrupted = bytearray(data)
+    corrupted[-1] ^= 0xFF
+    with pytest.raises(ArchiveCorrupted):
+        decode_segment(bytes(corrupted))
+    with pytest.raises(ArchiveCorrupted):
+        decode_segment(b"not a segment")
+
+
+def test_month_bounds():
+    month, start, end = month_bounds(at(2024, 12, 31))
+    assert month == "2024-12"
+    assert start == at(2024, 12, 1) - 12 * 3600
+    assert end == at(2025, 1, 1) - 12 * 3600
+
+
+def test_archive_transactions(app, db_session):
+    transaction_ids = setup_dependencies()
+
+    assert TransactionRepository.archive_transactions(before=at(2025, 1, 1)) == {
+        "segments": 2,
+        "rows": 4,
+    }
+
+    archive = app.extensions["transaction_archive"]
+    with open(archive.manifest_path, encoding="utf-8") as manifest:
+        segments = json.load(manifest)["segments"]
+    assert sorted((entry["month"], entry["rows"]) for entry in segments) == [
+        ("2024-01", 3),
+        ("2024-02", 1),
+    ]
+    assert {(entry["account_min"], entry["account_max"]) for entry in segments} == {
+        (1, 10)
+    }
+
+    # ? The unsettled row stays behind, the recent ones are inside the retention window
+    remaining = {
+        transaction.transaction_id for transaction in db_session.query(Transaction)
+    }
+    assert transaction_ids[2] in remaining
+    assert len(remaining) == 3
+
+    checkpoints = sorted(
+        (checkpoint.account_id, checkpoint.balance)
+        for checkpoint in db_session.query(BalanceCheckpoint)
+    )
+    assert checkpoints == [(1, 80.0), (1, 100.0), (1, 125.0), (2, 10.0)]
+    assert AccountRepository.get_balance_at(1, at(2024, 1, 10)) == 80.0
+    assert AccountRepository.get_balance_at(2, at(2024, 6, 1)) == 10.0
+
+    # ? Nothing left to archive, a second run is a no-op
+    assert TransactionRepository.archive_transactions(before=at(2025, 1, 1)) == {
+        "segments": 0,
+        "rows": 0,
+    }
+
+
+def test_concurrent_publishers_keep_every_segment(tmp_path):
+    archives = [TransactionArchive(str(tmp_path)) for _ in range(8)]
+    threads = [
+        threading.Thread(
+            target=lambda archive=archive, index=index: [
+                archive.publish([{"file": f"{index}-{sequence}.seg"}])
+                for sequence in range(10)
+            ]
+        )
+        for index, archive in enumerate(archives)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(archives[0].segments()) == 80
+
+
+def test_archiving_again_skips_written_checkpoints(db_session):
+    setup_dependencies()
+    row = {
+        "id": 1,
+        "account_id": 1,
+        "timestamp": at(2024, 1, 5),
+        "post_tx_balance": 100.0,
+    }
+
+    TransactionRepository._drop_archived([row])
+    # ? A row left behind by an interrupted run is archived again
+    TransactionRepository._drop_archived([row])
+    assert db_session.query(BalanceCheckpoint).count() == 1
+
+
+def test_readers_include_archived_transactions(db_session):
+    transaction_ids = setup_dependencies()
+    TransactionRepository.archive_transactions(before=at(2025, 1, 1))
+
+    archived = TransactionRepository.get_transaction_by_id(transaction_ids[0])
+    assert archived.amount == 100.0 and archived.status == "processed"
+    view = TransactionRepository.get_transaction_by_id(transaction_ids[0], as_view=True)
+    assert view.transaction_id == transaction_ids[0]
+
+    history = TransactionRepository.get_transactions_by_account_id(1)
+    assert [transaction.amount for transaction in history] == [
+        100.0,
+        -20.0,
+        5.0,
+        40.0,
+        7.0,
+        -2.0,
+    ]
+    assert [
+        transaction.amount
+        for transaction in TransactionRepository.get_transaction_by_type(1, "debit")
+    ] == [-20.0, -2.0]
+    assert [
+        transaction.amount
+        for transaction in TransactionRepository.stream_transactions_by_account_id(1)
+    ] == [transaction.amount for transaction in history]
+    assert [
+        transaction.amount
+        for transaction in TransactionRepository.get_recent_transactions(1, limit=3)
+    ] == [-2.0, 7.0, 40.0]
+    assert TransactionRepository.get_transactions_by_account_id(2, as_view=True)[
+        0
+    ] == TransactionRepository.get_transaction_by_id(transaction_ids[4], as_view=True)
+
+
+def test_pages_cross_the_archive_boundary(db_session):
+    setup_dependencies()
+    TransactionRepository.archive_transactions(before=at(2025, 1, 1))
+
+    amounts = []
+    cursor = None
+    while True:
+        page, cursor = TransactionRepository.get_transactions_page(
+            1, cursor=cursor, page_size=4
+        )
+        amounts.extend(transaction.amount for transaction in page)
+        if cursor is None:
+            break
+    assert amounts == [100.0, -20.0, 5.0, 40.0, 7.0, -2.0]
+
+    recent = TransactionRepository.get_recent_transactions(1, limit=2)
+    older = TransactionRepository.get_recent_transactions(
+        1, limit=2, before=TransactionRepository.make_cursor(recent[-1])
+    )
+    assert [transaction.amount for transaction in older] == [40.0, 5.0]
+
+
+def test_archive_rows_seek_and_read_lazily(app, db_session):
+    setup_dependencies()
+    TransactionRepository.archive_transactions(before=at(2025, 1, 1))
+    archive = app.extensions["transaction_archive"]
+    read = []
+    read_segment = archive.read_segment
+    archive.read_segment = lambda entry: read.append(entry["month"]) or read_segment(
+        entry
+    )
+
+    rows = archive.rows(account_id=1, limit=1)
+    assert read == []
+    assert [row["amount"] for row in rows] == [100.0]
+    assert read == ["2024-01"]
+
+    read.clear()
+    newest = list(archive.rows(account_id=1, descending=True, limit=1))
+    assert [row["amount"] for row in newest] == [40.0]
+    assert read == ["2024-02"]
+
+    first, second = archive.rows(account_id=1, limit=2)
+    key = (first["timestamp"], first["id"])
+    assert [row["amount"] for row in archive.rows(account_id=1, after=key)] == [
+        -20.0,
+        40.0,
+    ]
+    assert [
+        row["amount"]
+        for row in archive.rows(
+            account_id=1, before=(second["timestamp"], second["id"]), descending=True
+        )
+    ] == [100.0]
+    # ? Segments entirely before the after key are skipped without being read
+    read.clear()
+    assert list(archive.rows(account_id=1, after=(at(2024, 2, 1), 0))) == newest
+    assert read.count("2024-01") == 0
+
+
+def test_aggregates_include_archived_transactions(db_session):
+    setup_dependencies()
+    queries = [
+        {"account_id": 1},
+        {"group_by": ("month", "transaction_type"), "account_id": 1},
+        {"group_by": ("day",), "start": at(2024, 1, 9), "end": at(2024, 2, 4)},
+        {"group_by": ("account_id", "status")},
+        {"group_by": (), "transaction_type": "credit"},
+        {"group_by": ("status",), "status": "processed"},
+        {"account_id": 2, "status": "processing"},
+    ]
+    before = [
+        TransactionRepository.aggregate_transactions(**query) for query in queries
+    ]
+    TransactionRepository.archive_transactions(before=at(2025, 1, 1))
+
+    after = [TransactionRepository.aggregate_transactions(**query) for query in queries]
+    assert after == [
+        [{**group, "avg": pytest.approx(group["avg"])} for group in groups]
+        for groups in before
+    ]
+    assert after[0] == [
+        {
+            "transaction_type": "credit",
+            "count": 4,
+            "total": 152.0,
+            "min": 5.0,
+            "max": 100.0,
+            "avg": 38.0,
+        },
+        {
+            "transaction_type": "debit",
+            "count": 2,
+            "total": -22.0,
+            "min": -20.0,
+            "max": -2.0,
+            "avg": -11.0,
+        },
+    ]
+    # ? Account 2 shares the archived account range, its summary still works
+    assert TransactionRepository.get_transaction_type_summary(2) == {
+        "credit": {"count": 1, "total": 10.0, "min": 10.0, "max": 10.0, "avg": 10.0}
+    }
+
+
+def test_archived_ids_are_not_reused(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    TransactionRepository.create_transactions_bulk(
+        [
+            {
+                "account_id": 1,
+                "amount": 100.0,
+                "description": "Old",
+                "transaction_type": "credit",
+                "timestamp": at(2024, 1, 5),
+            }
+        ]
+    )
+    archived_id, transaction_id = db_session.query(
+        Transaction.id, Transaction.transaction_id
+    ).one()
+    TransactionRepository.update_transaction_statuses([transaction_id], "processed")
+    TransactionRepository.archive_transactions(before=at(2025, 1, 1))
+    assert db_session.query(Transaction).count() == 0
+
+    # ? The newest row was archived and deleted, the next insert must not take its id
+    TransactionRepository.create_transaction(1, 7.0, "Recent", "credit")
+    assert db_session.query(Transaction).one().id > archived_id
+
+    history = TransactionRepository.get_transactions_by_account_id(1)
+    assert [transaction.amount for transaction in history] == [100.0, 7.0]
+    assert [
+        transaction.amount
+        for transaction in TransactionRepository.stream_transactions_by_account_id(1)
+    ] == [100.0, 7.0]
+    assert RollupRepository.rebuild_rollups() == 2
+
+
+def test_rebuild_rollups_keeps_archived_history(db_session):
+    setup_dependencies()
+
+    def rollup_rows():
+        db_session.expire_all()
+        return sorted(
+            (rollup.account_id, rollup.day, rollup.transaction_type, rollup.count)
+            for rollup in db_session.query(DailyRollup)
+        )
+
+    incremental = rollup_rows()
+    TransactionRepository.archive_transactions(before=at(2025, 1, 1))
+    assert rollup_rows() == incremental
+
+    assert RollupRepository.rebuild_rollups() == len(incremental)
+    assert rollup_rows() == incremental
+
+
+def test_archive_transactions_command(app, db_session):
+    setup_dependencies()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(
+        args=["archive-transactions", "--before", str(at(2025, 1, 1))]
+    )
+    assert result.exit_code == 0
+    assert "Archived 4 transactions into 2 segments." in result.output
@@ -3,8 +3,9 @@ import pytest
 
 from app import create_app
 from app.repolayer import UserRepository, AccountRepository, TransactionRepository
-from app.datalayer import User, Account, Transaction
+from app.datalayer import User, Account, Transaction, TransactionView
 from app.ext.database import DB as db
+from app.ext.metrics import capture_queries
 
 
 def quick_add_test_user():
@@ -35,8 +36,7 @@ def setup_dependencies(db_session):
 
 @pytest.fixture()
 def app():
-    app = create_app()
-    app.config.update(
+    app = create_app(
         {
             "TESTING": True,
             "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
@@ -202,3 +202,403 @@ def test_get_transaction_by_type_failure(db_session):
 
     transactions = TransactionRepository.get_transaction_by_type(account.id, "debit")
     assert transactions is False
+
+
+def test_create_transactions_bulk_success(db_session):
+    account = setup_dependencies(db_session)
+    rows = [
+        {
+            "account_id": account.id,
+            "amount": amount,
+            "description": "Settlement",
+            "transaction_type": "credit",
+        }
+        for amount in (100.0, -30.0, 5.5)
+    ]
+
+    results = TransactionRepository.create_transactions_bulk(rows, chunk_size=2)
+
+    assert all(results)
+    assert len(set(results)) == 3
+    transactions = (
+        db_session.query(Transaction)
+        .filter_by(account_id=account.id)
+        .order_by(Transaction.id)
+        .all()
+    )
+    assert [t.post_tx_balance for t in transactions] == [100.0, 70.0, 75.5]
+    assert [t.transaction_id for t in transactions] == results
+    assert db_session.query(Account).get(account.id).balance == 75.5
+
+
+def test_create_transactions_bulk_partial_failure(db_session):
+    account = setup_dependencies(db_session)
+    rows = [
+        {
+            "account_id": account.id,
+            "amount": 10.0,
+            "description": "Ok",
+            "transaction_type": "credit",
+        },
+        {
+            "account_id": -1,
+            "amount": 10.0,
+            "description": "Bad",
+            "transaction_type": "credit",
+        },
+        {
+            "account_id": account.id,
+            "amount": "ten",
+            "description": "Bad",
+            "transaction_type": "credit",
+        },
+        {
+            "account_id": account.id,
+            "amount": 20.0,
+            "description": "Ok",
+            "transaction_type": "credit",
+        },
+    ]
+
+    results = TransactionRepository.create_transactions_bulk(rows)
+
+    assert results[0] is not False
+    assert results[1] is False
+    assert results[2] is False
+    assert results[3] is not False
+    transactions = db_session.query(Transaction).filter_by(account_id=account.id).all()
+    assert len(transactions) == 2
+    assert db_session.query(Account).get(account.id).balance == 30.0
+
+
+def test_create_transactions_bulk_without_balance_update(db_session):
+    account = setup_dependencies(db_session)
+    rows = [
+        {
+            "account_id": account.id,
+            "amount": 10.0,
+            "description": "Ok",
+            "transaction_type": "credit",
+        },
+        {
+            "account_id": account.id,
+            "amount": 10.0,
+            "description": "Ok",
+            "transaction_type": "credit",
+        },
+    ]
+
+    results = TransactionRepository.create_transactions_bulk(
+        rows, update_balances=False
+    )
+
+    assert all(results)
+    assert db_session.query(Account).get(account.id).balance == 0.0
+
+
+def test_get_transactions_page_success(db_session):
+    account = setup_dependencies(db_session)
+    for amount in range(5):
+        TransactionRepository.create_transaction(
+            account.id, float(amount), "Deposit", "credit"
+        )
+
+    first_page, cursor = TransactionRepository.get_transactions_page(
+        account.id, page_size=2
+    )
+    second_page, cursor = TransactionRepository.get_transactions_page(
+        account.id, cursor=cursor, page_size=2
+    )
+    last_page, cursor = TransactionRepository.get_transactions_page(
+        account.id, cursor=cursor, page_size=2
+    )
+
+    assert [t.amount for t in first_page + second_page + last_page] == [
+        0.0,
+        1.0,
+        2.0,
+        3.0,
+        4.0,
+    ]
+    assert len(last_page) == 1
+    assert cursor is None
+
+
+def test_get_transactions_page_by_type(db_session):
+    account = setup_dependencies(db_session)
+    TransactionRepository.create_transaction(account.id, 10.0, "Deposit", "credit")
+    TransactionRepository.create_transaction(account.id, -5.0, "Coffee", "debit")
+
+    page, cursor = TransactionRepository.get_transactions_page(
+        account.id, transaction_type="debit"
+    )
+
+    assert [t.description for t in page] == ["Coffee"]
+    assert cursor is None
+
+
+def test_get_transactions_page_failure(db_session):
+    account = setup_dependencies(db_session)
+
+    assert (
+        TransactionRepository.get_transactions_page(account.id, cursor="not-a-cursor")
+        is False
+    )
+    assert TransactionRepository.get_transactions_page(account.id, page_size=0) is False
+
+
+def test_stream_transactions_by_account_id_success(db_session):
+    account = setup_dependencies(db_session)
+    for amount in range(5):
+        TransactionRepository.create_transaction(
+            account.id, float(amount), "Deposit", "credit"
+        )
+
+    streamed = TransactionRepository.stream_transactions_by_account_id(
+        account.id, batch_size=2
+    )
+
+    assert [t.amount for t in streamed] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_get_recent_transactions_returns_latest_first(db_session):
+    account = setup_dependencies(db_session)
+    for amount in range(15):
+        TransactionRepository.create_transaction(
+            account.id, float(amount), "Deposit", "credit"
+        )
+
+    latest = TransactionRepository.get_recent_transactions(account.id, limit=5)
+    older = TransactionRepository.get_recent_transactions(
+        account.id, limit=5, before=TransactionRepository.make_cursor(latest[-1])
+    )
+
+    assert [t.amount for t in latest] == [14.0, 13.0, 12.0, 11.0, 10.0]
+    assert [t.amount for t in older] == [9.0, 8.0, 7.0, 6.0, 5.0]
+
+
+def test_get_recent_transactions_invalid_cursor_failure(db_session):
+    account = setup_dependencies(db_session)
+    TransactionRepository.create_transaction(account.id, 10.0, "Deposit", "credit")
+
+    assert (
+        TransactionRepository.get_recent_transactions(account.id, before="nope")
+        is False
+    )
+
+
+def test_update_transaction_status_invalid_status(db_session):
+    account = setup_dependencies(db_session)
+    TransactionRepository.create_transaction(account.id, 100.0, "Deposit", "credit")
+    transaction = db_session.query(Transaction).first()
+
+    assert (
+        TransactionRepository.update_transaction_status(transaction.transaction_id, 6)
+        is False
+    )
+    assert (
+        TransactionRepository.update_transaction_status(transaction.transaction_id, -1)
+        is False
+    )
+
+
+def test_update_transaction_statuses_success(db_session):
+    account = setup_dependencies(db_session)
+    for _ in range(5):
+        TransactionRepository.create_transaction(account.id, 10.0, "Deposit", "credit")
+    transaction_ids = [
+        transaction.transaction_id for transaction in db_session.query(Transaction)
+    ]
+
+    updated = TransactionRepository.update_transaction_statuses(
+        transaction_ids[:4] + [transaction_ids[0], "nonexistent_id"],
+        "processed",
+        chunk_size=2,
+    )
+
+    assert updated == 4
+    statuses = [
+        db_session.query(Transaction)
+        .filter_by(transaction_id=transaction_id)
+        .one()
+        .status
+        for transaction_id in transaction_ids
+    ]
+    assert statuses == ["processed"] * 4 + ["processing"]
+    assert TransactionRepository.update_transaction_statuses(transaction_ids, 3) == 5
+
+
+def test_update_transaction_statuses_failure(db_session):
+    account = setup_dependencies(db_session)
+    TransactionRepository.create_transaction(account.id, 10.0, "Deposit", "credit")
+    transaction = db_session.query(Transaction).first()
+
+    assert (
+        TransactionRepository.update_transaction_statuses(
+            [transaction.transaction_id], "settled"
+        )
+        is False
+    )
+    assert (
+        TransactionRepository.update_transaction_statuses(
+            [transaction.transaction_id], 1, chunk_size=0
+        )
+        is False
+    )
+    assert transaction.status == "processing"
+
+
+def test_get_transactions_as_views(db_session):
+    account = setup_dependencies(db_session)
+    for amount in (10.0, 20.0, 30.0):
+        TransactionRepository.create_transaction(
+            account.id, amount, "Deposit", "credit"
+        )
+    db_session.expire_all()
+
+    views = TransactionRepository.get_transactions_by_account_id(
+        account.id, as_view=True
+    )
+    assert [view.amount for view in views] == [10.0, 20.0, 30.0]
+    assert all(isinstance(view, TransactionView) for view in views)
+    assert not any(
+        isinstance(item, Transaction) for item in db_session.identity_map.values()
+    )
+    with pytest.raises(AttributeError):
+        views[0].amount = 0.0
+
+    assert (
+        TransactionRepository.get_transaction_by_id(
+            views[0].transaction_id, as_view=True
+        )
+        == views[0]
+    )
+    assert (
+        TransactionRepository.get_transaction_by_type(
+            account.id, "credit", as_view=True
+        )
+        == views
+    )
+    assert (
+        TransactionRepository.get_recent_transactions(account.id, limit=2, as_view=True)
+        == views[:0:-1]
+    )
+
+    page, cursor = TransactionRepository.get_transactions_page(
+        account.id, page_size=2, as_view=True
+    )
+    assert page == views[:2]
+    page, cursor = TransactionRepository.get_transactions_page(
+        account.id, cursor=cursor, page_size=2, as_view=True
+    )
+    assert page == views[2:]
+    assert cursor is None
+
+
+def seed_aggregate_history(account):
+    # ? 2024-03-18 10:00 UTC and onwards
+    base = 1_710_756_000
+    TransactionRepository.create_transactions_bulk(
+        {
+            "account_id": account.id,
+            "amount": amount,
+            "description": "History",
+            "transaction_type": transaction_type,
+            "timestamp": base + offset,
+        }
+        for offset, amount, transaction_type in (
+            (0, 100.0, "credit"),
+            (60, 50.0, "credit"),
+            (3_600, -20.0, "debit"),
+            (86_400, -5.0, "fee"),
+            (40 * 86_400, 30.0, "credit"),
+        )
+    )
+    return base
+
+
+def test_aggregate_transactions_by_type(db_session):
+    account = setup_dependencies(db_session)
+    seed_aggregate_history(account)
+    account_id = account.id
+
+    with capture_queries() as queries:
+        groups = TransactionRepository.aggregate_transactions(account_id=account_id)
+
+    assert len(queries) == 1
+    assert groups == [
+        {
+            "transaction_type": "credit",
+            "count": 3,
+            "total": 180.0,
+            "min": 30.0,
+            "max": 100.0,
+            "avg": 60.0,
+        },
+        {
+            "transaction_type": "debit",
+            "count": 1,
+            "total": -20.0,
+            "min": -20.0,
+            "max": -20.0,
+            "avg": -20.0,
+        },
+        {
+            "transaction_type": "fee",
+            "count": 1,
+            "total": -5.0,
+            "min": -5.0,
+            "max": -5.0,
+            "avg": -5.0,
+        },
+    ]
+
+
+def test_aggregate_transactions_by_time_bucket(db_session):
+    account = setup_dependencies(db_session)
+    base = seed_aggregate_history(account)
+
+    def totals(group_by, **filters):
+        return [
+            (*(group[key] for key in group_by), group["count"], group["total"])
+            for group in TransactionRepository.aggregate_transactions(
+                group_by, account_id=account.id, **filters
+            )
+        ]
+
+    assert totals(("hour",), end=base + 86_400) == [
+        ("2024-03-18T10", 2, 150.0),
+        ("2024-03-18T11", 1, -20.0),
+    ]
+    assert totals(("day", "transaction_type"), start=base + 60) == [
+        ("2024-03-18", "credit", 1, 50.0),
+        ("2024-03-18", "debit", 1, -20.0),
+        ("2024-03-19", "fee", 1, -5.0),
+        ("2024-04-27", "credit", 1, 30.0),
+    ]
+    assert totals(("month",), transaction_type="credit") == [
+        ("2024-03", 2, 150.0),
+        ("2024-04", 1, 30.0),
+    ]
+    assert totals(("status",)) == [("processing", 5, 155.0)]
+    assert totals((), status="declined") == [(0, None)]
+
+
+def test_aggregate_transactions_failure(db_session):
+    assert TransactionRepository.aggregate_transactions(("day", "month")) is False
+    assert TransactionRepository.aggregate_transactions(("description",)) is False
+    assert TransactionRepository.aggregate_transactions(("status", "status")) is False
+
+
+def test_get_transaction_type_summary(db_session):
+    account = setup_dependencies(db_session)
+    base = seed_aggregate_history(account)
+
+    summary = TransactionRepository.get_transaction_type_summary(
+        account.id, start=base, end=base + 86_400
+    )
+    assert summary == {
+        "credit": {"count": 2, "total": 150.0, "min": 50.0, "max": 100.0, "avg": 75.0},
+        "debit": {"count": 1, "total": -20.0, "min": -20.0, "max": -20.0, "avg": -20.0},
+    }
+    assert TransactionRepository.get_transaction_type_summary(99) == {}
@@ -0,0 +1,180 @@
+import os
+
+import numpy as np
+import pytest
+
+
+from app import create_app
+from app.repolayer import (
+    UserRepository,
+    AccountRepository,
+    TransactionRepository,
+)
+from app.repolayer.archive import TransactionArchive
+from app.repolayer.snapshot import SnapshotError, TransactionSnapshot
+from app.datalayer import Transaction
+from app.ext.database import DB as db
+
+
+def quick_add_test_user():
+    user_repo = UserRepository()
+    user_repo.add_user(
+        username="test_user",
+        password="secure_password",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        mobile="1234567890",
+        address="123 Test St",
+    )
+    return user_repo
+
+
+def setup_dependencies():
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    for account_id, amount in ((1, 100.0), (1, -20.0), (2, 35.0)):
+        TransactionRepository.create_transaction(
+            account_id, amount, "Deposit", "credit" if amount > 0 else "debit"
+        )
+
+
+@pytest.fixture()
+def app(tmp_path):
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        }
+    )
+    app.extensions["transaction_snapshot"] = TransactionSnapshot(
+        str(tmp_path / "snapshot")
+    )
+
+    with app.app_context():
+        db.create_all()
+
+    yield app
+
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture()
+def db_session(app):
+    with app.app_context():
+        db.session.begin_nested()
+        yield db.session
+        db.session.rollback()
+
+
+def test_export_snapshot(app, db_session):
+    setup_dependencies()
+
+    assert TransactionRepository.export_snapshot(chunk_size=2) == 3
+
+    snapshot = app.extensions["transaction_snapshot"]
+    columns = snapshot.columns()
+    assert isinstance(columns["amount"], np.memmap)
+    assert columns["account_id"].tolist() == [1, 1, 2]
+    assert columns["amount"].tolist() == [100.0, -20.0, 35.0]
+    assert snapshot.dictionary("transaction_type") == ["credit", "debit"]
+    assert columns["transaction_type"].tolist() == [0, 1, 0]
+    assert snapshot.dictionary("status") == ["processing"]
+
+    credits = columns["transaction_type"] == snapshot.code("transaction_type", "credit")
+    assert columns["amount"][credits].sum() == 135.0
+    assert snapshot.code("transaction_type", "missing") is None
+    assert (
+        snapshot.high_water_mark
+        == db_session.query(Transaction).order_by(Transaction.id.desc()).first().id
+    )
+
+
+def test_export_snapshot_is_incremental(app, db_session):
+    setup_dependencies()
+    TransactionRepository.export_snapshot()
+    snapshot = app.extensions["transaction_snapshot"]
+    before = snapshot.columns()
+
+    # ? Already exported rows are not read again, status changes are not reflected
+    assert TransactionRepository.export_snapshot() == 0
+    transaction_id = db_session.query(Transaction).first().transaction_id
+    TransactionRepository.update_transaction_status(transaction_id, "declined")
+    TransactionRepository.create_transaction(2, 5.0, "Deposit", "credit")
+
+    assert TransactionRepository.export_snapshot() == 1
+    columns = snapshot.columns()
+    assert columns["amount"].tolist() == [100.0, -20.0, 35.0, 5.0]
+    assert snapshot.dictionary("status") == ["processing"]
+    # ? Mappings opened earlier keep their size
+    assert len(before["amount"]) == 3
+
+    assert TransactionRepository.export_snapshot(chunk_size=0) is False
+
+
+def test_export_snapshot_after_archiving_the_newest_row(app, db_session, tmp_path):
+    app.extensions["transaction_archive"] = TransactionArchive(
+        str(tmp_path / "archive")
+    )
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    TransactionRepository.create_transactions_bulk(
+        [
+            {
+                "account_id": 1,
+                "amount": 100.0,
+                "description": "Old",
+                "transaction_type": "credit",
+                "timestamp": 1_704_456_000.0,
+            }
+        ]
+    )
+    TransactionRepository.update_transaction_statuses(
+        [db_session.query(Transaction.transaction_id).scalar()], "processed"
+    )
+    assert TransactionRepository.export_snapshot() == 1
+    TransactionRepository.archive_transactions(before=1_735_689_600.0)
+
+    # ? The archived row was the newest one, the next row still lands above the high-water mark
+    TransactionRepository.create_transaction(1, 7.0, "Recent", "credit")
+    assert TransactionRepository.export_snapshot() == 1
+    columns = app.extensions["transaction_snapshot"].columns()
+    assert columns["amount"].tolist() == [100.0, 7.0]
+
+
+def test_interrupted_append_is_discarded(tmp_path):
+    snapshot = TransactionSnapshot(str(tmp_path))
+    row = {
+        "id": 1,
+        "account_id": 1,
+        "amount": 10.0,
+        "timestamp": 1_700_000_000.0,
+        "transaction_type": "credit",
+        "status": "processed",
+    }
+    assert snapshot.columns()["amount"].tolist() == []
+    assert snapshot.append([row]) == 1
+
+    # ? Bytes written without the header moving forward, as a crash mid refresh would leave them
+    with open(os.path.join(tmp_path, "amount.bin"), "ab") as file:
+        file.write(np.asarray([99.0], "<f8").tobytes())
+    assert snapshot.columns()["amount"].tolist() == [10.0]
+
+    assert snapshot.append([{**row, "id": 2, "amount": 20.0}]) == 1
+    assert snapshot.columns()["amount"].tolist() == [10.0, 20.0]
+    with pytest.raises(SnapshotError):
+        snapshot.append([row])
+
+
+def test_export_snapshot_command(app, db_session):
+    setup_dependencies()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["export-snapshot", "--chunk-size", "2"])
+    assert result.exit_code == 0
+    assert "Exported 3 transactions." in result.output
+
+    result = runner.invoke(args=["export-snapshot", "--chunk-size", "0"])
+    assert result.exit_code != 0
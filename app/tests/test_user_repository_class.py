@@ -2,9 +2,10 @@ import pytest
 
 
 from app import create_app
-from app.repolayer import UserRepository
-from app.datalayer import User
+from app.repolayer import UserRepository, AccountRepository, TransactionRepository
+from app.datalayer import User, UserView
 from app.ext.database import DB as db
+from app.ext.metrics import assert_max_queries
 
 
 def quick_add_test_user():
@@ -23,8 +24,7 @@ def quick_add_test_user():
 
 @pytest.fixture()
 def app():
-    app = create_app()
-    app.config.update(
+    app = create_app(
         {
             "TESTING": True,
             "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
@@ -48,6 +48,18 @@ def db_session(app):
         db.session.rollback()
 
 
+def test_app_runs_on_the_configured_database(app, tmp_path):
+    with app.app_context():
+        assert db.engine.url.database == ":memory:"
+
+    file_app = create_app(
+        {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'pooled.sqlite'}"}
+    )
+    with file_app.app_context():
+        assert db.engine.pool.size() == 10
+        db.engine.dispose()
+
+
 def test_add_user_success(db_session):
     # Given
     user_repo = UserRepository()
@@ -251,3 +263,118 @@ def test_enable_user_failure(db_session):
 
     assert user_repo.enable_user("test_userr") is False
     assert db.session.query(User).filter_by(username="test_user").first().disabled == True  # type: ignore
+
+
+def test_add_user_failure_due_to_duplicate_mobile(db_session, caplog):
+    quick_add_test_user()
+    user_repo = UserRepository()
+
+    result = user_repo.add_user(
+        "other_user",
+        "secure_password",
+        "other@example.com",
+        "Other",
+        "User",
+        "1234567890",
+        "456 Test St",
+    )
+
+    assert result is False
+    assert "mobile: 1234567890" in caplog.text
+    assert db_session.query(User).count() == 1
+
+
+def test_change_username_failure_due_to_duplicate_username(db_session):
+    quick_add_test_user()
+    user_repo = UserRepository()
+    user_repo.add_user(
+        "other_user",
+        "secure_password",
+        "other@example.com",
+        "Other",
+        "User",
+        "0987654321",
+        "456 Test St",
+    )
+
+    assert user_repo.change_username("other_user", old_username="test_user") is False
+    assert user_repo.change_username("test_user", old_username="test_user") is False
+    assert db.session.query(User).get(1).username == "test_user"  # type: ignore
+
+
+def test_get_user_overview_success(db_session):
+    quick_add_test_user()
+    for _ in range(3):
+        AccountRepository.create_bank_account(1, "savings", 1.5)
+    for amount in range(9):
+        TransactionRepository.create_transaction(
+            amount % 3 + 1, float(amount), "Deposit", "credit"
+        )
+    db_session.expire_all()
+
+    with assert_max_queries(3):
+        overview = UserRepository.get_user_overview(1, transactions_per_account=2)
+        amounts = {
+            account.id: [
+                transaction.amount
+                for transaction in overview["recent_transactions"][account.id]
+            ]
+            for account in overview["accounts"]
+        }
+
+    assert overview["user"].username == "test_user"
+    assert amounts == {1: [6.0, 3.0], 2: [7.0, 4.0], 3: [8.0, 5.0]}
+
+
+def test_get_user_overview_query_count_is_fixed(db_session):
+    quick_add_test_user()
+    for _ in range(10):
+        AccountRepository.create_bank_account(1, "checking", 0.5)
+    db_session.expire_all()
+
+    with assert_max_queries(3):
+        overview = UserRepository.get_user_overview(1)
+
+    assert len(overview["accounts"]) == 10
+    assert all(
+        transactions == [] for transactions in overview["recent_transactions"].values()
+    )
+
+
+def test_get_user_overview_failure(db_session):
+    assert UserRepository.get_user_overview(1) is False
+    quick_add_test_user()
+    assert UserRepository.get_user_overview(1, transactions_per_account=-1) is False
+
+
+def test_get_user_overview_as_views(db_session):
+    quick_add_test_user()
+    AccountRepository.create_bank_account(1, "savings", 1.5)
+    AccountRepository.create_bank_account(1, "checking", 0.5)
+    for amount in (1.0, 2.0, 3.0):
+        TransactionRepository.create_transaction(1, amount, "Deposit", "credit")
+    db_session.expire_all()
+
+    with assert_max_queries(3):
+        overview = UserRepository.get_user_overview(
+            1, transactions_per_account=2, as_view=True
+        )
+
+    assert overview["user"] == UserView(
+        1,
+        False,
+        "test_user",
+        "test@example.com",
+        "Test",
+        "User",
+        "1234567890",
+        "123 Test St",
+    )
+    assert [account.account_type for account in overview["accounts"]] == [
+        "savings",
+        "checking",
+    ]
+    assert [
+        transaction.amount for transaction in overview["recent_transactions"][1]
+    ] == [3.0, 2.0]
+    assert overview["recent_transactions"][2] == []